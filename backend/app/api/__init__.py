@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import items, my_lists
+from app.api.endpoints import batch, items, locations, my_lists, search
 
 router = APIRouter()
 
 router.include_router(items.router, prefix="/items", tags=["items"])
 router.include_router(my_lists.router, prefix="/my-lists", tags=["my-lists"])
+router.include_router(locations.router, prefix="/locations", tags=["locations"])
+router.include_router(batch.router, prefix="/batch", tags=["batch"])
+router.include_router(search.router, prefix="/search", tags=["search"])
@@ -0,0 +1,127 @@
+# Conditional GET helpers (ETag / Last-Modified)
+import hashlib
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+
+from app.core.cache import CacheSlot
+from app.core.compression import (
+    encoded_etag,
+    is_compressible,
+    negotiate,
+    route_policy,
+    strip_encoding_suffix,
+)
+
+
+def make_etag(*parts: object) -> str:
+    """
+    バージョン情報（ID・updated_atなど）から強いETagを生成する。
+    本文ではなく行のバージョンから求めるため、シリアライズ前に比較できる。
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\x1f")
+    return f'"{digest.hexdigest()}"'
+
+
+def collection_etag(kind: str, versions: Iterable[tuple[int, datetime]]) -> str:
+    """ページ内の (id, updated_at) の並びから一覧用のETagを生成する"""
+    return make_etag(
+        kind, *(f"{id_}@{updated_at.isoformat()}" for id_, updated_at in versions)
+    )
+
+
+def _as_utc(value: datetime) -> datetime:
+    # DBの日時はUTCのnaive datetimeで保存されている
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match は弱い比較（W/ プレフィックスと圧縮時のサフィックスを無視）
+    candidates = (
+        strip_encoding_suffix(tag.strip().removeprefix("W/"))
+        for tag in header.split(",")
+    )
+    return etag.removeprefix("W/") in candidates
+
+
+def is_conditional(request: Request) -> bool:
+    """条件付きリクエスト（If-None-Match / If-Modified-Since 付き）かどうか"""
+    headers = request.headers
+    return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None = None
+) -> bool:
+    """If-None-Match（優先）または If-Modified-Since を評価する"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP日付は秒精度のため切り捨てて比較する
+    return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+
+
+def validator_headers(
+    etag: str, last_modified: datetime | None = None
+) -> dict[str, str]:
+    """ETag / Last-Modified ヘッダー（利用前に毎回再検証させる）"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    """本文を生成せずに304を返す"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+async def respond(request: Request, slot: CacheSlot) -> Response:
+    """
+    シリアライズ済みの本文を返す。検証子が一致すれば本文なしの304を返す。
+    圧縮はこのリクエストで選ばれた符号化だけを行い、結果はキャッシュに追加する
+    """
+    cached = slot.value
+    etag = cached.headers.get("ETag")
+    last_modified = cached.headers.get("Last-Modified")
+    if etag is not None and is_not_modified(
+        request,
+        etag,
+        parsedate_to_datetime(last_modified) if last_modified else None,
+    ):
+        await slot.save()
+        return not_modified(cached.headers)
+    body, headers = cached.body, cached.headers
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if (
+        encoding is not None
+        and is_compressible(cached.media_type)
+        and route_policy(request.scope).applies(len(body))
+    ):
+        # 圧縮済みの本文を返す（CompressionMiddlewareは再圧縮しない）
+        body = slot.variant(encoding)
+        vary = headers.get("Vary")
+        headers = {
+            **headers,
+            "Content-Encoding": encoding,
+            "Vary": f"{vary}, Accept-Encoding" if vary else "Accept-Encoding",
+        }
+        if "ETag" in headers:
+            headers["ETag"] = encoded_etag(headers["ETag"], encoding)
+    await slot.save()
+    return Response(content=body, media_type=cached.media_type, headers=headers)
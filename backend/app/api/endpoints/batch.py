@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.api.endpoints.my_lists import CACHE_NAMESPACE
+from app.core.cache import response_cache
+from app.crud import batch as crud
+from app.db.session import SessionRunner, get_session_runner
+from app.schemas.batch import BatchRequest, BatchResponse
+from app.schemas.my_list import MyListResponse
+
+router = APIRouter()
+
+
+@router.post(
+    "",
+    response_model=BatchResponse,
+    responses={
+        400: {"model": BatchResponse},
+        404: {"model": BatchResponse},
+    },
+)
+async def run_batch(
+    batch_in: BatchRequest, db: SessionRunner = Depends(get_session_runner)
+) -> BatchResponse | JSONResponse:
+    """
+    Apply list and location operations in order, in one transaction.
+
+    Lists and locations created earlier in the batch can be referenced by
+    their `ref` in place of an ID. If any operation fails, nothing is saved
+    and the response status is that of the failing operation.
+    """
+    failed, results, lists = await db.run(crud.execute_batch, batch_in.operations)
+    if failed is not None:
+        return JSONResponse(
+            status_code=results[failed].status,
+            content=BatchResponse(committed=False, results=results).model_dump(
+                mode="json"
+            ),
+        )
+
+    await response_cache.invalidate(CACHE_NAMESPACE)
+    return BatchResponse(
+        committed=True,
+        results=results,
+        lists=[MyListResponse.model_validate(my_list) for my_list in lists],
+    )
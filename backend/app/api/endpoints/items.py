@@ -1,86 +1,139 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+# API Endpoints
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
-from app.db.session import get_db
+from app.api.conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    respond,
+    validator_headers,
+)
+from app.api.pagination import decode_cursor, encode_cursor, next_cursor_headers
+from app.core.cache import CachedResponse, response_cache, serialize
+from app.crud import items as crud
 from app.db.models import Item
+from app.db.session import (
+    SessionRunner,
+    get_read_session_runner,
+    get_session_runner,
+)
 from app.schemas.item import ItemCreate, ItemResponse, ItemUpdate
 
 router = APIRouter()
 
+# レスポンスキャッシュの名前空間（書き込み時にまとめて無効化）
+CACHE_NAMESPACE = "items"
+
+
+def _page_headers(version: crud.ItemPageVersion, limit: int) -> dict[str, str]:
+    """Validator and next-cursor headers for a page version."""
+    count, _, last_id, _ = version
+    next_cursor = None
+    if count and count == limit:
+        next_cursor = encode_cursor({"id": last_id})
+    return {
+        **validator_headers(make_etag("items", *version)),
+        **next_cursor_headers(next_cursor),
+    }
+
 
 @router.get("", response_model=list[ItemResponse])
-def list_items(
+async def list_items(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-) -> list[Item]:
-    """Get all items."""
-    items = db.query(Item).offset(skip).limit(limit).all()
-    return items
+    cursor: str | None = None,
+    db: SessionRunner = Depends(get_read_session_runner),
+) -> Response:
+    """
+    Get all items.
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the
+    next page with keyset pagination; `skip` is ignored in cursor mode.
+    Conditional requests with a matching `If-None-Match` get 304 after a
+    one-row version query, without loading the page.
+    """
+    after_id = None
+    if cursor is not None:
+        try:
+            after_id = int(decode_cursor(cursor)["id"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            ) from e
+
+    cache_key = f"page:{skip}:{limit}:{cursor}"
+    slot = await response_cache.lookup(
+        CACHE_NAMESPACE, cache_key, bypass=db.pinned, replica=db.replica
+    )
+    if slot.value is None:
+        if is_conditional(request):
+            version = await db.run(crud.get_item_page_version, skip, limit, after_id)
+            headers = _page_headers(version, limit)
+            if is_not_modified(request, headers["ETag"]):
+                return not_modified(headers)
+
+        items = await db.run(crud.list_items, skip, limit, after_id)
+        # ETagは実際に返す本文のバージョンから求め直す
+        headers = _page_headers(crud.item_page_version(items), limit)
+        slot.store(CachedResponse(serialize(list[ItemResponse], items), headers))
+    return await respond(request, slot)
 
 
 @router.post("", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
-def create_item(
+async def create_item(
     item_in: ItemCreate,
-    db: Session = Depends(get_db),
+    db: SessionRunner = Depends(get_session_runner),
 ) -> Item:
     """Create a new item."""
-    item = Item(**item_in.model_dump())
-    db.add(item)
-    db.commit()
-    db.refresh(item)
+    item = await db.run(crud.create_item, item_in)
+    await response_cache.invalidate(CACHE_NAMESPACE)
     return item
 
 
 @router.get("/{item_id}", response_model=ItemResponse)
-def get_item(
+async def get_item(
     item_id: int,
-    db: Session = Depends(get_db),
-) -> Item:
+    request: Request,
+    db: SessionRunner = Depends(get_read_session_runner),
+) -> Response:
     """Get a specific item by ID."""
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Item not found",
+    cache_key = f"item:{item_id}"
+    slot = await response_cache.lookup(
+        CACHE_NAMESPACE, cache_key, bypass=db.pinned, replica=db.replica
+    )
+    if slot.value is None:
+        item = await db.run(crud.get_item, item_id)
+        slot.store(
+            CachedResponse(
+                serialize(ItemResponse, item),
+                validator_headers(
+                    make_etag("item", item.id, item.updated_at), item.updated_at
+                ),
+            )
         )
-    return item
+    return await respond(request, slot)
 
 
 @router.put("/{item_id}", response_model=ItemResponse)
-def update_item(
+async def update_item(
     item_id: int,
     item_in: ItemUpdate,
-    db: Session = Depends(get_db),
+    db: SessionRunner = Depends(get_session_runner),
 ) -> Item:
     """Update an item."""
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Item not found",
-        )
-
-    update_data = item_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(item, field, value)
-
-    db.commit()
-    db.refresh(item)
+    item = await db.run(crud.update_item, item_id, item_in)
+    await response_cache.invalidate(CACHE_NAMESPACE)
     return item
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_item(
+async def delete_item(
     item_id: int,
-    db: Session = Depends(get_db),
+    db: SessionRunner = Depends(get_session_runner),
 ) -> None:
     """Delete an item."""
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Item not found",
-        )
-    db.delete(item)
-    db.commit()
+    await db.run(crud.delete_item, item_id)
+    await response_cache.invalidate(CACHE_NAMESPACE)
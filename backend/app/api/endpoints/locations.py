@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.core.compression import compression
+from app.core.fastjson import FastJSONResponse
+from app.crud import locations as crud
+from app.db.session import SessionRunner, get_session_runner
+from app.schemas.my_list import (
+    LocationResponse,
+    MarkerClusters,
+    NearbyLocationResponse,
+)
+
+router = APIRouter()
+
+
+@router.get(
+    "/within",
+    response_model=list[LocationResponse],
+    response_class=FastJSONResponse,
+)
+# マーカー座標の配列は小さくてもよく縮むため、既定より低い閾値で圧縮する
+@compression(minimum_size=512)
+async def list_locations_within(
+    min_lat: float = Query(ge=-90, le=90),
+    min_lng: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    max_lng: float = Query(ge=-180, le=180),
+    list_id: int | None = None,
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: SessionRunner = Depends(get_session_runner),
+) -> FastJSONResponse:
+    """
+    Get saved locations inside a map viewport.
+
+    A viewport crossing the antimeridian is expressed with `min_lng > max_lng`.
+    """
+    records = await db.run(
+        crud.locations_within_records,
+        min_lat,
+        min_lng,
+        max_lat,
+        max_lng,
+        list_id,
+        limit,
+    )
+    return FastJSONResponse(records)
+
+
+@router.get(
+    "/clusters",
+    response_model=MarkerClusters,
+    response_class=FastJSONResponse,
+)
+@compression(minimum_size=512)
+async def list_location_clusters(
+    zoom: int = Query(ge=0, le=24),
+    min_lat: float = Query(ge=-90, le=90),
+    min_lng: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    max_lng: float = Query(ge=-180, le=180),
+    list_id: int | None = None,
+    limit: int = Query(default=300, ge=1, le=2000),
+    db: SessionRunner = Depends(get_session_runner),
+) -> FastJSONResponse:
+    """
+    Get clustered markers for a map viewport at a zoom level.
+
+    Locations are grouped on a per-zoom grid of about 64px cells, so the
+    payload depends on the viewport size rather than the number of saved
+    locations. Clusters come with their count and centroid; a single-location
+    cluster carries its `location_id`. At close zooms the locations are
+    returned one by one. A viewport crossing the antimeridian is expressed
+    with `min_lng > max_lng`.
+    """
+    # numpyの読み込みはコールドスタートで重いため、初回利用時まで遅延させる
+    from app.crud import clusters
+
+    result = await db.run(
+        clusters.marker_clusters,
+        zoom,
+        min_lat,
+        min_lng,
+        max_lat,
+        max_lng,
+        list_id,
+        limit,
+    )
+    return FastJSONResponse(result)
+
+
+@router.get("/nearby", response_model=list[NearbyLocationResponse])
+async def list_nearby_locations(
+    lat: float = Query(ge=-90, le=90),
+    lng: float = Query(ge=-180, le=180),
+    k: int = Query(default=10, ge=1, le=100),
+    list_id: int | None = None,
+    max_distance_m: float | None = Query(default=None, gt=0),
+    db: SessionRunner = Depends(get_session_runner),
+) -> list[NearbyLocationResponse]:
+    """Get the k saved locations nearest to a point."""
+    results = await db.run(crud.nearest_locations, lat, lng, k, list_id, max_distance_m)
+    return [
+        NearbyLocationResponse(
+            **LocationResponse.model_validate(location).model_dump(),
+            distance_m=distance,
+        )
+        for location, distance in results
+    ]
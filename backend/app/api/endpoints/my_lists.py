@@ -1,159 +1,519 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.api.conditional import (
+    collection_etag,
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    respond,
+    validator_headers,
+)
+from app.api.location_export import EXPORT_MEDIA_TYPES, stream_export
+from app.api.location_import import detect_format, iter_rows
+from app.api.pagination import decode_cursor, encode_cursor, next_cursor_headers
+from app.core import columnar
+from app.core.cache import CachedResponse, response_cache
+from app.core.fastjson import dumps
+from app.crud import my_lists as crud
+from app.crud import sync as sync_crud
 from app.db.models import Location, MyList
-from app.db.session import get_db
+from app.db.session import (
+    SessionRunner,
+    get_read_session_runner,
+    get_session_runner,
+    session_scope,
+)
 from app.schemas.my_list import (
     LocationCreate,
+    LocationImportError,
+    LocationImportResult,
+    LocationMove,
     LocationReorder,
     LocationResponse,
+    MyListChanges,
     MyListCreate,
     MyListResponse,
+    MyListSummary,
     MyListUpdate,
 )
+from app.schemas.route import RouteInfo, RouteLeg, RouteOptimizeRequest
 
 router = APIRouter()
 
+# レスポンスキャッシュの名前空間（リスト・地点の書き込み時にまとめて無効化）
+CACHE_NAMESPACE = "my_lists"
+
+# 一括取り込みで1回のINSERTにまとめる行数
+IMPORT_BATCH_SIZE = 1000
+
+
+def _list_page_headers(
+    versions: list[tuple[int, datetime]], limit: int, kind: str = "my-lists"
+) -> dict[str, str]:
+    """Validator and next-cursor headers for a page of (id, updated_at)."""
+    next_cursor = None
+    if versions and len(versions) == limit:
+        last_id, last_updated_at = versions[-1]
+        next_cursor = encode_cursor(
+            {"updated_at": last_updated_at.isoformat(), "id": last_id}
+        )
+    return {
+        **validator_headers(collection_etag(kind, versions)),
+        **next_cursor_headers(next_cursor),
+    }
+
+
+def _decode_list_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    if cursor is None:
+        return None
+    try:
+        values = decode_cursor(cursor)
+        return (datetime.fromisoformat(values["updated_at"]), int(values["id"]))
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+def _representation(request: Request, kind: str) -> tuple[bool, str]:
+    """
+    Whether the client asked for the columnar encoding via Accept, and the
+    ETag kind for that representation (JSON keeps the plain kind).
+    """
+    if columnar.prefers_columnar(request.headers.get("accept")):
+        return True, f"{kind}:columnar"
+    return False, kind
+
+
+def _cached_lists(
+    lists: list[dict], headers: dict[str, str], as_columnar: bool
+) -> CachedResponse:
+    """MyListResponse-shaped dicts encoded as JSON or columnar."""
+    if as_columnar:
+        return CachedResponse(
+            columnar.encode_my_lists(lists), headers, media_type=columnar.MEDIA_TYPE
+        )
+    return CachedResponse(dumps(lists), headers)
+
 
 # MyList endpoints
 @router.get("", response_model=list[MyListResponse])
-def list_my_lists(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
-) -> list[MyList]:
-    """Get all lists with their locations."""
-    lists = (
-        db.query(MyList)
-        .order_by(MyList.updated_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+async def list_my_lists(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    db: SessionRunner = Depends(get_read_session_runner),
+) -> Response:
+    """
+    Get all lists with their locations.
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the
+    next page with keyset pagination; `skip` is ignored in cursor mode.
+    Conditional requests with a matching `If-None-Match` get 304 after an
+    index-only version query, without loading any locations.
+    Send `Accept: application/vnd.locations.columnar` for the compact
+    columnar encoding (see app.core.columnar for the decoder).
+    """
+    after = _decode_list_cursor(cursor)
+    as_columnar, kind = _representation(request, "my-lists")
+    cache_key = f"page:{skip}:{limit}:{cursor}:{kind}"
+    slot = await response_cache.lookup(
+        CACHE_NAMESPACE, cache_key, bypass=db.pinned, replica=db.replica
+    )
+    if slot.value is None:
+        if is_conditional(request):
+            versions = await db.run(crud.list_my_list_versions, skip, limit, after)
+            headers = {**_list_page_headers(versions, limit, kind), "Vary": "Accept"}
+            if is_not_modified(request, headers["ETag"]):
+                return not_modified(headers)
+
+        # ORMオブジェクト・スキーマ検証を経由せず、dictのまま直接エンコードする
+        lists = await db.run(crud.list_my_list_records, skip, limit, after)
+        # ETagは実際に返す本文のバージョンから求め直す
+        versions = [(my_list["id"], my_list["updated_at"]) for my_list in lists]
+        headers = {**_list_page_headers(versions, limit, kind), "Vary": "Accept"}
+        slot.store(_cached_lists(lists, headers, as_columnar))
+    return await respond(request, slot)
+
+
+@router.get("/summaries", response_model=list[MyListSummary])
+async def list_my_list_summaries(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    db: SessionRunner = Depends(get_read_session_runner),
+) -> Response:
+    """
+    Get list cards: location count, bounding box and centroid per list.
+
+    Same order and cursors as the full listing, read in one query from the
+    list rows only, so the cost does not depend on how many locations the
+    lists hold.
+    """
+    after = _decode_list_cursor(cursor)
+    cache_key = f"summaries:{skip}:{limit}:{cursor}"
+    slot = await response_cache.lookup(
+        CACHE_NAMESPACE, cache_key, bypass=db.pinned, replica=db.replica
+    )
+    if slot.value is None:
+        summaries = await db.run(crud.list_my_list_summaries, skip, limit, after)
+        slot.store(
+            CachedResponse(
+                dumps(summaries),
+                _list_page_headers(
+                    [(summary["id"], summary["updated_at"]) for summary in summaries],
+                    limit,
+                    kind="my-list-summaries",
+                ),
+            )
+        )
+    return await respond(request, slot)
+
+
+@router.get("/changes", response_model=MyListChanges)
+async def list_my_list_changes(
+    since: int | None = None,
+    limit: int = Query(default=1000, ge=1, le=10000),
+    db: SessionRunner = Depends(get_read_session_runner),
+) -> Response:
+    """
+    Get the lists and locations created, updated, reordered or deleted after
+    the sync token `since`.
+
+    Changed rows come back whole and deletions as tombstone IDs; pass the
+    returned `token` as `since` next time, right away while `has_more` is
+    true. With no token, or one older than the retained change log, the
+    response has `reset: true` and the current token: refetch everything,
+    then sync from that token.
+    """
+    changes = await db.run(sync_crud.list_changes, since, limit)
+    return Response(dumps(changes), media_type="application/json")
+
+
+def _export_response(
+    request: Request, list_id: int | None, fmt: str | None
+) -> StreamingResponse:
+    if fmt is None:
+        # format 未指定時は Accept で columnar を選べる（既定はNDJSON）
+        accept = request.headers.get("accept")
+        fmt = "columnar" if columnar.prefers_columnar(accept) else "ndjson"
+    filename = f"my-lists-{list_id}" if list_id is not None else "my-lists"
+    return StreamingResponse(
+        stream_export(list_id, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+            "Vary": "Accept",
+        },
     )
-    return lists
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_my_lists(
+    request: Request,
+    format: str | None = Query(default=None, pattern="^(ndjson|geojson|columnar)$"),
+) -> StreamingResponse:
+    """
+    Stream all lists and their locations as NDJSON, a GeoJSON
+    FeatureCollection or columnar frames.
+
+    Rows are read through a server-side cursor and written out as they
+    arrive, so memory use does not grow with the dataset. Without `format`,
+    `Accept: application/vnd.locations.columnar` selects columnar and
+    anything else NDJSON.
+    """
+    return _export_response(request, None, format)
 
 
 @router.post("", response_model=MyListResponse, status_code=201)
-def create_my_list(list_in: MyListCreate, db: Session = Depends(get_db)) -> MyList:
+async def create_my_list(
+    list_in: MyListCreate, db: SessionRunner = Depends(get_session_runner)
+) -> MyList:
     """Create a new list."""
-    my_list = MyList(**list_in.model_dump())
-    db.add(my_list)
-    db.commit()
-    db.refresh(my_list)
+    my_list = await db.run(crud.create_my_list, list_in)
+    await response_cache.invalidate(CACHE_NAMESPACE)
     return my_list
 
 
 @router.get("/{list_id}", response_model=MyListResponse)
-def get_my_list(list_id: int, db: Session = Depends(get_db)) -> MyList:
-    """Get a specific list by ID."""
-    my_list = db.query(MyList).filter(MyList.id == list_id).first()
-    if not my_list:
-        raise HTTPException(status_code=404, detail="List not found")
-    return my_list
+async def get_my_list(
+    list_id: int,
+    request: Request,
+    db: SessionRunner = Depends(get_read_session_runner),
+) -> Response:
+    """
+    Get a specific list by ID.
+
+    The ETag follows the list's updated_at, which location changes also bump.
+    The columnar encoding (via Accept) holds a single list.
+    """
+    as_columnar, kind = _representation(request, "my-list")
+    cache_key = f"list:{list_id}:{kind}"
+    slot = await response_cache.lookup(
+        CACHE_NAMESPACE, cache_key, bypass=db.pinned, replica=db.replica
+    )
+    if slot.value is None:
+        if is_conditional(request):
+            updated_at = await db.run(crud.get_my_list_version, list_id)
+            etag = make_etag(kind, list_id, updated_at)
+            if is_not_modified(request, etag, updated_at):
+                headers = validator_headers(etag, updated_at)
+                return not_modified({**headers, "Vary": "Accept"})
+
+        my_list = await db.run(crud.get_my_list_record, list_id)
+        updated_at = my_list["updated_at"]
+        headers = {
+            **validator_headers(make_etag(kind, list_id, updated_at), updated_at),
+            "Vary": "Accept",
+        }
+        if as_columnar:
+            cached = _cached_lists([my_list], headers, as_columnar)
+        else:
+            cached = CachedResponse(dumps(my_list), headers)
+        slot.store(cached)
+    return await respond(request, slot)
 
 
 @router.put("/{list_id}", response_model=MyListResponse)
-def update_my_list(
-    list_id: int, list_in: MyListUpdate, db: Session = Depends(get_db)
+async def update_my_list(
+    list_id: int,
+    list_in: MyListUpdate,
+    db: SessionRunner = Depends(get_session_runner),
 ) -> MyList:
     """Update a list."""
-    my_list = db.query(MyList).filter(MyList.id == list_id).first()
-    if not my_list:
-        raise HTTPException(status_code=404, detail="List not found")
-
-    update_data = list_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(my_list, field, value)
-
-    db.commit()
-    db.refresh(my_list)
+    my_list = await db.run(crud.update_my_list, list_id, list_in)
+    await response_cache.invalidate(CACHE_NAMESPACE)
     return my_list
 
 
 @router.delete("/{list_id}", status_code=204)
-def delete_my_list(list_id: int, db: Session = Depends(get_db)) -> None:
+async def delete_my_list(
+    list_id: int, db: SessionRunner = Depends(get_session_runner)
+) -> None:
     """Delete a list and all its locations."""
-    my_list = db.query(MyList).filter(MyList.id == list_id).first()
-    if not my_list:
-        raise HTTPException(status_code=404, detail="List not found")
+    await db.run(crud.delete_my_list, list_id)
+    await response_cache.invalidate(CACHE_NAMESPACE)
 
-    db.delete(my_list)
-    db.commit()
+
+@router.get("/{list_id}/export", response_class=StreamingResponse)
+async def export_my_list(
+    list_id: int,
+    request: Request,
+    format: str | None = Query(default=None, pattern="^(ndjson|geojson|columnar)$"),
+) -> StreamingResponse:
+    """Stream one list and its locations like `export_my_lists`."""
+    # 存在確認のセッションは応答前に閉じる（ストリーミングは別の接続を使うため、
+    # リクエストのセッションを保持したままだと1リクエストで2接続になる）
+    async with session_scope() as db:
+        await db.run(crud.ensure_my_list_exists, list_id)
+    return _export_response(request, list_id, format)
 
 
 # Location endpoints within a list
 @router.post("/{list_id}/locations", response_model=LocationResponse, status_code=201)
-def add_location_to_list(
-    list_id: int, location_in: LocationCreate, db: Session = Depends(get_db)
+async def add_location_to_list(
+    list_id: int,
+    location_in: LocationCreate,
+    db: SessionRunner = Depends(get_session_runner),
 ) -> Location:
     """Add a location to a list."""
-    my_list = db.query(MyList).filter(MyList.id == list_id).first()
-    if not my_list:
-        raise HTTPException(status_code=404, detail="List not found")
-
-    # Get the next order index
-    max_order = (
-        db.query(Location)
-        .filter(Location.my_list_id == list_id)
-        .count()
-    )
+    location = await db.run(crud.add_location, list_id, location_in)
+    await response_cache.invalidate(CACHE_NAMESPACE)
+    return location
+
+
+@router.post(
+    "/{list_id}/locations/import",
+    response_model=LocationImportResult,
+    status_code=201,
+)
+async def import_locations(
+    list_id: int,
+    request: Request,
+    format: str | None = None,
+    max_errors: int = 100,
+    db: SessionRunner = Depends(get_session_runner),
+) -> LocationImportResult:
+    """
+    Bulk-append locations to a list from a CSV, NDJSON or GeoJSON body.
+
+    The body is parsed as it streams in and rows are validated with
+    `LocationCreate`. Valid rows go in as batched inserts in one transaction.
+    Invalid rows are skipped and listed in `errors`.
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    next_index = await db.run(crud.next_order_index, list_id)
+
+    inserted = 0
+    error_count = 0
+    errors: list[LocationImportError] = []
+    batch: list[LocationCreate] = []
+
+    def record_error(row_number: int, message: str) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < max_errors:
+            errors.append(LocationImportError(row=row_number, error=message))
+
+    async for row_number, row in iter_rows(request.stream(), fmt):
+        if isinstance(row, Exception):
+            record_error(row_number, str(row))
+            continue
+        try:
+            batch.append(LocationCreate.model_validate(row))
+        except ValidationError as e:
+            record_error(
+                row_number,
+                "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                    for err in e.errors()
+                ),
+            )
+            continue
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            inserted += await db.run(
+                crud.insert_locations, list_id, batch, next_index + inserted
+            )
+            batch = []
 
-    location = Location(
-        **location_in.model_dump(),
-        my_list_id=list_id,
-        order_index=max_order,
+    # insert_locations がリストの集計値と updated_at も更新する
+    inserted += await db.run(
+        crud.insert_locations, list_id, batch, next_index + inserted
+    )
+    await db.run(Session.commit)
+    await response_cache.invalidate(CACHE_NAMESPACE)
+    return LocationImportResult(
+        inserted=inserted, error_count=error_count, errors=errors
     )
-    db.add(location)
-    db.commit()
-    db.refresh(location)
-    return location
 
 
 @router.delete("/{list_id}/locations/{location_id}", status_code=204)
-def remove_location_from_list(
-    list_id: int, location_id: int, db: Session = Depends(get_db)
+async def remove_location_from_list(
+    list_id: int, location_id: int, db: SessionRunner = Depends(get_session_runner)
 ) -> None:
     """Remove a location from a list."""
-    location = (
-        db.query(Location)
-        .filter(Location.id == location_id, Location.my_list_id == list_id)
-        .first()
-    )
-    if not location:
-        raise HTTPException(status_code=404, detail="Location not found")
-
-    db.delete(location)
-    db.commit()
+    await db.run(crud.remove_location, list_id, location_id)
+    await response_cache.invalidate(CACHE_NAMESPACE)
 
 
 @router.put("/{list_id}/locations/reorder", response_model=list[LocationResponse])
-def reorder_locations(
-    list_id: int, reorder_in: LocationReorder, db: Session = Depends(get_db)
+async def reorder_locations(
+    list_id: int,
+    reorder_in: LocationReorder,
+    db: SessionRunner = Depends(get_session_runner),
 ) -> list[Location]:
     """Reorder locations within a list."""
-    my_list = db.query(MyList).filter(MyList.id == list_id).first()
-    if not my_list:
-        raise HTTPException(status_code=404, detail="List not found")
+    locations = await db.run(crud.reorder_locations, list_id, reorder_in)
+    await response_cache.invalidate(CACHE_NAMESPACE)
+    return locations
+
+
+@router.post("/{list_id}/locations/{location_id}/move", response_model=LocationResponse)
+async def move_location(
+    list_id: int,
+    location_id: int,
+    move_in: LocationMove,
+    db: SessionRunner = Depends(get_session_runner),
+) -> Location:
+    """
+    Move a location between `after_id` and `before_id` (or to the end).
+
+    Only the moved location is written, unless the gap between order indices
+    gets too small: then the list is renumbered in the same transaction.
+    """
+    location, _ = await db.run(crud.move_location, list_id, location_id, move_in)
+    await response_cache.invalidate(CACHE_NAMESPACE)
+    return location
 
-    # Get all locations for this list
-    locations = db.query(Location).filter(Location.my_list_id == list_id).all()
-    location_map = {loc.id: loc for loc in locations}
 
-    # Validate all location IDs exist
-    for loc_id in reorder_in.location_ids:
-        if loc_id not in location_map:
+@router.post("/{list_id}/optimize-route", response_model=RouteInfo)
+async def optimize_route(
+    list_id: int,
+    route_in: RouteOptimizeRequest | None = None,
+    db: SessionRunner = Depends(get_session_runner),
+) -> RouteInfo:
+    """
+    Compute a short visiting order for the locations of a list.
+
+    Straight-line (haversine) distances are used, and durations are estimated
+    from `average_speed_kmh`. With `persist`, the order is saved like
+    `reorder_locations` does.
+    """
+    route_in = route_in or RouteOptimizeRequest()
+    locations = await db.run(crud.list_locations, list_id)
+    location_ids = [location.id for location in locations]
+
+    start = 0
+    if route_in.start_location_id is not None:
+        if route_in.start_location_id not in location_ids:
             raise HTTPException(
-                status_code=400, detail=f"Location {loc_id} not found in list"
+                status_code=400,
+                detail=f"Location {route_in.start_location_id} not found in list",
             )
+        start = location_ids.index(route_in.start_location_id)
 
-    # Update order indices
-    for index, loc_id in enumerate(reorder_in.location_ids):
-        location_map[loc_id].order_index = index
+    # numpyの読み込みはコールドスタートで重いため、初回利用時まで遅延させる
+    from app.core import routing
+
+    # CPU負荷の高い計算はイベントループを塞がないようスレッドプールで実行
+    order, leg_distances = await run_in_threadpool(
+        routing.optimize_route,
+        [location.lat for location in locations],
+        [location.lng for location in locations],
+        start=start,
+        round_trip=route_in.round_trip,
+        time_limit=route_in.time_limit_ms / 1000,
+    )
+    optimized_order = [location_ids[i] for i in order]
 
-    db.commit()
+    if route_in.persist and optimized_order:
+        await db.run(
+            crud.reorder_locations,
+            list_id,
+            LocationReorder(location_ids=optimized_order),
+        )
+        await response_cache.invalidate(CACHE_NAMESPACE)
 
-    # Return locations in new order
-    return (
-        db.query(Location)
-        .filter(Location.my_list_id == list_id)
-        .order_by(Location.order_index)
-        .all()
+    meters_per_second = route_in.average_speed_kmh * 1000 / 3600
+    stops = list(optimized_order)
+    if route_in.round_trip:
+        stops += optimized_order[:1]
+    legs = [
+        RouteLeg(
+            start_location_id=start_id,
+            end_location_id=end_id,
+            distance_m=distance,
+            duration_s=distance / meters_per_second,
+            distance=routing.format_distance(distance),
+            duration=routing.format_duration(distance / meters_per_second),
+        )
+        for start_id, end_id, distance in zip(
+            stops, stops[1:], leg_distances, strict=False
+        )
+    ]
+    total_distance = sum(leg_distances)
+    total_duration = total_distance / meters_per_second
+    return RouteInfo(
+        list_id=list_id,
+        optimized_order=optimized_order,
+        total_distance_m=total_distance,
+        total_duration_s=total_duration,
+        total_distance=routing.format_distance(total_distance),
+        total_duration=routing.format_duration(total_duration),
+        legs=legs,
     )
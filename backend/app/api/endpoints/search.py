@@ -0,0 +1,47 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+
+from app.crud import search as crud
+from app.db.session import SessionRunner, get_session_runner
+from app.schemas.item import ItemResponse
+from app.schemas.my_list import LocationResponse
+from app.schemas.search import (
+    ItemSearchResult,
+    LocationSearchResult,
+    SearchResponse,
+)
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    types: list[Literal["items", "locations"]] = Query(default=["items", "locations"]),
+    list_id: int | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    db: SessionRunner = Depends(get_session_runner),
+) -> SearchResponse:
+    """
+    Search items and saved locations.
+
+    Every word matches as a prefix, and misspelled words still match by
+    trigram similarity. Results are ranked best first.
+    """
+    items, locations = await db.run(crud.search, q, types, limit, list_id)
+    return SearchResponse(
+        items=[
+            ItemSearchResult(
+                **ItemResponse.model_validate(item).model_dump(), score=score
+            )
+            for item, score in items
+        ],
+        locations=[
+            LocationSearchResult(
+                **LocationResponse.model_validate(location).model_dump(),
+                score=score,
+            )
+            for location, score in locations
+        ],
+    )
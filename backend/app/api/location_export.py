@@ -0,0 +1,156 @@
+# Streaming export of lists and locations (NDJSON / GeoJSON / columnar)
+import json
+from collections.abc import AsyncIterator, Iterator, Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import RowMapping, Select, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core import columnar
+from app.core.config import settings
+from app.db.models import Location, MyList
+from app.db.session import get_async_engine, get_engine
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "geojson": "application/geo+json",
+    "columnar": columnar.MEDIA_TYPE,
+}
+
+# サーバーサイドカーソルから一度に取り出す行数
+EXPORT_PARTITION_SIZE = 1000
+
+_LIST_FIELDS = ("id", "name", "description", "created_at", "updated_at")
+_LOCATION_FIELDS = (
+    "id",
+    "my_list_id",
+    "name",
+    "address",
+    "lat",
+    "lng",
+    "place_id",
+    "order_index",
+    "created_at",
+)
+
+
+def _export_query(list_id: int | None) -> Select:
+    list_columns = [getattr(MyList, f).label(f"list_{f}") for f in _LIST_FIELDS]
+    location_columns = [getattr(Location, f) for f in _LOCATION_FIELDS]
+    query = (
+        select(*list_columns, *location_columns)
+        .outerjoin(Location, Location.my_list_id == MyList.id)
+        .order_by(MyList.id, Location.order_index, Location.id)
+    )
+    if list_id is not None:
+        query = query.where(MyList.id == list_id)
+    return query
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), default=_default
+    )
+
+
+def _list_record(row: RowMapping) -> dict[str, Any]:
+    return {field: row[f"list_{field}"] for field in _LIST_FIELDS}
+
+
+def _location_record(row: RowMapping) -> dict[str, Any]:
+    return {field: row[field] for field in _LOCATION_FIELDS}
+
+
+def _sync_partitions(query: Select) -> Iterator[Sequence[RowMapping]]:
+    with get_engine().connect() as conn:
+        result = conn.execution_options(yield_per=EXPORT_PARTITION_SIZE).execute(query)
+        yield from result.mappings().partitions()
+
+
+async def _partitions(query: Select) -> AsyncIterator[Sequence[RowMapping]]:
+    """
+    サーバーサイドカーソルで結果を分割取得する。
+    非同期モードはasyncpgのストリーミング、同期モードはパーティションごとに
+    スレッドプールで取り出すため、応答中もスレッドを占有し続けない。
+    """
+    if settings.DB_ASYNC:
+        async with get_async_engine().connect() as conn:
+            result = await conn.stream(
+                query.execution_options(yield_per=EXPORT_PARTITION_SIZE)
+            )
+            async for partition in result.mappings().partitions():
+                yield partition
+        return
+
+    iterator = _sync_partitions(query)
+    try:
+        while (partition := await run_in_threadpool(next, iterator, None)) is not None:
+            yield partition
+    finally:
+        await run_in_threadpool(iterator.close)
+
+
+async def stream_export(list_id: int | None, fmt: str) -> AsyncIterator[bytes]:
+    """
+    エクスポート本文をチャンク単位で生成する。メモリ使用量はデータ量に依存しない。
+
+    - ndjson: {"type": "list", ...} の行に続いてその地点の {"type": "location", ...}
+    - geojson: 地点をPoint FeatureとするFeatureCollection
+    - columnar: パーティションごとに、そこで初めて現れたリストと地点の1フレーム
+    """
+    current_list_id = None
+    first_feature = True
+    if fmt == "geojson":
+        yield b'{"type":"FeatureCollection","features":['
+    elif fmt == "columnar":
+        yield columnar.MAGIC
+
+    async for partition in _partitions(_export_query(list_id)):
+        if fmt == "columnar":
+            lists, locations = [], []
+            for row in partition:
+                if row["list_id"] != current_list_id:
+                    current_list_id = row["list_id"]
+                    lists.append(_list_record(row))
+                if row["id"] is not None:
+                    locations.append(_location_record(row))
+            yield columnar.list_frame(lists, locations)
+            continue
+
+        lines = []
+        for row in partition:
+            if fmt == "ndjson":
+                if row["list_id"] != current_list_id:
+                    current_list_id = row["list_id"]
+                    lines.append(_dumps({"type": "list", **_list_record(row)}))
+                if row["id"] is not None:
+                    lines.append(_dumps({"type": "location", **_location_record(row)}))
+                continue
+
+            if row["id"] is None:
+                continue
+            properties = _location_record(row)
+            properties["list_name"] = row["list_name"]
+            feature = {
+                "type": "Feature",
+                "id": row["id"],
+                "geometry": {"type": "Point", "coordinates": [row["lng"], row["lat"]]},
+                "properties": properties,
+            }
+            lines.append(("" if first_feature else ",") + _dumps(feature))
+            first_feature = False
+
+        if lines:
+            separator = "\n" if fmt == "ndjson" else ""
+            tail = "\n" if fmt == "ndjson" else ""
+            yield (separator.join(lines) + tail).encode()
+
+    if fmt == "geojson":
+        yield b"]}"
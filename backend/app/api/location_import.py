@@ -0,0 +1,175 @@
+# Streaming parsers for bulk location import (CSV / NDJSON / GeoJSON)
+import codecs
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import HTTPException
+
+# GeoJSON FeatureCollection は全体を読み込んでから解析するため上限を設ける
+# （大量データは1行1FeatureのNDJSONで送ればストリーミング処理される）
+MAX_GEOJSON_BYTES = 50 * 1024 * 1024
+
+IMPORT_FORMATS = ("csv", "ndjson", "geojson")
+
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/geo+json": "geojson",
+    "application/json": "geojson",
+}
+
+# 列名の別名（スプレッドシートからの取り込み用）
+_FIELD_ALIASES = {
+    "latitude": "lat",
+    "longitude": "lng",
+    "lon": "lng",
+    "long": "lng",
+    "placeid": "place_id",
+    "place id": "place_id",
+    "title": "name",
+}
+
+
+def detect_format(content_type: str | None, explicit: str | None = None) -> str:
+    """クエリパラメータまたはContent-Typeから取り込み形式を決定する"""
+    if explicit is not None:
+        if explicit not in IMPORT_FORMATS:
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported import format: {explicit}"
+            )
+        return explicit
+
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in _CONTENT_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail="Unsupported content type. Use text/csv, "
+            "application/x-ndjson or application/geo+json",
+        )
+    return _CONTENT_TYPES[media_type]
+
+
+def _normalize(row: dict[str, Any]) -> dict[str, Any]:
+    normalized = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        name = key.strip().lower()
+        name = _FIELD_ALIASES.get(name, name)
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "" and name == "place_id":
+                value = None
+        normalized[name] = value
+    normalized.setdefault("address", "")
+    return normalized
+
+
+def _feature_to_row(feature: Any) -> dict[str, Any]:
+    if not isinstance(feature, dict) or feature.get("type") != "Feature":
+        raise ValueError("Expected a GeoJSON Feature")
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") != "Point":
+        raise ValueError("Only Point geometries are supported")
+    lng, lat = geometry["coordinates"][:2]
+    properties = feature.get("properties") or {}
+    return _normalize({**properties, "lat": lat, "lng": lng})
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """受信チャンクを行単位に分割する（行がチャンクを跨いでも良い）"""
+    buffer = ""
+    # UTF-8のマルチバイト文字やCRLFがチャンク境界で分断されても正しく復元する
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    newline_decoder = io.IncrementalNewlineDecoder(None, translate=True)
+    async for chunk in chunks:
+        buffer += newline_decoder.decode(text_decoder.decode(chunk))
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    tail = text_decoder.decode(b"", final=True)
+    buffer += newline_decoder.decode(tail, final=True)
+    if buffer:
+        yield buffer
+
+
+async def iter_rows(
+    chunks: AsyncIterator[bytes], fmt: str
+) -> AsyncIterator[tuple[int, dict[str, Any] | Exception]]:
+    """
+    リクエストボディを逐次解析し、(行番号, 行データ または 解析エラー) を返す。
+    行番号はCSVならヘッダーを除いたデータ行、それ以外はレコードの1始まりの番号。
+    """
+    if fmt == "geojson":
+        body = bytearray()
+        async for chunk in chunks:
+            body += chunk
+            if len(body) > MAX_GEOJSON_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail="GeoJSON body too large; send features as NDJSON",
+                )
+        try:
+            document = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}") from e
+        features = document.get("features") if isinstance(document, dict) else None
+        if not isinstance(features, list):
+            raise HTTPException(
+                status_code=400, detail="Expected a GeoJSON FeatureCollection"
+            )
+        for number, feature in enumerate(features, start=1):
+            try:
+                yield number, _feature_to_row(feature)
+            except (KeyError, TypeError, ValueError) as e:
+                yield number, e
+        return
+
+    if fmt == "ndjson":
+        number = 0
+        async for line in _iter_lines(chunks):
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+                # 1行1FeatureのGeoJSONも受け付ける
+                if isinstance(record, dict) and record.get("type") == "Feature":
+                    yield number, _feature_to_row(record)
+                elif isinstance(record, dict):
+                    yield number, _normalize(record)
+                else:
+                    raise ValueError("Expected a JSON object")
+            except (KeyError, TypeError, ValueError) as e:
+                yield number, e
+        return
+
+    # CSV: 引用符内の改行に対応するため、引用符の数が偶数になるまで行を連結する
+    header: list[str] | None = None
+    record = ""
+    number = 0
+    async for line in _iter_lines(chunks):
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = values
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield (
+                number,
+                ValueError(f"Expected {len(header)} columns, got {len(values)}"),
+            )
+            continue
+        yield number, _normalize(dict(zip(header, values, strict=True)))
@@ -0,0 +1,37 @@
+# Keyset (cursor) pagination helpers
+import base64
+import json
+from typing import Any
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    """ページ末尾のソートキーを不透明なカーソル文字列に変換する"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """カーソル文字列を復元する。不正な値は400を返す"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from e
+    if not isinstance(values, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return values
+
+
+def next_cursor_headers(cursor: str | None) -> dict[str, str]:
+    """次ページのカーソルを返すヘッダー（最終ページなら空）"""
+    return {NEXT_CURSOR_HEADER: cursor} if cursor is not None else {}
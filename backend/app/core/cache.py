@@ -0,0 +1,383 @@
+# Response cache (bounded LRU + optional shared backend)
+import json
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Protocol
+
+from pydantic import TypeAdapter
+
+from app.core.compression import compress
+from app.core.config import settings
+from app.db.query_guard import timed
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {**asdict(self), "hit_ratio": self.hits / lookups if lookups else 0.0}
+
+
+class CacheBackend(Protocol):
+    """キャッシュの保存先。値はシリアライズ済みのバイト列"""
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def incr(self, key: str) -> int: ...
+
+
+class LRUCache:
+    """件数上限付きLRU + TTLのプロセス内キャッシュ（スレッドセーフ）"""
+
+    def __init__(self, max_entries: int = 1024, stats: CacheStats | None = None):
+        self.max_entries = max_entries
+        self.stats = stats or CacheStats()
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    async def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class InMemorySharedCache:
+    """
+    共有キャッシュ（Redis）のテスト用代替。
+    同じ name のインスタンス同士で内容を共有し、複数ワーカー構成を再現する。
+    """
+
+    _stores: dict[str, dict[str, tuple[float, bytes]]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, name: str = "default"):
+        with self._lock:
+            self._store = self._stores.setdefault(name, {})
+
+    async def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._store.pop(key, None)
+                return None
+            return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._store[key] = (time.monotonic() + ttl, value)
+
+    async def incr(self, key: str) -> int:
+        # Redis の INCR と同様、カウンタも通常の値として保存する（期限なし）
+        with self._lock:
+            entry = self._store.get(key)
+            value = int(entry[1]) + 1 if entry is not None else 1
+            self._store[key] = (float("inf"), str(value).encode())
+            return value
+
+
+class RedisCache:
+    """Redisを使った共有キャッシュ（redisパッケージがある場合のみ利用可能）"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def incr(self, key: str) -> int:
+        return int(await self._client.incr(key))
+
+
+@dataclass
+class CachedResponse:
+    """シリアライズ済みのレスポンス本文と、304判定・再送に必要なヘッダー"""
+
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+    media_type: str = "application/json"
+    # 圧縮済みの本文（Content-Encoding -> 本文）。要求された符号化だけを順に追加する
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    def variant(self, encoding: str) -> bytes:
+        """符号化済みの本文を返す（初回だけ圧縮し、以降は保持したものを使う）"""
+        data = self.encoded.get(encoding)
+        if data is None:
+            data = self.encoded[encoding] = compress(self.body, encoding)
+        return data
+
+    def to_bytes(self) -> bytes:
+        meta = json.dumps(
+            {
+                "headers": self.headers,
+                "media_type": self.media_type,
+                "encoded": [[name, len(data)] for name, data in self.encoded.items()],
+            }
+        )
+        encoded = meta.encode()
+        return b"".join(
+            (
+                struct.pack(">I", len(encoded)),
+                encoded,
+                *self.encoded.values(),
+                self.body,
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedResponse":
+        (size,) = struct.unpack_from(">I", data)
+        meta = json.loads(data[4 : 4 + size])
+        offset = 4 + size
+        variants = {}
+        for name, length in meta.pop("encoded", []):
+            variants[name] = data[offset : offset + length]
+            offset += length
+        return cls(body=data[offset:], encoded=variants, **meta)
+
+
+_adapters: dict[Any, TypeAdapter[Any]] = {}
+
+
+def serialize(schema: Any, value: Any) -> bytes:
+    """
+    ORMオブジェクトをレスポンススキーマ経由でJSONバイト列に変換する。
+    TypeAdapterは型ごとに1度だけ構築して使い回す。
+    """
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(schema)
+    with timed("serialize"):
+        return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+class ResponseCache:
+    """
+    名前空間単位で無効化できるレスポンスキャッシュ。
+
+    キーには名前空間の世代番号を含め、無効化は世代を1つ進めるだけで行う。
+    古い世代のエントリは参照されなくなり、LRU/TTLで自然に消える。
+    共有バックエンドがある場合は世代番号もそこに置くため、
+    他のインスタンスでの更新も即座に反映される。
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = 1024,
+        ttl: float = 5.0,
+        shared: CacheBackend | None = None,
+        replica_lag: float = 0.0,
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self.local = LRUCache(max_entries, self.stats)
+        self.shared = shared
+        # レプリカ遅延の上限（秒）。無効化からこの間はレプリカの読み取り結果を保存しない
+        self.replica_lag = replica_lag
+        self._local_generations: dict[str, int] = {}
+        self._local_invalidated_at: dict[str, float] = {}
+
+    async def _generation(self, namespace: str) -> int:
+        if self.shared is None:
+            return self._local_generations.get(namespace, 0)
+        raw = await self.shared.get(f"gen:{namespace}")
+        return int(raw) if raw is not None else 0
+
+    async def _key(self, namespace: str, key: str) -> str:
+        return f"{namespace}:{await self._generation(namespace)}:{key}"
+
+    async def _recently_invalidated(self, namespace: str) -> bool:
+        """無効化から replica_lag 秒以内か（レプリカがまだ追いついていない可能性）"""
+        if self.replica_lag <= 0:
+            return False
+        if self.shared is None:
+            invalidated_at = self._local_invalidated_at.get(namespace)
+            return (
+                invalidated_at is not None
+                and time.monotonic() - invalidated_at < self.replica_lag
+            )
+        return await self.shared.get(f"recent:{namespace}") is not None
+
+    async def lookup(
+        self, namespace: str, key: str, bypass: bool = False, replica: bool = False
+    ) -> "CacheSlot":
+        """
+        エントリを検索する。ミス時は slot.store() と slot.save() で保存する。
+        保存先のキーは検索時点の世代で固定するため、読み込み中に無効化が
+        起きても古い内容が新しい世代に保存されることはない。
+        bypass=True ならキャッシュを読み書きしない（書き込み直後の読み取りなど）。
+        replica=True（レプリカから読む）場合、無効化から replica_lag 秒以内は
+        保存しない。遅延したレプリカの古い内容が新しい世代に残り、
+        固定期間の切れた書き込み元にまで返されるのを防ぐ。
+        """
+        if not self.enabled or bypass:
+            return CacheSlot(self, None)
+        full_key = await self._key(namespace, key)
+        data = await self.local.get(full_key)
+        if data is None and self.shared is not None:
+            data = await self.shared.get(full_key)
+            if data is not None:
+                await self.local.set(full_key, data, self.ttl)
+        if data is None:
+            self.stats.misses += 1
+            if replica and await self._recently_invalidated(namespace):
+                return CacheSlot(self, None)
+            return CacheSlot(self, full_key)
+        self.stats.hits += 1
+        return CacheSlot(self, full_key, CachedResponse.from_bytes(data))
+
+    async def _store(self, full_key: str, value: CachedResponse) -> None:
+        data = value.to_bytes()
+        await self.local.set(full_key, data, self.ttl)
+        if self.shared is not None:
+            await self.shared.set(full_key, data, self.ttl)
+        self.stats.sets += 1
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """名前空間内のすべてのエントリを無効化する（書き込み系ハンドラから呼ぶ）"""
+        if not self.enabled:
+            return
+        for namespace in namespaces:
+            if self.shared is None:
+                self._local_generations[namespace] = (
+                    self._local_generations.get(namespace, 0) + 1
+                )
+            else:
+                await self.shared.incr(f"gen:{namespace}")
+            if self.replica_lag > 0:
+                if self.shared is None:
+                    self._local_invalidated_at[namespace] = time.monotonic()
+                else:
+                    await self.shared.set(f"recent:{namespace}", b"1", self.replica_lag)
+            self.stats.invalidations += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": "shared" if self.shared is not None else "local",
+            "entries": len(self.local),
+            "max_entries": self.local.max_entries,
+            "ttl_seconds": self.ttl,
+            **self.stats.as_dict(),
+        }
+
+
+@dataclass
+class CacheSlot:
+    """ResponseCache.lookup() の結果。value が None ならキャッシュミス"""
+
+    cache: ResponseCache
+    full_key: str | None
+    value: CachedResponse | None = None
+    # 未保存の変更（ミス時の値、ヒット後に追加した圧縮本文）があるか
+    dirty: bool = False
+
+    def store(self, value: CachedResponse) -> CachedResponse:
+        """ミス時の値を設定する。保存は save() で行う（conditional.respond が呼ぶ）"""
+        self.value = value
+        self.dirty = True
+        return value
+
+    def variant(self, encoding: str) -> bytes:
+        """符号化済みの本文。新たに圧縮した場合は save() でキャッシュにも追加する"""
+        if encoding not in self.value.encoded:
+            self.dirty = True
+        return self.value.variant(encoding)
+
+    async def save(self) -> None:
+        if self.dirty and self.full_key is not None:
+            await self.cache._store(self.full_key, self.value)
+        self.dirty = False
+
+
+def _create_shared_backend() -> CacheBackend | None:
+    if settings.CACHE_BACKEND == "memory":
+        return InMemorySharedCache()
+    if settings.CACHE_BACKEND == "redis":
+        if not settings.CACHE_REDIS_URL:
+            logger.warning("CACHE_BACKEND=redis but CACHE_REDIS_URL is not set")
+            return None
+        try:
+            return RedisCache(settings.CACHE_REDIS_URL)
+        except ImportError:
+            logger.warning("redis package is not installed; using local cache only")
+    return None
+
+
+def _cache_enabled(shared: CacheBackend | None) -> bool:
+    if settings.CACHE_ENABLED is None:
+        return shared is not None
+    if (
+        settings.CACHE_ENABLED
+        and shared is None
+        and settings.ENVIRONMENT not in ("development", "dev")
+    ):
+        logger.warning(
+            "Response cache enabled with the local backend: each instance keeps "
+            "its own cache, so writes on another instance are not seen for up to "
+            "CACHE_TTL_SECONDS. Set CACHE_BACKEND=redis to share it."
+        )
+    return settings.CACHE_ENABLED
+
+
+_shared_backend = _create_shared_backend()
+response_cache = ResponseCache(
+    enabled=_cache_enabled(_shared_backend),
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    shared=_shared_backend,
+    replica_lag=(
+        settings.READ_YOUR_WRITES_SECONDS if settings.DATABASE_REPLICA_URL else 0.0
+    ),
+)
@@ -0,0 +1,292 @@
+# Zoom-aware marker clustering (per-zoom grid aggregates in Web Mercator)
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+# クラスタの格子1辺のピクセル数（256pxタイル基準）
+CELL_PX = 64
+# 格子の集計を保持する最大ズーム。これより拡大した表示では個々の地点を返す
+MAX_CLUSTER_ZOOM = 16
+# Web Mercatorで表せる緯度の上限
+_MAX_LAT = 85.05112878
+# 正規化座標の上限（1.0 ちょうどだと格子の範囲外になるため）
+_MAX_COORD = np.nextafter(1.0, 0.0)
+# リスト別の格子を保持する数（超えたら最も古く使われたものを捨てる）
+_MAX_LIST_GRIDS = 32
+
+
+def project(lats, lngs) -> tuple[np.ndarray, np.ndarray]:
+    """緯度経度をWeb Mercatorの正規化座標 (0 <= x, y < 1、y は北が0) に変換する"""
+    lat = np.radians(np.clip(np.asarray(lats, dtype=np.float64), -_MAX_LAT, _MAX_LAT))
+    x = (np.asarray(lngs, dtype=np.float64) + 180.0) / 360.0
+    y = 0.5 - np.arctanh(np.sin(lat)) / (2 * np.pi)
+    return np.clip(x, 0.0, _MAX_COORD), np.clip(y, 0.0, _MAX_COORD)
+
+
+def unproject(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    lngs = x * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * y))))
+    return lats, lngs
+
+
+def cells_per_side(zoom: int) -> int:
+    return (256 << zoom) // CELL_PX
+
+
+class _Level:
+    """1つのズームの格子。空でないセルだけをキー順の配列で持つ"""
+
+    __slots__ = ("keys", "count", "x_sum", "y_sum", "id_sum")
+
+    def __init__(self) -> None:
+        self.keys = np.empty(0, dtype=np.int64)
+        self.count = np.empty(0, dtype=np.int64)
+        self.x_sum = np.empty(0, dtype=np.float64)
+        self.y_sum = np.empty(0, dtype=np.float64)
+        # 1地点だけのセルでは地点のIDそのものになる
+        self.id_sum = np.empty(0, dtype=np.int64)
+
+    def apply(
+        self, keys: np.ndarray, ids: np.ndarray, x: np.ndarray, y: np.ndarray, sign: int
+    ) -> None:
+        """地点を追加（sign=1）または削除（sign=-1）してセルの集計値を更新する"""
+        cells, inverse = np.unique(keys, return_inverse=True)
+        count = np.bincount(inverse, minlength=len(cells)) * sign
+        x_sum = np.bincount(inverse, weights=x, minlength=len(cells)) * sign
+        y_sum = np.bincount(inverse, weights=y, minlength=len(cells)) * sign
+        id_sum = np.zeros(len(cells), dtype=np.int64)
+        np.add.at(id_sum, inverse, ids * sign)
+
+        positions = np.searchsorted(self.keys, cells)
+        found = positions < len(self.keys)
+        found[found] = self.keys[positions[found]] == cells[found]
+        existing = positions[found]
+        self.count[existing] += count[found]
+        self.x_sum[existing] += x_sum[found]
+        self.y_sum[existing] += y_sum[found]
+        self.id_sum[existing] += id_sum[found]
+
+        new = ~found
+        if new.any():
+            # キー順を保ったまま新しいセルを挿入する
+            at = positions[new]
+            self.keys = np.insert(self.keys, at, cells[new])
+            self.count = np.insert(self.count, at, count[new])
+            self.x_sum = np.insert(self.x_sum, at, x_sum[new])
+            self.y_sum = np.insert(self.y_sum, at, y_sum[new])
+            self.id_sum = np.insert(self.id_sum, at, id_sum[new])
+        if sign < 0:
+            keep = self.count > 0
+            if not keep.all():
+                for name in self.__slots__:
+                    setattr(self, name, getattr(self, name)[keep])
+
+    def select(
+        self, n: int, x_ranges: list[tuple[float, float]], y0: float, y1: float
+    ) -> np.ndarray:
+        """表示範囲にかかるセルの位置を返す（キーは x 方向のセル番号 * n + y）"""
+        cy0, cy1 = int(y0 * n), int(y1 * n)
+        selected = []
+        for x0, x1 in x_ranges:
+            lo = np.searchsorted(self.keys, int(x0 * n) * n)
+            hi = np.searchsorted(self.keys, (int(x1 * n) + 1) * n)
+            cy = self.keys[lo:hi] % n
+            selected.append(np.flatnonzero((cy >= cy0) & (cy <= cy1)) + lo)
+        return np.concatenate(selected)
+
+
+class GridIndex:
+    """地点の集合に対する、ズーム 0..MAX_CLUSTER_ZOOM の格子集計"""
+
+    def __init__(self) -> None:
+        self.levels = [_Level() for _ in range(MAX_CLUSTER_ZOOM + 1)]
+
+    def apply(self, ids: np.ndarray, x: np.ndarray, y: np.ndarray, sign: int) -> None:
+        if not len(ids):
+            return
+        for zoom, level in enumerate(self.levels):
+            n = cells_per_side(zoom)
+            keys = (x * n).astype(np.int64) * n + (y * n).astype(np.int64)
+            level.apply(keys, ids, x, y, sign)
+
+
+class MarkerIndex:
+    """
+    全地点の座標と、全体・リスト別の GridIndex（スレッドセーフ）。
+
+    `token` は反映済みの変更履歴の seq（差分同期のトークン）。
+    変更履歴を読んで追加・削除された地点だけを apply() で反映する。
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.token: int | None = None
+        self._set_points(
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int64),
+            np.empty(0),
+            np.empty(0),
+        )
+
+    def _set_points(self, ids, list_ids, x, y) -> None:
+        order = np.argsort(ids, kind="stable")
+        self.ids, self.list_ids = ids[order], list_ids[order]
+        self.x, self.y = x[order], y[order]
+        # リストIDごとの格子（None は全地点）。必要になったときに作る
+        self._grids: OrderedDict[int | None, GridIndex] = OrderedDict()
+
+    def reset(self, token: int, ids, list_ids, lats, lngs) -> None:
+        """全地点から作り直す"""
+        x, y = project(lats, lngs)
+        with self.lock:
+            self._set_points(
+                np.asarray(ids, dtype=np.int64),
+                np.asarray(list_ids, dtype=np.int64),
+                x,
+                y,
+            )
+            self.token = token
+
+    def apply(
+        self,
+        since: int,
+        token: int,
+        deleted_ids,
+        deleted_list_ids,
+        ids,
+        list_ids,
+        lats,
+        lngs,
+    ) -> bool:
+        """
+        Apply changes between `since` and `token`: remove the deleted locations
+        and every location of the deleted lists, then upsert the given rows.
+        Returns False (and changes nothing) when the index is no longer at
+        `since`, e.g. another request applied them first.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        list_ids = np.asarray(list_ids, dtype=np.int64)
+        x, y = project(lats, lngs)
+        with self.lock:
+            if self.token != since:
+                return False
+            # 既存の地点のうち、削除・座標が変わったもの
+            positions = np.searchsorted(self.ids, ids)
+            present = positions < len(self.ids)
+            present[present] = self.ids[positions[present]] == ids[present]
+            unchanged = np.zeros(len(ids), dtype=bool)
+            p = positions[present]
+            unchanged[present] = (
+                (self.x[p] == x[present])
+                & (self.y[p] == y[present])
+                & (self.list_ids[p] == list_ids[present])
+            )
+            removed = np.isin(
+                self.ids, np.asarray(deleted_ids, dtype=np.int64)
+            ) | np.isin(self.list_ids, np.asarray(deleted_list_ids, dtype=np.int64))
+            removed[positions[present & ~unchanged]] = True
+            added = ~unchanged
+
+            for key, grid in self._grids.items():
+                old = removed if key is None else removed & (self.list_ids == key)
+                grid.apply(self.ids[old], self.x[old], self.y[old], -1)
+                new = added if key is None else added & (list_ids == key)
+                grid.apply(ids[new], x[new], y[new], 1)
+
+            keep = ~removed
+            ids = np.concatenate([self.ids[keep], ids[added]])
+            list_ids = np.concatenate([self.list_ids[keep], list_ids[added]])
+            x = np.concatenate([self.x[keep], x[added]])
+            y = np.concatenate([self.y[keep], y[added]])
+            order = np.argsort(ids, kind="stable")
+            self.ids, self.list_ids = ids[order], list_ids[order]
+            self.x, self.y = x[order], y[order]
+            self.token = token
+            return True
+
+    def _grid(self, list_id: int | None) -> GridIndex:
+        grid = self._grids.get(list_id)
+        if grid is not None:
+            self._grids.move_to_end(list_id)
+            return grid
+        mask = slice(None) if list_id is None else self.list_ids == list_id
+        grid = GridIndex()
+        grid.apply(self.ids[mask], self.x[mask], self.y[mask], 1)
+        self._grids[list_id] = grid
+        if len(self._grids) > _MAX_LIST_GRIDS:
+            self._grids.popitem(last=False)
+        return grid
+
+    def clusters(
+        self,
+        zoom: int,
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float,
+        list_id: int | None,
+        limit: int,
+    ) -> dict[str, Any]:
+        """
+        Clusters of the locations in cells overlapping the viewport, shaped like
+        MarkerClusters. `min_lng > max_lng` crosses the antimeridian.
+
+        Above MAX_CLUSTER_ZOOM the locations themselves are returned. When
+        there would be more than `limit` clusters, a coarser zoom is used.
+        """
+        # y は北が0のため、max_lat が y0 になる
+        (x0, x1), (y1, y0) = project([min_lat, max_lat], [min_lng, max_lng])
+        x_ranges = [(x0, _MAX_COORD), (0.0, x1)] if min_lng > max_lng else [(x0, x1)]
+
+        with self.lock:
+            if zoom > MAX_CLUSTER_ZOOM:
+                inside = (self.y >= y0) & (self.y <= y1)
+                inside &= np.logical_or.reduce(
+                    [(self.x >= lo) & (self.x <= hi) for lo, hi in x_ranges]
+                )
+                if list_id is not None:
+                    inside &= self.list_ids == list_id
+                selected = np.flatnonzero(inside)
+                if len(selected) <= limit:
+                    lats, lngs = unproject(self.x[selected], self.y[selected])
+                    return _response(
+                        zoom,
+                        lats,
+                        lngs,
+                        np.ones(len(selected), dtype=np.int64),
+                        self.ids[selected],
+                    )
+
+            grid = self._grid(list_id)
+            for level_zoom in range(min(zoom, MAX_CLUSTER_ZOOM), -1, -1):
+                level = grid.levels[level_zoom]
+                selected = level.select(cells_per_side(level_zoom), x_ranges, y0, y1)
+                if len(selected) <= limit:
+                    break
+            else:
+                # ズーム0でも多い場合（limitが極端に小さい）は大きいクラスタを優先
+                largest = np.argsort(-level.count[selected], kind="stable")
+                selected = np.sort(selected[largest[:limit]])
+
+            count = level.count[selected]
+            lats, lngs = unproject(
+                level.x_sum[selected] / count, level.y_sum[selected] / count
+            )
+            return _response(level_zoom, lats, lngs, count, level.id_sum[selected])
+
+
+def _response(zoom, lats, lngs, count, id_sum) -> dict[str, Any]:
+    clusters = [
+        {
+            "lat": lat,
+            "lng": lng,
+            "count": n,
+            "location_id": location_id if n == 1 else None,
+        }
+        for lat, lng, n, location_id in zip(
+            lats.tolist(), lngs.tolist(), count.tolist(), id_sum.tolist(), strict=True
+        )
+    ]
+    return {"zoom": zoom, "total": int(count.sum()), "clusters": clusters}
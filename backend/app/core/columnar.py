@@ -0,0 +1,233 @@
+# Columnar binary encoding for list / location payloads (negotiated via Accept)
+import struct
+import sys
+from array import array
+from collections.abc import Iterator, Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from app.db.query_guard import timed
+
+MEDIA_TYPE = "application/vnd.locations.columnar"
+MAGIC = b"LCOL\x01"
+
+# 本文の形式（リトルエンディアン）:
+#
+#     payload := MAGIC frame*
+#     frame   := u32 size, strings, u16 table_count, table*
+#     strings := u32 count, u32 length[count], UTF-8のバイト列
+#     table   := u8 name_size, name, u32 row_count, u8 column_count, column*
+#     column  := u8 name_size, name, u8 type, 値の配列（row_count 個）
+#
+# 列の型:
+#     q  int64
+#     d  float64（緯度経度はJSONと同じく倍精度のまま）
+#     t  日時。UNIXエポックからのマイクロ秒（int64、UTCのnaive datetime）
+#     s  文字列。フレーム内の文字列表の番号（uint32、0xFFFFFFFF は null）
+#
+# フレームは自己完結しているため、ストリーミング（エクスポート）では
+# 行を読み込んだ分ずつフレームを書き出す。同じ文字列は1フレームに1回だけ入る。
+
+_NULL_STRING = 0xFFFFFFFF
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_ARRAY_TYPES = {"q": "q", "d": "d", "t": "q", "s": "I"}
+_BIG_ENDIAN = sys.byteorder == "big"
+
+# リスト・地点の列（MyListResponse / LocationResponse のフィールド）
+LIST_COLUMNS = (
+    ("id", "q"),
+    ("name", "s"),
+    ("description", "s"),
+    ("created_at", "t"),
+    ("updated_at", "t"),
+)
+LOCATION_COLUMNS = (
+    ("id", "q"),
+    ("my_list_id", "q"),
+    ("name", "s"),
+    ("address", "s"),
+    ("lat", "d"),
+    ("lng", "d"),
+    ("place_id", "s"),
+    ("order_index", "d"),
+    ("created_at", "t"),
+)
+
+Table = tuple[str, Sequence[tuple[str, str]], Sequence[dict[str, Any]]]
+
+
+def _q(accept: str, media_type: str) -> float | None:
+    for part in accept.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != media_type:
+            continue
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                return float(params[2:])
+            except ValueError:
+                return 0.0
+        return 1.0
+    return None
+
+
+def prefers_columnar(accept: str | None) -> bool:
+    """
+    Accept で columnar 形式が明示され、JSON 以上のq値を持つかどうか
+    （*/* だけの場合は従来どおりJSON）。
+    """
+    if not accept:
+        return False
+    columnar = _q(accept, MEDIA_TYPE)
+    if not columnar:
+        return False
+    json_q = _q(accept, "application/json")
+    if json_q is None:
+        json_q = _q(accept, "application/*") or _q(accept, "*/*") or 0.0
+    return columnar >= json_q
+
+
+def _pack(values: list[Any], typecode: str) -> bytes:
+    packed = array(typecode, values)
+    if _BIG_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _name(value: str) -> bytes:
+    encoded = value.encode()
+    return struct.pack("<B", len(encoded)) + encoded
+
+
+def encode_frame(tables: Sequence[Table]) -> bytes:
+    """Encode tables of (name, columns, rows) into one length-prefixed frame."""
+    with timed("serialize"):
+        strings: dict[str, int] = {}
+        parts = [struct.pack("<H", len(tables))]
+        for table_name, columns, rows in tables:
+            parts.append(_name(table_name))
+            parts.append(struct.pack("<IB", len(rows), len(columns)))
+            for column, kind in columns:
+                values = [row[column] for row in rows]
+                if kind == "s":
+                    values = [
+                        _NULL_STRING
+                        if value is None
+                        else strings.setdefault(value, len(strings))
+                        for value in values
+                    ]
+                elif kind == "t":
+                    values = [(value - _EPOCH) // _MICROSECOND for value in values]
+                parts.append(_name(column) + kind.encode())
+                parts.append(_pack(values, _ARRAY_TYPES[kind]))
+
+        encoded = [value.encode() for value in strings]
+        header = (
+            struct.pack("<I", len(encoded))
+            + _pack([len(value) for value in encoded], "I")
+            + b"".join(encoded)
+        )
+        body = header + b"".join(parts)
+        return struct.pack("<I", len(body)) + body
+
+
+def _unpack(data: memoryview, offset: int, typecode: str, count: int):
+    values = array(typecode)
+    end = offset + values.itemsize * count
+    values.frombytes(data[offset:end])
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values, end
+
+
+def _read_name(data: memoryview, offset: int) -> tuple[str, int]:
+    size = data[offset]
+    return str(data[offset + 1 : offset + 1 + size], "utf-8"), offset + 1 + size
+
+
+def decode_frame(data: memoryview) -> dict[str, dict[str, list[Any]]]:
+    """Decode one frame body into {table: {column: values}}."""
+    (count,) = struct.unpack_from("<I", data)
+    lengths, offset = _unpack(data, 4, "I", count)
+    strings = []
+    for length in lengths:
+        strings.append(str(data[offset : offset + length], "utf-8"))
+        offset += length
+
+    tables = {}
+    (table_count,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    for _ in range(table_count):
+        table_name, offset = _read_name(data, offset)
+        row_count, column_count = struct.unpack_from("<IB", data, offset)
+        offset += 5
+        columns = {}
+        for _ in range(column_count):
+            column, offset = _read_name(data, offset)
+            kind = chr(data[offset])
+            values, offset = _unpack(data, offset + 1, _ARRAY_TYPES[kind], row_count)
+            if kind == "s":
+                values = [
+                    None if index == _NULL_STRING else strings[index]
+                    for index in values
+                ]
+            elif kind == "t":
+                values = [_EPOCH + value * _MICROSECOND for value in values]
+            columns[column] = values.tolist() if isinstance(values, array) else values
+        tables[table_name] = columns
+    return tables
+
+
+def iter_frames(data: bytes) -> Iterator[dict[str, dict[str, list[Any]]]]:
+    """Decode a columnar payload frame by frame (see `decode_frame`)."""
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a columnar payload")
+    view = memoryview(data)
+    offset = len(MAGIC)
+    while offset < len(data):
+        (size,) = struct.unpack_from("<I", view, offset)
+        offset += 4
+        yield decode_frame(view[offset : offset + size])
+        offset += size
+
+
+def rows(columns: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    """Turn decoded columns back into row dicts."""
+    names = list(columns)
+    return [
+        dict(zip(names, values, strict=True))
+        for values in zip(*columns.values(), strict=True)
+    ]
+
+
+def list_frame(lists: Sequence[dict[str, Any]], locations=None) -> bytes:
+    """
+    Frame of lists and locations. `locations` defaults to the lists' nested
+    "locations"; locations are tied back to their list by my_list_id.
+    """
+    if locations is None:
+        locations = [location for my_list in lists for location in my_list["locations"]]
+    return encode_frame(
+        [("lists", LIST_COLUMNS, lists), ("locations", LOCATION_COLUMNS, locations)]
+    )
+
+
+def encode_my_lists(lists: Sequence[dict[str, Any]]) -> bytes:
+    """Encode MyListResponse-shaped dicts (with nested locations)."""
+    return MAGIC + list_frame(lists)
+
+
+def decode_my_lists(data: bytes) -> list[dict[str, Any]]:
+    """
+    Decode a my-lists payload (a list page, a single list or an export)
+    back into MyListResponse-shaped dicts, with datetimes as datetime.
+    """
+    lists: dict[int, dict[str, Any]] = {}
+    for frame in iter_frames(data):
+        for my_list in rows(frame["lists"]):
+            my_list["locations"] = []
+            lists[my_list["id"]] = my_list
+        for location in rows(frame["locations"]):
+            lists[location["my_list_id"]]["locations"].append(location)
+    return list(lists.values())
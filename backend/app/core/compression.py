@@ -0,0 +1,147 @@
+# Response compression (Accept-Encoding negotiation and codecs)
+import gzip
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import settings
+from app.db.query_guard import timed
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotliがない環境では br を提供しない
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandardがない環境では zstd を提供しない
+    zstandard = None
+
+# 圧縮率と速度のバランスを取った固定レベル（リクエストごとに圧縮するため高すぎない値）
+_CODECS: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+}
+if brotli is not None:
+    _CODECS["br"] = lambda body: brotli.compress(body, quality=5)
+if zstandard is not None:
+    _zstd = zstandard.ZstdCompressor(level=3)
+    _CODECS["zstd"] = _zstd.compress
+
+# 対応しうる符号化（q値が同じ場合の優先順）と、この環境で使えるもの
+_ALL_ENCODINGS = ("zstd", "br", "gzip")
+ENCODINGS = tuple(name for name in _ALL_ENCODINGS if name in _CODECS)
+
+# 圧縮する Content-Type（画像・圧縮済みアーカイブ等は対象外）
+_COMPRESSIBLE_PREFIXES = ("text/",)
+_COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/json",
+        "application/geo+json",
+        "application/x-ndjson",
+        "application/javascript",
+        "application/xml",
+        # 数値列はそのままだが、文字列表がよく縮む
+        "application/vnd.locations.columnar",
+    }
+)
+
+
+@dataclass(frozen=True)
+class CompressionPolicy:
+    """ルートごとの圧縮設定（minimum_size=None は COMPRESSION_MINIMUM_SIZE）"""
+
+    enabled: bool = True
+    minimum_size: int | None = None
+
+    def applies(self, size: int) -> bool:
+        if not (self.enabled and settings.COMPRESSION_ENABLED):
+            return False
+        minimum = (
+            self.minimum_size
+            if self.minimum_size is not None
+            else settings.COMPRESSION_MINIMUM_SIZE
+        )
+        return size >= minimum
+
+
+DEFAULT_POLICY = CompressionPolicy()
+_POLICY_ATTRIBUTE = "__compression_policy__"
+
+
+def compression(enabled: bool = True, minimum_size: int | None = None):
+    """
+    エンドポイント関数に圧縮設定を付けるデコレーター（@router.get の下に付ける）。
+
+        @router.get("/large")
+        @compression(minimum_size=256)
+        async def large(): ...
+    """
+    policy = CompressionPolicy(enabled, minimum_size)
+
+    def decorator(endpoint):
+        setattr(endpoint, _POLICY_ATTRIBUTE, policy)
+        return endpoint
+
+    return decorator
+
+
+def route_policy(scope: dict[str, Any]) -> CompressionPolicy:
+    """ルーティング後の scope から、一致したエンドポイントの圧縮設定を返す"""
+    return getattr(scope.get("endpoint"), _POLICY_ATTRIBUTE, DEFAULT_POLICY)
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(_COMPRESSIBLE_PREFIXES) or (
+        media_type in _COMPRESSIBLE_TYPES or media_type.endswith("+json")
+    )
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """
+    Accept-Encoding から使用する符号化を選ぶ（なければNone）。
+    q値が最大のものを選び、同じ場合は zstd > br > gzip の順に優先する。
+    """
+    if not accept_encoding or not ENCODINGS:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in ENCODINGS:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    with timed("compress"):
+        return _CODECS[encoding](body)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """符号化ごとに異なる強いETag（例: "abc" -> "abc-gzip"）"""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def strip_encoding_suffix(etag: str) -> str:
+    """encoded_etag() で付けたサフィックスを取り除く（条件付きリクエストの比較用）"""
+    # 他のインスタンス（別のライブラリ構成）で付けたサフィックスも対象にする
+    for encoding in _ALL_ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
@@ -0,0 +1,43 @@
+# Fast JSON encoding for plain dict/list responses (orjson when installed)
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from app.db.query_guard import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjsonがない環境では標準のjsonを使う
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """
+    dict/list/スカラー（datetimeを含む）をJSONバイト列に変換する。
+    出力はpydanticの dump_json と同じ形式（UTF-8・空白なし・ISO 8601の日時）。
+    """
+    with timed("serialize"):
+        if orjson is not None:
+            return orjson.dumps(value)
+        return json.dumps(
+            value, ensure_ascii=False, separators=(",", ":"), default=_default
+        ).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    検証済みのdict/listをそのままエンコードするレスポンス。
+    大きな一覧を返すルートで response_class に指定し、エンドポイントから
+    このクラスのインスタンスを直接返すとスキーマ検証を経由しない。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,166 @@
+# Geospatial helpers (geohash cells and great-circle distance)
+import math
+
+# geohashで使用するbase32文字（a, i, l, o を除く）
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {c: i for i, c in enumerate(_BASE32)}
+
+# Locationに保存するgeohashの精度（9文字 ≒ 5m四方）
+GEOHASH_PRECISION = 9
+
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def geohash_encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """緯度経度をgeohash文字列に変換する"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # 偶数ビットは経度、奇数ビットは緯度
+
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                bits = (bits << 1) | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """指定精度のgeohashセル1つ分の (緯度幅, 経度幅) を度で返す"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _next_prefix(prefix: str) -> str | None:
+    """辞書順で prefix の直後に来る同じ長さのgeohashを返す（範囲検索の上限用）"""
+    chars = list(prefix)
+    for i in range(len(chars) - 1, -1, -1):
+        index = _BASE32_INDEX[chars[i]]
+        if index < len(_BASE32) - 1:
+            chars[i] = _BASE32[index + 1]
+            return "".join(chars[: i + 1])
+    return None
+
+
+def _cells_for_bbox(
+    min_lat: float, min_lng: float, max_lat: float, max_lng: float, precision: int
+) -> set[str]:
+    lat_step, lng_step = geohash_cell_size(precision)
+    # セルの中心を走査して境界を跨ぐセルも取りこぼさないようにする
+    lat_start = math.floor((min_lat + 90.0) / lat_step) * lat_step - 90.0
+    lng_start = math.floor((min_lng + 180.0) / lng_step) * lng_step - 180.0
+
+    cells = set()
+    lat = lat_start
+    while lat <= max_lat:
+        lng = lng_start
+        while lng <= max_lng:
+            center_lat = min(lat + lat_step / 2, 90.0)
+            center_lng = min(lng + lng_step / 2, 180.0)
+            cells.add(geohash_encode(center_lat, center_lng, precision))
+            lng += lng_step
+        lat += lat_step
+    return cells
+
+
+def bbox_geohash_ranges(
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    max_cells: int = 24,
+) -> list[tuple[str, str | None]]:
+    """
+    バウンディングボックスを覆うgeohashの範囲 [lo, hi) のリストを返す。
+    セル数が max_cells 以下に収まる最も細かい精度を選び、
+    隣接するセルは1つの範囲に結合する（hi=None は上限なし）。
+    日付変更線を跨ぐ場合は min_lng > max_lng を指定する。
+    """
+    if min_lng > max_lng:
+        return bbox_geohash_ranges(
+            min_lat, min_lng, max_lat, 180.0, max_cells
+        ) + bbox_geohash_ranges(min_lat, -180.0, max_lat, max_lng, max_cells)
+
+    cells: set[str] = {""}
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lat_step, lng_step = geohash_cell_size(precision)
+        estimate = (math.ceil((max_lat - min_lat) / lat_step) + 1) * (
+            math.ceil((max_lng - min_lng) / lng_step) + 1
+        )
+        if estimate > max_cells:
+            break
+        cells = _cells_for_bbox(min_lat, min_lng, max_lat, max_lng, precision)
+
+    if cells == {""}:
+        return [("", None)]
+
+    ranges: list[tuple[str, str | None]] = []
+    for prefix in sorted(cells):
+        upper = _next_prefix(prefix)
+        if ranges and ranges[-1][1] == prefix:
+            ranges[-1] = (ranges[-1][0], upper)
+        else:
+            ranges.append((prefix, upper))
+    return ranges
+
+
+def bbox_around(lat: float, lng: float, radius_m: float) -> tuple[float, ...]:
+    """中心点から半径 radius_m を含むバウンディングボックスを返す"""
+    lat_delta = math.degrees(radius_m / EARTH_RADIUS_M)
+    min_lat = max(lat - lat_delta, -90.0)
+    max_lat = min(lat + lat_delta, 90.0)
+
+    # 極に近い場合や半径が大きい場合は経度方向は全周
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9 or radius_m / EARTH_RADIUS_M >= math.pi / 2:
+        return min_lat, -180.0, max_lat, 180.0
+
+    lng_delta = math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat))
+    if lng_delta >= 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+
+    min_lng = lng - lng_delta
+    max_lng = lng + lng_delta
+    # 日付変更線を跨ぐ場合は min_lng > max_lng の形に正規化
+    if min_lng < -180.0:
+        min_lng += 360.0
+    if max_lng > 180.0:
+        max_lng -= 360.0
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """2点間の大円距離（メートル）"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
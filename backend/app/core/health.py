@@ -0,0 +1,104 @@
+# Cached health probes (results are reused for HEALTH_CHECK_INTERVAL seconds)
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Item, Location, MyList
+from app.db.session import session_scope
+from app.db.stats import estimate_row_counts, server_version
+
+# 行数の推定値を返すテーブル
+HEALTH_TABLES = [Item.__tablename__, MyList.__tablename__, Location.__tablename__]
+
+
+class CachedProbe:
+    """
+    結果を interval 秒間キャッシュするヘルスチェック。
+
+    ALB・EventBridge等からの問い合わせ頻度に関係なく、実際のチェックは
+    interval ごとに最大1回だけ実行する。期限切れの時点で同時に来た要求は
+    1回の実行結果を共有する。失敗結果も同じ期間キャッシュし、
+    障害中のDBに接続を繰り返さない。
+    """
+
+    def __init__(self, check: Callable[[], Awaitable[dict[str, Any]]], interval: float):
+        self.check = check
+        self.interval = interval
+        self._result: dict[str, Any] | None = None
+        self._checked_at = 0.0
+        self._checked_at_wall: datetime | None = None
+        # asyncio.Lock はイベントループに紐づくため、ループごとに用意する
+        self._locks: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+            WeakKeyDictionary()
+        )
+
+    def _fresh(self) -> bool:
+        return (
+            self._result is not None
+            and time.monotonic() - self._checked_at < self.interval
+        )
+
+    def _snapshot(self, cached: bool) -> dict[str, Any]:
+        return {
+            **self._result,
+            "checked_at": self._checked_at_wall.isoformat(),
+            "age_seconds": round(time.monotonic() - self._checked_at, 3),
+            "cached": cached,
+        }
+
+    async def get(self) -> dict[str, Any]:
+        if self._fresh():
+            return self._snapshot(cached=True)
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        async with lock:
+            # 待っている間に他の要求がチェックを済ませていればその結果を使う
+            if self._fresh():
+                return self._snapshot(cached=True)
+            self._result = await self.check()
+            self._checked_at = time.monotonic()
+            self._checked_at_wall = datetime.now(UTC)
+            return self._snapshot(cached=False)
+
+    def reset(self) -> None:
+        self._result = None
+
+
+def _database_status(db: Session) -> dict[str, Any]:
+    # 接続確認は SELECT 1 のみ。行数はカタログの推定値でテーブルを走査しない
+    db.execute(text("SELECT 1"))
+    row_estimates = estimate_row_counts(db, HEALTH_TABLES)
+    return {
+        "status": "healthy",
+        "message": "Database connection successful",
+        "database_version": server_version(db),
+        "item_count": row_estimates[Item.__tablename__],
+        "row_estimates": row_estimates,
+    }
+
+
+async def check_database() -> dict[str, Any]:
+    """Connect once, run SELECT 1 and read row-count estimates."""
+    try:
+        async with session_scope() as db:
+            return await db.run(_database_status)
+    except Exception as e:
+        return {
+            "status": "unhealthy",
+            "message": f"Database connection failed: {str(e)}",
+            "database_version": None,
+            "item_count": None,
+            "row_estimates": None,
+        }
+
+
+database_probe = CachedProbe(check_database, settings.HEALTH_CHECK_INTERVAL_SECONDS)
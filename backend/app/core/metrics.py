@@ -0,0 +1,172 @@
+# Prometheus-format metrics (in-process, per instance)
+import math
+import threading
+from collections.abc import Callable, Iterable, Sequence
+
+# リクエスト時間用のバケット（秒）
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# 1リクエストあたりのSQL発行数用のバケット
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """ラベル付きの累積ヒストグラム（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = (*sorted(buckets), math.inf)
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * len(self.buckets), [0.0])
+            counts, total = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            total[0] += value
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = {
+                labels: (list(counts), total[0])
+                for labels, (counts, total) in self._series.items()
+            }
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=True):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    (*self.labelnames, "le"), (*labels, _format_value(bound))
+                )
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            label_str = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_str} {_format_value(total)}"
+            yield f"{self.name}_count{label_str} {cumulative}"
+
+
+class CallbackMetric:
+    """出力時に read() で値を読み取るカウンター・ゲージ（接続プールの累計値など）"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: Sequence[str],
+        read: Callable[[], dict[tuple[str, ...], float]],
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.read = read
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in sorted(self.read().items()):
+            label_str = _format_labels(self.labelnames, labels)
+            yield f"{self.name}{label_str} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[Histogram | CallbackMetric] = []
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def callback(self, *args, **kwargs) -> CallbackMetric:
+        metric = CallbackMetric(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheusのテキスト形式（version 0.0.4）で出力する"""
+        lines = [line for metric in self._metrics for line in metric.collect()]
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Time until the response body was fully sent",
+    ("method", "route", "status"),
+)
+REQUEST_TTFB = registry.histogram(
+    "http_request_ttfb_seconds",
+    "Time until the response headers were sent",
+    ("method", "route", "status"),
+)
+DB_DURATION = registry.histogram(
+    "http_request_db_seconds",
+    "Cumulative SQL execution time per request",
+    ("method", "route"),
+)
+DB_STATEMENTS = registry.histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request",
+    ("method", "route"),
+    buckets=COUNT_BUCKETS,
+)
+POOL_WAIT = registry.histogram(
+    "http_request_pool_wait_seconds",
+    "Time spent waiting for a pooled DB connection per request",
+    ("method", "route"),
+)
+SERIALIZE_DURATION = registry.histogram(
+    "http_request_serialize_seconds",
+    "Time spent serializing response bodies per request",
+    ("method", "route"),
+)
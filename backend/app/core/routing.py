@@ -0,0 +1,178 @@
+# Route optimization (visiting order over saved locations)
+import time
+
+import numpy as np
+
+from app.core.geo import EARTH_RADIUS_M
+
+# 改善とみなす最小の距離差（メートル）。浮動小数点誤差による無限ループ防止
+_EPSILON_M = 1e-6
+
+
+def haversine_matrix(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """全地点間の大円距離行列（メートル）をベクトル演算で求める"""
+    phi = np.radians(lats)[:, None]
+    lam = np.radians(lngs)[:, None]
+    d_phi = phi.T - phi
+    d_lam = lam.T - lam
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi) * np.cos(phi.T) * np.sin(d_lam / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _with_sentinel(dist: np.ndarray) -> np.ndarray:
+    """
+    距離0の番兵ノードを末尾に追加した行列を返す。
+    片道ルートは「最後の地点 → 番兵」で閉じた巡回として扱えるため、
+    2-opt / Or-opt を巡回・片道で共通化できる。
+    """
+    n = len(dist)
+    extended = np.zeros((n + 1, n + 1))
+    extended[:n, :n] = dist
+    return extended
+
+
+def nearest_neighbor_tour(dist: np.ndarray, start: int = 0) -> list[int]:
+    """最近傍法による初期解"""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    tour = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[tour[-1]])
+        nxt = int(np.argmin(row))
+        tour.append(nxt)
+        visited[nxt] = True
+    return tour
+
+
+def _two_opt(dist: np.ndarray, tour: np.ndarray, deadline: float) -> bool:
+    """
+    2-opt による改善を1巡行う（tour[0] は固定、tour[-1] は終端ノード）。
+    各 i について全 j の改善量をまとめて計算する。
+    """
+    improved = False
+    n = len(tour)
+    for i in range(1, n - 2):
+        if time.perf_counter() > deadline:
+            break
+        a, b = tour[i - 1], tour[i]
+        c = tour[i + 1 : n - 1]
+        d = tour[i + 2 : n]
+        delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+        best = int(np.argmin(delta))
+        if delta[best] < -_EPSILON_M:
+            j = i + 1 + best
+            tour[i : j + 1] = tour[i : j + 1][::-1].copy()
+            improved = True
+    return improved
+
+
+def _or_opt(
+    dist: np.ndarray, tour: np.ndarray, deadline: float, max_segment: int = 3
+) -> tuple[np.ndarray, bool]:
+    """
+    Or-opt による改善を1巡行う（長さ1〜max_segmentの区間を別の位置へ移動、反転も考慮）。
+    挿入位置の候補はベクトル演算でまとめて評価する。
+    """
+    improved = False
+    for length in range(1, max_segment + 1):
+        i = 1
+        while i + length < len(tour):
+            if time.perf_counter() > deadline:
+                return tour, improved
+            segment = tour[i : i + length]
+            prev, nxt = tour[i - 1], tour[i + length]
+            first, last = segment[0], segment[-1]
+            removal_gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+
+            rest = np.concatenate([tour[:i], tour[i + length :]])
+            u = rest[:-1]
+            v = rest[1:]
+            forward = dist[u, first] + dist[last, v]
+            backward = dist[u, last] + dist[first, v]
+            insert_cost = np.minimum(forward, backward) - dist[u, v]
+            # 元の位置（prev と nxt の間）への挿入は除外
+            insert_cost[i - 1] = np.inf
+
+            best = int(np.argmin(insert_cost))
+            if insert_cost[best] - removal_gain < -_EPSILON_M:
+                moved = segment if forward[best] <= backward[best] else segment[::-1]
+                tour = np.concatenate([rest[: best + 1], moved, rest[best + 1 :]])
+                improved = True
+            else:
+                i += 1
+    return tour, improved
+
+
+def solve_route(
+    dist: np.ndarray,
+    start: int = 0,
+    round_trip: bool = False,
+    time_limit: float = 1.0,
+) -> list[int]:
+    """
+    訪問順を求める（最近傍法 + 2-opt / Or-opt、time_limit 秒で打ち切り）。
+    戻り値は start から始まる地点インデックスの並び。
+    """
+    n = len(dist)
+    if n <= 2:
+        return [start] + [i for i in range(n) if i != start]
+
+    deadline = time.perf_counter() + time_limit
+    tour = nearest_neighbor_tour(dist, start)
+
+    if round_trip:
+        extended = dist
+        closing = start
+    else:
+        extended = _with_sentinel(dist)
+        closing = n
+    route = np.array(tour + [closing])
+
+    while time.perf_counter() < deadline:
+        improved = _two_opt(extended, route, deadline)
+        route, moved = _or_opt(extended, route, deadline)
+        if not (improved or moved):
+            break
+
+    return [int(i) for i in route[:-1]]
+
+
+def optimize_route(
+    lats: list[float],
+    lngs: list[float],
+    start: int = 0,
+    round_trip: bool = False,
+    time_limit: float = 1.0,
+) -> tuple[list[int], list[float]]:
+    """座標の並びから訪問順と各区間の距離（メートル）を求める"""
+    if not lats:
+        return [], []
+    dist = haversine_matrix(np.array(lats), np.array(lngs))
+    order = solve_route(dist, start=start, round_trip=round_trip, time_limit=time_limit)
+    return order, route_legs(dist, order, round_trip)
+
+
+def route_legs(dist: np.ndarray, order: list[int], round_trip: bool) -> list[float]:
+    """訪問順に沿った各区間の距離（メートル）"""
+    stops = order + [order[0]] if round_trip and len(order) > 1 else order
+    return [float(dist[a, b]) for a, b in zip(stops, stops[1:], strict=False)]
+
+
+def format_distance(meters: float) -> str:
+    """表示用の距離文字列（例: '850 m', '12.3 km'）"""
+    if meters < 1000:
+        return f"{round(meters)} m"
+    return f"{meters / 1000:.1f} km"
+
+
+def format_duration(seconds: float) -> str:
+    """表示用の所要時間文字列（例: '12 mins', '1 hour 5 mins'）"""
+    minutes = max(1, round(seconds / 60)) if seconds > 0 else 0
+    hours, minutes = divmod(minutes, 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours} hour" + ("s" if hours > 1 else ""))
+    if minutes or not hours:
+        parts.append(f"{minutes} min" + ("s" if minutes != 1 else ""))
+    return " ".join(parts)
@@ -0,0 +1,113 @@
+# In-memory full-text / trigram search index (fallback for non-PostgreSQL DBs)
+import bisect
+import re
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable
+
+_WORD = re.compile(r"\w+")
+
+# 全文一致（前方一致）時にトライグラム類似度へ加算する重み
+# PostgreSQLの ts_rank と同程度の大きさにする
+_FULLTEXT_WEIGHT = 0.1
+
+
+def normalize(text: str) -> str:
+    """全角・半角と大文字・小文字の違いを吸収する"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def tokenize(text: str) -> list[str]:
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(text: str) -> set[str]:
+    """pg_trgm と同じく、単語の前に空白2つ・後ろに空白1つを付けて3文字ずつ切り出す"""
+    result = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def prefix_tsquery(text: str) -> str | None:
+    """検索語を to_tsquery 用の「全単語の前方一致」の式にする（語がなければNone）"""
+    words = tokenize(text)
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+
+class SearchIndex:
+    """
+    トークンの前方一致（全文検索）とトライグラム類似度（あいまい検索）の転置インデックス。
+
+    スコアは PostgreSQL の word_similarity + ts_rank を近似したもので、
+    検索語のトライグラムのうち文書に含まれる割合に、全単語が前方一致した場合の
+    加点を足したもの。
+    """
+
+    def __init__(self, documents: Iterable[tuple[int, str]] = ()):
+        self._trigrams: dict[str, set[int]] = {}
+        self._token_docs: dict[str, set[int]] = {}
+        self._token_counts: dict[int, int] = {}
+        self._sorted_tokens: list[str] = []
+        for doc_id, text in documents:
+            self._add(doc_id, text)
+        self._sorted_tokens = sorted(self._token_docs)
+
+    def __len__(self) -> int:
+        return len(self._token_counts)
+
+    def _add(self, doc_id: int, text: str) -> None:
+        words = tokenize(text)
+        self._token_counts[doc_id] = len(words)
+        for word in words:
+            self._token_docs.setdefault(word, set()).add(doc_id)
+        for trigram in trigrams(text):
+            self._trigrams.setdefault(trigram, set()).add(doc_id)
+
+    def _prefix_matches(self, prefix: str) -> set[int]:
+        docs: set[int] = set()
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            docs |= self._token_docs[token]
+        return docs
+
+    def search(
+        self, query: str, limit: int | None = 20, threshold: float = 0.3
+    ) -> list[tuple[int, float]]:
+        """(doc_id, score) をスコアの降順（同点はID順）で返す"""
+        words = tokenize(query)
+        if not words:
+            return []
+
+        # 全文検索: すべての語が文書内のいずれかの単語に前方一致する
+        fulltext: set[int] | None = None
+        for word in words:
+            matches = self._prefix_matches(word)
+            fulltext = matches if fulltext is None else fulltext & matches
+            if not fulltext:
+                break
+
+        # あいまい検索: 検索語のトライグラムのうち文書に含まれる割合
+        query_trigrams = trigrams(query)
+        hits: Counter[int] = Counter()
+        for trigram in query_trigrams:
+            hits.update(self._trigrams.get(trigram, ()))
+
+        scores: dict[int, float] = {}
+        for doc_id, count in hits.items():
+            similarity = count / len(query_trigrams)
+            if similarity >= threshold:
+                scores[doc_id] = similarity
+        for doc_id in fulltext or ():
+            weight = _FULLTEXT_WEIGHT * len(words) / max(self._token_counts[doc_id], 1)
+            scores[doc_id] = hits[doc_id] / len(query_trigrams) + min(
+                weight, _FULLTEXT_WEIGHT
+            )
+
+        ranked = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+        return ranked[:limit]
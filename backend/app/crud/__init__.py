@@ -0,0 +1 @@
+# CRUD operations (sync ORM code shared by the sync and async DB paths)
@@ -0,0 +1,205 @@
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.crud import my_lists as crud
+from app.db.models import MyList
+from app.schemas.batch import (
+    AddLocationOp,
+    BatchOperation,
+    BatchOperationResult,
+    CreateListOp,
+    DeleteListOp,
+    EntityRef,
+    MoveLocationOp,
+    RemoveLocationOp,
+    ReorderLocationsOp,
+    UpdateListOp,
+)
+from app.schemas.my_list import LocationMove
+
+
+class _BatchContext:
+    """1回のバッチ実行中の状態（ref → ID の対応、変更されたリスト）"""
+
+    def __init__(self) -> None:
+        self.refs: dict[str, int] = {}
+        self.touched: set[int] = set()
+        self.deleted: set[int] = set()
+        self.rebalance: set[int] = set()
+
+    def resolve(self, value: EntityRef) -> int:
+        if isinstance(value, int):
+            return value
+        if value not in self.refs:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown ref '{value}'",
+            )
+        return self.refs[value]
+
+    def register(self, ref: str | None, entity_id: int) -> None:
+        if ref is None:
+            return
+        if ref in self.refs:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Duplicate ref '{ref}'",
+            )
+        self.refs[ref] = entity_id
+
+
+def _apply(db: Session, ctx: _BatchContext, op: BatchOperation) -> tuple[int, int]:
+    """Apply one operation without committing. Returns (status, entity id)."""
+    if isinstance(op, CreateListOp):
+        my_list = crud.create_my_list(db, op.data, commit=False)
+        ctx.register(op.ref, my_list.id)
+        ctx.touched.add(my_list.id)
+        return status.HTTP_201_CREATED, my_list.id
+
+    list_id = ctx.resolve(op.list_id)
+    ctx.touched.add(list_id)
+
+    if isinstance(op, UpdateListOp):
+        crud.update_my_list(db, list_id, op.data, commit=False)
+        return status.HTTP_200_OK, list_id
+    if isinstance(op, DeleteListOp):
+        crud.delete_my_list(db, list_id, commit=False)
+        ctx.deleted.add(list_id)
+        return status.HTTP_204_NO_CONTENT, list_id
+    if isinstance(op, RemoveLocationOp):
+        location_id = ctx.resolve(op.location_id)
+        crud.remove_location(db, list_id, location_id, commit=False)
+        return status.HTTP_204_NO_CONTENT, location_id
+    if isinstance(op, MoveLocationOp):
+        move_in = LocationMove(
+            after_id=None if op.after_id is None else ctx.resolve(op.after_id),
+            before_id=None if op.before_id is None else ctx.resolve(op.before_id),
+        )
+        location, needs_rebalance = crud.move_location(
+            db, list_id, ctx.resolve(op.location_id), move_in, commit=False
+        )
+        if needs_rebalance:
+            ctx.rebalance.add(list_id)
+        return status.HTTP_200_OK, location.id
+    if isinstance(op, ReorderLocationsOp):
+        location_ids = [ctx.resolve(value) for value in op.location_ids]
+        crud.set_location_order(db, list_id, location_ids)
+        return status.HTTP_200_OK, list_id
+    raise AssertionError(f"Unhandled batch operation: {op.op}")
+
+
+def _apply_add_locations(
+    db: Session, ctx: _BatchContext, ops: list[AddLocationOp]
+) -> list[int]:
+    """Apply consecutive add_location operations on one list as one INSERT."""
+    list_id = ctx.resolve(ops[0].list_id)
+    ctx.touched.add(list_id)
+    location_ids = crud.append_locations(db, list_id, [op.data for op in ops])
+    for op, location_id in zip(ops, location_ids, strict=True):
+        ctx.register(op.ref, location_id)
+    return location_ids
+
+
+def _add_location_run(operations: list[BatchOperation], start: int) -> int:
+    """Get the end of the run of add_location operations on the same list."""
+    end = start + 1
+    while (
+        end < len(operations)
+        and isinstance(operations[end], AddLocationOp)
+        and operations[end].list_id == operations[start].list_id
+    ):
+        end += 1
+    return end
+
+
+def _failed_results(
+    results: list[BatchOperationResult],
+    operations: list[BatchOperation],
+    failed: int,
+    error: HTTPException,
+) -> list[BatchOperationResult]:
+    """Results of a rolled-back batch: applied and skipped operations become 424."""
+    rolled_back = [
+        result.model_copy(
+            update={
+                "status": status.HTTP_424_FAILED_DEPENDENCY,
+                "id": None,
+                "error": "Rolled back",
+            }
+        )
+        for result in results
+    ]
+    not_run = [
+        BatchOperationResult(
+            index=index,
+            op=operations[index].op,
+            status=status.HTTP_424_FAILED_DEPENDENCY,
+            error="Not run",
+        )
+        for index in range(failed + 1, len(operations))
+    ]
+    return [
+        *rolled_back,
+        BatchOperationResult(
+            index=failed,
+            op=operations[failed].op,
+            status=error.status_code,
+            error=str(error.detail),
+        ),
+        *not_run,
+    ]
+
+
+def execute_batch(
+    db: Session, operations: list[BatchOperation]
+) -> tuple[int | None, list[BatchOperationResult], list[MyList]]:
+    """
+    Apply the operations in order in one transaction.
+
+    Either everything is committed, or nothing is: the first failing operation
+    keeps its own error status and every other operation is reported as 424.
+    Returns (index of the failed operation or None, per-operation results,
+    lists changed by a committed batch).
+    """
+    ctx = _BatchContext()
+    results: list[BatchOperationResult] = []
+
+    index = 0
+    while index < len(operations):
+        op = operations[index]
+        try:
+            if isinstance(op, AddLocationOp):
+                # 同じリストへの連続した追加は1回のINSERTにまとめる
+                end = _add_location_run(operations, index)
+                applied = [
+                    (status.HTTP_201_CREATED, location_id)
+                    for location_id in _apply_add_locations(
+                        db, ctx, operations[index:end]
+                    )
+                ]
+            else:
+                applied = [_apply(db, ctx, op)]
+        except HTTPException as e:
+            db.rollback()
+            return index, _failed_results(results, operations, index, e), []
+
+        for offset, (op_status, entity_id) in enumerate(applied):
+            applied_op = operations[index + offset]
+            results.append(
+                BatchOperationResult(
+                    index=index + offset,
+                    op=applied_op.op,
+                    status=op_status,
+                    id=entity_id,
+                    ref=getattr(applied_op, "ref", None),
+                )
+            )
+        index += len(applied)
+
+    # 隙間が小さくなったリストは、同じトランザクション内でまとめて振り直す
+    for list_id in ctx.rebalance - ctx.deleted:
+        crud.rebalance_locations(db, list_id, commit=False)
+    db.commit()
+
+    lists = crud.list_my_lists_by_id(db, sorted(ctx.touched - ctx.deleted))
+    return None, results, lists
@@ -0,0 +1,94 @@
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.clustering import MarkerIndex
+from app.db.changelog import ENTITY_LIST, ENTITY_LOCATION
+from app.db.models import Location, SyncChange, SyncCounter
+
+# プロセス内で共有するマーカーのインデックス
+marker_index = MarkerIndex()
+# 変更履歴がこれより多い場合は差分を反映せずに作り直す
+_MAX_CATCH_UP = 10_000
+_POINT_COLUMNS = (Location.id, Location.my_list_id, Location.lat, Location.lng)
+
+
+def _columns(rows) -> tuple[list, list, list, list]:
+    if not rows:
+        return [], [], [], []
+    return tuple(list(column) for column in zip(*rows, strict=True))
+
+
+def _rebuild(db: Session, token: int) -> None:
+    # トークンを先に読むため、読み込み中のコミットは次回の差分で再度反映される（冪等）
+    rows = db.execute(select(*_POINT_COLUMNS)).all()
+    marker_index.reset(token, *_columns(rows))
+
+
+def _catch_up(db: Session, since: int, token: int, pruned_seq: int) -> None:
+    if since < pruned_seq:
+        _rebuild(db, token)
+        return
+    changes = db.execute(
+        select(SyncChange.entity, SyncChange.entity_id, SyncChange.deleted)
+        .where(SyncChange.seq > since, SyncChange.seq <= token)
+        .order_by(SyncChange.seq, SyncChange.id)
+        .limit(_MAX_CATCH_UP + 1)
+    ).all()
+    if len(changes) > _MAX_CATCH_UP:
+        _rebuild(db, token)
+        return
+
+    latest = {(entity, entity_id): deleted for entity, entity_id, deleted in changes}
+    deleted_lists = [i for (e, i), d in latest.items() if e == ENTITY_LIST and d]
+    deleted_locations = {
+        i for (e, i), d in latest.items() if e == ENTITY_LOCATION and d
+    }
+    upserted = [i for (e, i), d in latest.items() if e == ENTITY_LOCATION and not d]
+    rows = []
+    if upserted:
+        rows = db.execute(
+            select(*_POINT_COLUMNS).where(Location.id.in_(upserted))
+        ).all()
+        # 後続のトランザクションで削除された地点
+        deleted_locations.update(set(upserted) - {row.id for row in rows})
+    marker_index.apply(
+        since, token, list(deleted_locations), deleted_lists, *_columns(rows)
+    )
+
+
+def refresh_marker_index(db: Session) -> None:
+    """
+    Bring the marker index up to the latest change-log token.
+
+    Only the locations added, moved or removed since the index's token are
+    re-read; the first call, an expired token or a very large backlog load
+    every location instead.
+    """
+    counter = db.execute(select(SyncCounter.seq, SyncCounter.pruned_seq)).first()
+    token, pruned_seq = counter if counter is not None else (0, 0)
+    since = marker_index.token
+    if since == token:
+        return
+    if since is None or since > token:
+        _rebuild(db, token)
+    else:
+        _catch_up(db, since, token, pruned_seq)
+
+
+def marker_clusters(
+    db: Session,
+    zoom: int,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    list_id: int | None = None,
+    limit: int = 300,
+) -> dict[str, Any]:
+    """Clustered markers for a viewport, shaped like MarkerClusters."""
+    refresh_marker_index(db)
+    return marker_index.clusters(
+        zoom, min_lat, min_lng, max_lat, max_lng, list_id, limit
+    )
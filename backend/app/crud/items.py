@@ -0,0 +1,97 @@
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models import Item
+from app.schemas.item import ItemCreate, ItemUpdate
+
+ItemPageVersion = tuple[int, int | None, int | None, datetime | None]
+
+
+def _paginate(query, skip: int, limit: int, after_id: int | None):
+    query = query.order_by(Item.id)
+    if after_id is not None:
+        query = query.filter(Item.id > after_id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def list_items(
+    db: Session, skip: int = 0, limit: int = 100, after_id: int | None = None
+) -> list[Item]:
+    """Get items ordered by ID, either by offset or after a keyset position."""
+    return _paginate(db.query(Item), skip, limit, after_id).all()
+
+
+def item_page_version(items: list[Item]) -> ItemPageVersion:
+    """(count, first id, last id, max updated_at) of a loaded page."""
+    if not items:
+        return 0, None, None, None
+    return (
+        len(items),
+        items[0].id,
+        items[-1].id,
+        max(item.updated_at for item in items),
+    )
+
+
+def get_item_page_version(
+    db: Session, skip: int = 0, limit: int = 100, after_id: int | None = None
+) -> ItemPageVersion:
+    """
+    Get the version of the same page as `list_items` in one aggregate row,
+    without loading the items. Updates raise max(updated_at); deletions and
+    inserts change the count or the ID range of the page.
+    """
+    query = db.query(Item.id, Item.updated_at)
+    page = _paginate(query, skip, limit, after_id).subquery()
+    count, first_id, last_id, updated_at = db.query(
+        func.count(),
+        func.min(page.c.id),
+        func.max(page.c.id),
+        func.max(page.c.updated_at),
+    ).one()
+    return count, first_id, last_id, updated_at
+
+
+def get_item(db: Session, item_id: int) -> Item:
+    """Get a specific item by ID."""
+    item = db.query(Item).filter(Item.id == item_id).first()
+    if not item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item not found",
+        )
+    return item
+
+
+def create_item(db: Session, item_in: ItemCreate) -> Item:
+    """Create a new item."""
+    item = Item(**item_in.model_dump())
+    db.add(item)
+    db.commit()
+    db.refresh(item)
+    return item
+
+
+def update_item(db: Session, item_id: int, item_in: ItemUpdate) -> Item:
+    """Update an item."""
+    item = get_item(db, item_id)
+
+    update_data = item_in.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(item, field, value)
+
+    db.commit()
+    db.refresh(item)
+    return item
+
+
+def delete_item(db: Session, item_id: int) -> None:
+    """Delete an item."""
+    item = get_item(db, item_id)
+    db.delete(item)
+    db.commit()
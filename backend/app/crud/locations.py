@@ -0,0 +1,116 @@
+from typing import Any
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.geo import bbox_around, bbox_geohash_ranges, haversine_m
+from app.crud.my_lists import LOCATION_RECORD_FIELDS
+from app.db.models import Location
+
+# 近傍検索の初期半径と拡大倍率
+_NEARBY_INITIAL_RADIUS_M = 500.0
+_NEARBY_GROWTH = 4.0
+_NEARBY_MAX_RADIUS_M = 20_037_509.0  # 地球半周
+
+
+def _bbox_query(
+    db: Session,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    list_id: int | None = None,
+):
+    """geohashの範囲条件でインデックスを絞り込み、lat/lngで正確に判定するクエリ"""
+    geohash_filters = []
+    for lower, upper in bbox_geohash_ranges(min_lat, min_lng, max_lat, max_lng):
+        if upper is None:
+            geohash_filters.append(Location.geohash >= lower)
+        else:
+            geohash_filters.append(
+                and_(Location.geohash >= lower, Location.geohash < upper)
+            )
+
+    if min_lng > max_lng:
+        lng_filter = or_(Location.lng >= min_lng, Location.lng <= max_lng)
+    else:
+        lng_filter = Location.lng.between(min_lng, max_lng)
+
+    query = db.query(Location).filter(
+        or_(*geohash_filters),
+        Location.lat.between(min_lat, max_lat),
+        lng_filter,
+    )
+    if list_id is not None:
+        query = query.filter(Location.my_list_id == list_id)
+    return query
+
+
+def locations_within(
+    db: Session,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    list_id: int | None = None,
+    limit: int = 500,
+) -> list[Location]:
+    """Get locations inside a bounding box (min_lng > max_lng crosses the dateline)."""
+    return (
+        _bbox_query(db, min_lat, min_lng, max_lat, max_lng, list_id)
+        .order_by(Location.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def locations_within_records(
+    db: Session,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    list_id: int | None = None,
+    limit: int = 500,
+) -> list[dict[str, Any]]:
+    """Same as `locations_within`, as plain dicts shaped like LocationResponse."""
+    query = (
+        _bbox_query(db, min_lat, min_lng, max_lat, max_lng, list_id)
+        .with_entities(*(getattr(Location, f) for f in LOCATION_RECORD_FIELDS))
+        .order_by(Location.id)
+        .limit(limit)
+    )
+    return [dict(zip(LOCATION_RECORD_FIELDS, row, strict=True)) for row in query]
+
+
+def nearest_locations(
+    db: Session,
+    lat: float,
+    lng: float,
+    k: int = 10,
+    list_id: int | None = None,
+    max_distance_m: float | None = None,
+) -> list[tuple[Location, float]]:
+    """
+    Get the k locations nearest to a point with their distances in meters.
+
+    The search radius grows until k locations are found inside it, so every
+    round is a bounded geohash range scan rather than a full table scan.
+    """
+    limit_radius = max_distance_m or _NEARBY_MAX_RADIUS_M
+    radius = min(_NEARBY_INITIAL_RADIUS_M, limit_radius)
+
+    while True:
+        candidates = _bbox_query(db, *bbox_around(lat, lng, radius), list_id).all()
+        ranked = sorted(
+            (
+                (location, haversine_m(lat, lng, location.lat, location.lng))
+                for location in candidates
+            ),
+            key=lambda pair: pair[1],
+        )
+        # 半径内の点はすべてバウンディングボックス内にあるため、ここまでは確定
+        within = [pair for pair in ranked if pair[1] <= radius]
+        if len(within) >= k or radius >= limit_radius:
+            return within[:k]
+        radius = min(radius * _NEARBY_GROWTH, limit_radius)
@@ -0,0 +1,773 @@
+import math
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    Float,
+    Integer,
+    case,
+    column,
+    func,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.geo import geohash_encode
+from app.db.changelog import (
+    ENTITY_LIST,
+    ENTITY_LOCATION,
+    record_change,
+    record_location_changes,
+)
+from app.db.models import Location, MyList
+from app.schemas.my_list import (
+    LocationCreate,
+    LocationMove,
+    LocationReorder,
+    LocationResponse,
+    MyListCreate,
+    MyListResponse,
+    MyListUpdate,
+)
+
+# 移動先の隙間がこれより小さくなったら、リスト全体の振り直しを予約する
+MIN_ORDER_GAP = 1e-6
+
+# レスポンス用のレコード（dict）の列。キーの順序はレスポンススキーマに合わせる
+LIST_RECORD_FIELDS = tuple(f for f in MyListResponse.model_fields if f != "locations")
+LOCATION_RECORD_FIELDS = tuple(LocationResponse.model_fields)
+
+
+# MyList operations
+def _paginate(query, skip: int, limit: int, after: tuple[datetime, int] | None):
+    query = query.order_by(MyList.updated_at.desc(), MyList.id.desc())
+    if after is not None:
+        query = query.filter(tuple_(MyList.updated_at, MyList.id) < after)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def list_my_lists(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+) -> list[MyList]:
+    """
+    Get lists ordered by (updated_at, id) descending with their locations.
+    `after` is the keyset position of the last row of the previous page.
+    """
+    query = db.query(MyList).options(selectinload(MyList.locations))
+    return _paginate(query, skip, limit, after).all()
+
+
+def _with_location_records(db: Session, query) -> list[dict[str, Any]]:
+    """
+    Run a Core select of list columns and attach each list's locations as
+    dicts, fetched with one more query (like selectinload, without ORM objects).
+    """
+    lists = [
+        dict(zip(LIST_RECORD_FIELDS, row, strict=True)) for row in db.execute(query)
+    ]
+    locations_by_list: dict[int, list[dict[str, Any]]] = {}
+    for record in lists:
+        record["locations"] = locations_by_list[record["id"]] = []
+    if not lists:
+        return lists
+
+    location_query = (
+        select(*(getattr(Location, f) for f in LOCATION_RECORD_FIELDS))
+        .where(Location.my_list_id.in_(locations_by_list))
+        .order_by(Location.my_list_id, Location.order_index, Location.id)
+    )
+    my_list_id = LOCATION_RECORD_FIELDS.index("my_list_id")
+    for row in db.execute(location_query):
+        locations_by_list[row[my_list_id]].append(
+            dict(zip(LOCATION_RECORD_FIELDS, row, strict=True))
+        )
+    return lists
+
+
+def _list_record_query():
+    return select(*(getattr(MyList, f) for f in LIST_RECORD_FIELDS))
+
+
+def list_my_list_records(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Same page as `list_my_lists`, as plain dicts shaped like MyListResponse.
+    Skips ORM instances and schema validation for large responses.
+    """
+    return _with_location_records(
+        db, _paginate(_list_record_query(), skip, limit, after)
+    )
+
+
+def get_my_list_record(db: Session, list_id: int) -> dict[str, Any]:
+    """Same as `get_my_list`, as a plain dict shaped like MyListResponse."""
+    records = _with_location_records(
+        db, _list_record_query().where(MyList.id == list_id)
+    )
+    if not records:
+        raise HTTPException(status_code=404, detail="List not found")
+    return records[0]
+
+
+def list_my_list_versions(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+) -> list[tuple[int, datetime]]:
+    """
+    Get only (id, updated_at) of the same page as `list_my_lists`.
+    Served from the (updated_at, id) index, so it is cheap enough to run
+    before deciding whether the full page needs to be loaded.
+    """
+    query = db.query(MyList.id, MyList.updated_at)
+    return [
+        (id_, updated_at) for id_, updated_at in _paginate(query, skip, limit, after)
+    ]
+
+
+def get_my_list_version(db: Session, list_id: int) -> datetime:
+    """Get the updated_at of a list, which also changes with its locations."""
+    updated_at = db.query(MyList.updated_at).filter(MyList.id == list_id).scalar()
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="List not found")
+    return updated_at
+
+
+def get_my_list(db: Session, list_id: int) -> MyList:
+    """Get a specific list by ID with its locations loaded."""
+    my_list = (
+        db.query(MyList)
+        .options(selectinload(MyList.locations))
+        .filter(MyList.id == list_id)
+        .first()
+    )
+    if not my_list:
+        raise HTTPException(status_code=404, detail="List not found")
+    return my_list
+
+
+def ensure_my_list_exists(db: Session, list_id: int) -> None:
+    """Raise 404 unless the list exists (without loading its locations)."""
+    _get_list_for_update(db, list_id)
+
+
+def _get_list_for_update(db: Session, list_id: int) -> MyList:
+    my_list = db.query(MyList).filter(MyList.id == list_id).first()
+    if not my_list:
+        raise HTTPException(status_code=404, detail="List not found")
+    return my_list
+
+
+def _lock_my_list(db: Session, list_id: int) -> None:
+    """
+    Lock the list row until commit so concurrent appends and moves on the
+    same list are serialized (SELECT ... FOR UPDATE; a no-op on SQLite).
+    """
+    locked = db.query(MyList.id).filter(MyList.id == list_id).with_for_update().scalar()
+    if locked is None:
+        raise HTTPException(status_code=404, detail="List not found")
+
+
+def touch_my_list(db: Session, list_id: int) -> None:
+    """
+    Bump the list's updated_at without committing.
+    Location changes call this so ETags and list ordering see them.
+    """
+    db.execute(
+        update(MyList).where(MyList.id == list_id).values(updated_at=datetime.utcnow())
+    )
+    record_change(db, ENTITY_LIST, list_id)
+
+
+def _extend_bound(column, value: float, lower: bool):
+    """Expression for a bounding-box column widened to include `value`."""
+    outside = column > value if lower else column < value
+    return case((or_(column.is_(None), outside), value), else_=column)
+
+
+def add_to_summary(
+    db: Session, list_id: int, points: list[tuple[float, float]]
+) -> None:
+    """
+    Fold added (lat, lng) points into the list's aggregates and bump its
+    updated_at, in one UPDATE without reading the list or its locations.
+    """
+    if not points:
+        return
+    lats = [lat for lat, _ in points]
+    lngs = [lng for _, lng in points]
+    db.execute(
+        update(MyList)
+        .where(MyList.id == list_id)
+        .values(
+            location_count=MyList.location_count + len(points),
+            lat_sum=MyList.lat_sum + math.fsum(lats),
+            lng_sum=MyList.lng_sum + math.fsum(lngs),
+            min_lat=_extend_bound(MyList.min_lat, min(lats), lower=True),
+            min_lng=_extend_bound(MyList.min_lng, min(lngs), lower=True),
+            max_lat=_extend_bound(MyList.max_lat, max(lats), lower=False),
+            max_lng=_extend_bound(MyList.max_lng, max(lngs), lower=False),
+            updated_at=datetime.utcnow(),
+        )
+    )
+    record_change(db, ENTITY_LIST, list_id)
+
+
+def _remaining_bound(list_id: int, aggregate):
+    return select(aggregate).where(Location.my_list_id == list_id).scalar_subquery()
+
+
+def remove_from_summary(db: Session, list_id: int, lat: float, lng: float) -> None:
+    """
+    Take a removed point out of the list's aggregates and bump its updated_at.
+    Call after the location row is deleted (flushed). A bound is recomputed
+    from the list's remaining locations only when the point was on it.
+    """
+
+    def shrink(column, coordinate, aggregate):
+        return case(
+            (column == coordinate, _remaining_bound(list_id, aggregate)),
+            else_=column,
+        )
+
+    emptied = MyList.location_count <= 1
+    db.execute(
+        update(MyList)
+        .where(MyList.id == list_id)
+        .values(
+            location_count=case((emptied, 0), else_=MyList.location_count - 1),
+            # 地点がなくなったら合計の丸め誤差も捨てる
+            lat_sum=case((emptied, 0.0), else_=MyList.lat_sum - lat),
+            lng_sum=case((emptied, 0.0), else_=MyList.lng_sum - lng),
+            min_lat=shrink(MyList.min_lat, lat, func.min(Location.lat)),
+            min_lng=shrink(MyList.min_lng, lng, func.min(Location.lng)),
+            max_lat=shrink(MyList.max_lat, lat, func.max(Location.lat)),
+            max_lng=shrink(MyList.max_lng, lng, func.max(Location.lng)),
+            updated_at=datetime.utcnow(),
+        )
+    )
+    record_change(db, ENTITY_LIST, list_id)
+
+
+def refresh_list_summaries(db: Session, list_ids: list[int] | None = None) -> None:
+    """
+    Recompute the aggregates of the given lists (all lists when None) from
+    their locations, without committing. For backfills and bulk loads that
+    bypass the incremental updates.
+    """
+
+    def aggregate(expression, default=None):
+        value = (
+            select(expression)
+            .where(Location.my_list_id == MyList.id)
+            .correlate(MyList)
+            .scalar_subquery()
+        )
+        return value if default is None else func.coalesce(value, default)
+
+    stmt = update(MyList).values(
+        location_count=aggregate(func.count(Location.id)),
+        lat_sum=aggregate(func.sum(Location.lat), 0.0),
+        lng_sum=aggregate(func.sum(Location.lng), 0.0),
+        min_lat=aggregate(func.min(Location.lat)),
+        min_lng=aggregate(func.min(Location.lng)),
+        max_lat=aggregate(func.max(Location.lat)),
+        max_lng=aggregate(func.max(Location.lng)),
+    )
+    if list_ids is not None:
+        stmt = stmt.where(MyList.id.in_(list_ids))
+    db.execute(stmt.execution_options(synchronize_session=False))
+
+
+def _summary_query():
+    return select(
+        MyList.id,
+        MyList.name,
+        MyList.description,
+        MyList.location_count,
+        MyList.min_lat,
+        MyList.min_lng,
+        MyList.max_lat,
+        MyList.max_lng,
+        MyList.lat_sum,
+        MyList.lng_sum,
+        MyList.created_at,
+        MyList.updated_at,
+    )
+
+
+def _summary_record(row) -> dict[str, Any]:
+    """A MyListSummary-shaped dict from a list row."""
+    count = row.location_count
+    return {
+        "name": row.name,
+        "description": row.description,
+        "id": row.id,
+        "location_count": count,
+        "bounds": {
+            "min_lat": row.min_lat,
+            "min_lng": row.min_lng,
+            "max_lat": row.max_lat,
+            "max_lng": row.max_lng,
+        }
+        if count
+        else None,
+        "centroid": {"lat": row.lat_sum / count, "lng": row.lng_sum / count}
+        if count
+        else None,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+
+def list_my_list_summaries(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Same page as `list_my_lists`, as MyListSummary-shaped dicts.
+    One query on my_lists only; the locations table is never read.
+    """
+    return [
+        _summary_record(row)
+        for row in db.execute(_paginate(_summary_query(), skip, limit, after))
+    ]
+
+
+def list_summaries_by_id(db: Session, list_ids: list[int]) -> list[dict[str, Any]]:
+    """MyListSummary-shaped dicts of the given lists (missing ones are skipped)."""
+    query = _summary_query().where(MyList.id.in_(list_ids)).order_by(MyList.id)
+    return [_summary_record(row) for row in db.execute(query)]
+
+
+def location_records_by_id(
+    db: Session, location_ids: list[int]
+) -> list[dict[str, Any]]:
+    """LocationResponse-shaped dicts of the given locations (missing ones skipped)."""
+    query = (
+        select(*(getattr(Location, f) for f in LOCATION_RECORD_FIELDS))
+        .where(Location.id.in_(location_ids))
+        .order_by(Location.my_list_id, Location.order_index, Location.id)
+    )
+    return [
+        dict(zip(LOCATION_RECORD_FIELDS, row, strict=True)) for row in db.execute(query)
+    ]
+
+
+def create_my_list(db: Session, list_in: MyListCreate, commit: bool = True) -> MyList:
+    """Create a new list."""
+    my_list = MyList(**list_in.model_dump())
+    db.add(my_list)
+    record_change(db, ENTITY_LIST, my_list)
+    if not commit:
+        db.flush()
+        return my_list
+    db.commit()
+    # 非同期セッションでは遅延ロードできないため、locationsまで読み込んで返す
+    return get_my_list(db, my_list.id)
+
+
+def update_my_list(
+    db: Session, list_id: int, list_in: MyListUpdate, commit: bool = True
+) -> MyList:
+    """Update a list."""
+    my_list = _get_list_for_update(db, list_id)
+
+    update_data = list_in.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(my_list, field, value)
+    record_change(db, ENTITY_LIST, list_id)
+
+    if not commit:
+        db.flush()
+        return my_list
+    db.commit()
+    return get_my_list(db, list_id)
+
+
+def delete_my_list(db: Session, list_id: int, commit: bool = True) -> None:
+    """Delete a list and all its locations."""
+    my_list = _get_list_for_update(db, list_id)
+    db.delete(my_list)
+    # 地点はリストと一緒に削除されるため、リストの削除だけを記録する
+    record_change(db, ENTITY_LIST, list_id, deleted=True)
+    _finish(db, commit)
+
+
+def list_my_lists_by_id(db: Session, list_ids: list[int]) -> list[MyList]:
+    """Get the given lists (missing ones are skipped) with their locations."""
+    if not list_ids:
+        return []
+    return (
+        db.query(MyList)
+        .options(selectinload(MyList.locations))
+        .filter(MyList.id.in_(list_ids))
+        .order_by(MyList.id)
+        .all()
+    )
+
+
+def _finish(db: Session, commit: bool, instance: Any = None) -> None:
+    """
+    Commit (reloading `instance`), or only flush when the caller groups
+    several operations into one transaction.
+    """
+    if not commit:
+        db.flush()
+        return
+    db.commit()
+    if instance is not None:
+        db.refresh(instance)
+
+
+# Location operations within a list
+def add_location(
+    db: Session, list_id: int, location_in: LocationCreate, commit: bool = True
+) -> Location:
+    """Add a location to the end of a list."""
+    location = Location(
+        **location_in.model_dump(),
+        my_list_id=list_id,
+        order_index=next_order_index(db, list_id),
+    )
+    db.add(location)
+    record_change(db, ENTITY_LOCATION, location, list_id)
+    add_to_summary(db, list_id, [(location.lat, location.lng)])
+    _finish(db, commit, location)
+    return location
+
+
+def _last_order_index(
+    db: Session, list_id: int, exclude_id: int | None = None
+) -> float | None:
+    query = db.query(func.max(Location.order_index)).filter(
+        Location.my_list_id == list_id
+    )
+    if exclude_id is not None:
+        query = query.filter(Location.id != exclude_id)
+    return query.scalar()
+
+
+def next_order_index(db: Session, list_id: int) -> float:
+    """
+    Get the order index that appends after the last location of a list.
+    The list row stays locked until commit, so concurrent appends get
+    distinct indices.
+    """
+    _lock_my_list(db, list_id)
+    last = _last_order_index(db, list_id)
+    return 0 if last is None else math.floor(last) + 1
+
+
+def _location_records(
+    list_id: int, rows: list[LocationCreate], start_index: float
+) -> list[dict[str, Any]]:
+    # Core insert はマッパーイベントを通らないため、geohash もここで設定する
+    return [
+        {
+            **row.model_dump(),
+            "my_list_id": list_id,
+            "order_index": start_index + offset,
+            "geohash": geohash_encode(row.lat, row.lng),
+        }
+        for offset, row in enumerate(rows)
+    ]
+
+
+def insert_locations(
+    db: Session, list_id: int, rows: list[LocationCreate], start_index: float
+) -> int:
+    """
+    Insert validated locations in one executemany batch without committing,
+    fold them into the list's aggregates and record them for delta sync.
+    """
+    if not rows:
+        return 0
+    location_ids = db.scalars(
+        insert(Location).returning(Location.id),
+        _location_records(list_id, rows, start_index),
+    ).all()
+    record_location_changes(db, list_id, location_ids)
+    add_to_summary(db, list_id, [(row.lat, row.lng) for row in rows])
+    return len(rows)
+
+
+def append_locations(
+    db: Session, list_id: int, rows: list[LocationCreate]
+) -> list[int]:
+    """
+    Append locations to the end of a list in one INSERT without committing.
+    Returns the new IDs in the order of `rows`.
+    """
+    records = _location_records(list_id, rows, next_order_index(db, list_id))
+    location_ids = db.scalars(
+        insert(Location).returning(Location.id, sort_by_parameter_order=True),
+        records,
+    ).all()
+    record_location_changes(db, list_id, location_ids)
+    add_to_summary(db, list_id, [(row.lat, row.lng) for row in rows])
+    return list(location_ids)
+
+
+def remove_location(
+    db: Session, list_id: int, location_id: int, commit: bool = True
+) -> None:
+    """Remove a location from a list."""
+    # 集計値の更新が同じリストへの並行した追加・削除と競合しないようにする
+    _lock_my_list(db, list_id)
+    location = _get_location(db, list_id, location_id)
+    db.delete(location)
+    db.flush()
+    record_change(db, ENTITY_LOCATION, location_id, list_id, deleted=True)
+    remove_from_summary(db, list_id, location.lat, location.lng)
+    _finish(db, commit)
+
+
+def list_locations(db: Session, list_id: int) -> list[Location]:
+    """Get the locations of a list in their current order."""
+    _get_list_for_update(db, list_id)
+    return (
+        db.query(Location)
+        .filter(Location.my_list_id == list_id)
+        .order_by(Location.order_index, Location.id)
+        .all()
+    )
+
+
+def _get_location(db: Session, list_id: int, location_id: int) -> Location:
+    location = (
+        db.query(Location)
+        .filter(Location.id == location_id, Location.my_list_id == list_id)
+        .first()
+    )
+    if not location:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return location
+
+
+def _adjacent_order_index(
+    db: Session, anchor: Location, moving_id: int, following: bool
+) -> float | None:
+    """Get the order index right after (or before) `anchor`, skipping `moving_id`."""
+    position = tuple_(Location.order_index, Location.id)
+    anchor_position = (anchor.order_index, anchor.id)
+    query = db.query(Location.order_index).filter(
+        Location.my_list_id == anchor.my_list_id, Location.id != moving_id
+    )
+    if following:
+        query = query.filter(position > anchor_position).order_by(
+            Location.order_index, Location.id
+        )
+    else:
+        query = query.filter(position < anchor_position).order_by(
+            Location.order_index.desc(), Location.id.desc()
+        )
+    return query.limit(1).scalar()
+
+
+def _target_bounds(
+    db: Session, list_id: int, location_id: int, move_in: LocationMove
+) -> tuple[float | None, float | None]:
+    """Get the order indices the moved location has to fit between."""
+    anchors: dict[str, Location] = {}
+    for field in ("after_id", "before_id"):
+        anchor_id = getattr(move_in, field)
+        if anchor_id is None:
+            continue
+        if anchor_id == location_id:
+            raise HTTPException(
+                status_code=400, detail=f"{field} must differ from the moved location"
+            )
+        try:
+            anchors[field] = _get_location(db, list_id, anchor_id)
+        except HTTPException as e:
+            raise HTTPException(
+                status_code=400, detail=f"Location {anchor_id} not found in list"
+            ) from e
+
+    after = anchors.get("after_id")
+    before = anchors.get("before_id")
+    if after is not None and before is not None:
+        if (after.order_index, after.id) >= (before.order_index, before.id):
+            raise HTTPException(
+                status_code=400, detail="after_id must come before before_id"
+            )
+        return after.order_index, before.order_index
+    if after is not None:
+        return after.order_index, _adjacent_order_index(db, after, location_id, True)
+    if before is not None:
+        return _adjacent_order_index(db, before, location_id, False), before.order_index
+    return _last_order_index(db, list_id, exclude_id=location_id), None
+
+
+def _midpoint(low: float | None, high: float | None) -> float | None:
+    """Get an order index strictly between two others (None if none is left)."""
+    if low is None and high is None:
+        return 0.0
+    if low is None:
+        return high - 1
+    if high is None:
+        return low + 1
+    middle = (low + high) / 2
+    return middle if low < middle < high else None
+
+
+def move_location(
+    db: Session,
+    list_id: int,
+    location_id: int,
+    move_in: LocationMove,
+    commit: bool = True,
+) -> tuple[Location, bool]:
+    """
+    Move one location between two others by giving it an order index halfway
+    between theirs, so only the moved row is written.
+
+    Returns the moved location and whether the gap it was placed in is
+    getting too small. With `commit`, the list is then rebalanced in the same
+    transaction; otherwise the caller rebalances before committing.
+    """
+    _lock_my_list(db, list_id)
+    location = _get_location(db, list_id, location_id)
+
+    low, high = _target_bounds(db, list_id, location_id, move_in)
+    order_index = _midpoint(low, high)
+    if order_index is None:
+        # 隙間がない（同じ値が並んでいる等）場合のみ、その場で振り直す
+        rebalance_locations(db, list_id, commit=False)
+        db.expire_all()
+        low, high = _target_bounds(db, list_id, location_id, move_in)
+        order_index = _midpoint(low, high)
+
+    location.order_index = order_index
+    record_change(db, ENTITY_LOCATION, location_id, list_id)
+    touch_my_list(db, list_id)
+    needs_rebalance = (
+        low is not None and high is not None and high - low < MIN_ORDER_GAP
+    )
+    if needs_rebalance and commit:
+        # 別の接続（バックグラウンド処理）ではなく、このトランザクションで振り直す
+        db.flush()
+        rebalance_locations(db, list_id, commit=False)
+    _finish(db, commit, location)
+    return location, needs_rebalance
+
+
+def rebalance_locations(db: Session, list_id: int, commit: bool = True) -> None:
+    """
+    Renumber the order indices of a list to 0, 1, 2, ... in one statement,
+    keeping the current order.
+    """
+    ranked = (
+        select(
+            Location.id,
+            (
+                func.row_number().over(order_by=(Location.order_index, Location.id)) - 1
+            ).label("position"),
+        )
+        .where(Location.my_list_id == list_id)
+        .subquery()
+    )
+    db.execute(
+        update(Location)
+        .where(Location.id == ranked.c.id)
+        .values(order_index=ranked.c.position)
+        .execution_options(synchronize_session=False)
+    )
+    record_location_changes(
+        db,
+        list_id,
+        db.scalars(select(Location.id).where(Location.my_list_id == list_id)),
+    )
+    if commit:
+        touch_my_list(db, list_id)
+        db.commit()
+
+
+def _set_order_indices(db: Session, list_id: int, order: dict[int, float]) -> int:
+    """
+    Write new order indices for the given locations in one UPDATE statement.
+    PostgreSQL joins against a VALUES list. Other databases use a CASE expression.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        new_order = values(
+            column("id", Integer), column("order_index", Float), name="new_order"
+        ).data(list(order.items()))
+        stmt = (
+            update(Location)
+            .where(Location.id == new_order.c.id)
+            .values(order_index=new_order.c.order_index)
+        )
+    else:
+        stmt = (
+            update(Location)
+            .where(Location.id.in_(order))
+            .values(order_index=case(order, value=Location.id))
+        )
+    result = db.execute(
+        stmt.where(Location.my_list_id == list_id).execution_options(
+            synchronize_session=False
+        )
+    )
+    return result.rowcount
+
+
+def set_location_order(db: Session, list_id: int, location_ids: list[int]) -> None:
+    """
+    Give the listed locations the order indices 0, 1, 2, ... in one statement,
+    without committing. Unlisted locations keep their indices.
+    """
+    if len(set(location_ids)) != len(location_ids):
+        raise HTTPException(status_code=400, detail="Duplicate location IDs")
+
+    _lock_my_list(db, list_id)
+    order = {loc_id: float(index) for index, loc_id in enumerate(location_ids)}
+    if order and _set_order_indices(db, list_id, order) != len(order):
+        # エラー時のみ、どのIDが存在しないかを調べる
+        found = set(
+            db.scalars(
+                select(Location.id).where(
+                    Location.my_list_id == list_id, Location.id.in_(order)
+                )
+            )
+        )
+        missing = next(loc_id for loc_id in location_ids if loc_id not in found)
+        raise HTTPException(
+            status_code=400, detail=f"Location {missing} not found in list"
+        )
+    record_location_changes(db, list_id, order)
+    touch_my_list(db, list_id)
+
+
+def reorder_locations(
+    db: Session, list_id: int, reorder_in: LocationReorder
+) -> list[Location]:
+    """Reorder locations within a list."""
+    set_location_order(db, list_id, reorder_in.location_ids)
+    db.commit()
+
+    # Return locations in new order
+    return (
+        db.query(Location)
+        .filter(Location.my_list_id == list_id)
+        .order_by(Location.order_index, Location.id)
+        .all()
+    )
@@ -0,0 +1,176 @@
+import threading
+from dataclasses import dataclass
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import case, event, func, literal, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.config import settings
+from app.core.search import SearchIndex, normalize, prefix_tsquery
+from app.db.models import (
+    SEARCH_CONFIG,
+    Item,
+    Location,
+    item_search_text,
+    location_search_text,
+)
+
+_MODELS = {"items": Item, "locations": Location}
+_DOCUMENTS = {"items": item_search_text, "locations": location_search_text}
+
+
+def _is_postgresql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _postgres_search(db: Session, model, document, query: str, limit: int, *filters):
+    """
+    tsvector（前方一致）とトライグラム（word_similarity）のGINインデックスで
+    候補を絞り込み、類似度 + ts_rank の降順で返す
+    """
+    # <% 演算子のしきい値（トランザクション内のみ有効）
+    db.execute(
+        select(
+            func.set_config(
+                "pg_trgm.word_similarity_threshold",
+                str(settings.SEARCH_SIMILARITY_THRESHOLD),
+                True,
+            )
+        )
+    )
+    tsvector = func.to_tsvector(SEARCH_CONFIG, document)
+    tsquery = func.to_tsquery(SEARCH_CONFIG, prefix_tsquery(query))
+    matched = tsvector.bool_op("@@")(tsquery)
+    score = (
+        func.word_similarity(query, document)
+        + case((matched, func.ts_rank(tsvector, tsquery)), else_=0.0)
+    ).label("score")
+    # || と <% は同じ優先順位のため、文書側の式を括弧で囲む
+    similar = literal(query).bool_op("<%")(document.self_group())
+    stmt = (
+        select(model, score)
+        .where(or_(matched, similar), *filters)
+        .order_by(score.desc(), model.id)
+        .limit(limit)
+    )
+    return [(instance, float(value)) for instance, value in db.execute(stmt)]
+
+
+@dataclass
+class _FallbackState:
+    # コミットされた書き込みごとに増える世代と、インデックス構築時の世代
+    generation: int = 0
+    built: int = -1
+    index: SearchIndex | None = None
+
+
+# Engineごとのフォールバック用インデックス（テーブル名 -> 状態）
+_fallback: WeakKeyDictionary[Engine, dict[str, _FallbackState]] = WeakKeyDictionary()
+_fallback_lock = threading.Lock()
+
+
+def _on_after_execute(conn, clauseelement, multiparams, params, options, result):
+    # ORMのflushも含め、検索対象テーブルへのINSERT/UPDATE/DELETEを記録
+    if isinstance(clauseelement, UpdateBase):
+        name = clauseelement.table.name
+        if name in _DOCUMENTS:
+            conn.info.setdefault("search_dirty", set()).add(name)
+
+
+def _on_commit(conn):
+    dirty = conn.info.pop("search_dirty", None)
+    if not dirty:
+        return
+    with _fallback_lock:
+        for name in dirty:
+            _fallback[conn.engine][name].generation += 1
+
+
+def _on_rollback(conn):
+    conn.info.pop("search_dirty", None)
+
+
+def _fallback_index(db: Session, name: str) -> SearchIndex:
+    """
+    PostgreSQL以外（SQLiteのテスト環境など）で使うプロセス内インデックスを返す。
+    コミットされた書き込みで無効化し、次の検索時に全件から再構築する。
+    """
+    engine = db.get_bind().engine
+    with _fallback_lock:
+        tables = _fallback.get(engine)
+        if tables is None:
+            tables = _fallback[engine] = {key: _FallbackState() for key in _DOCUMENTS}
+            event.listen(engine, "after_execute", _on_after_execute)
+            event.listen(engine, "commit", _on_commit)
+            event.listen(engine, "rollback", _on_rollback)
+        state = tables[name]
+        generation = state.generation
+        if state.index is not None and state.built == generation:
+            return state.index
+
+    model = _MODELS[name]
+    index = SearchIndex(db.execute(select(model.id, _DOCUMENTS[name]())).all())
+    with _fallback_lock:
+        if state.built < generation:
+            state.index, state.built = index, generation
+    return index
+
+
+def _fallback_search(db: Session, name: str, query: str, limit: int, *filters):
+    index = _fallback_index(db, name)
+    # 絞り込み条件がある場合は条件を満たさない候補を除いてから件数を制限する
+    ranked = index.search(
+        query,
+        limit=None if filters else limit,
+        threshold=settings.SEARCH_SIMILARITY_THRESHOLD,
+    )
+    if not ranked:
+        return []
+    model = _MODELS[name]
+    scores = dict(ranked)
+    instances = db.query(model).filter(model.id.in_(scores), *filters).all()
+    instances.sort(key=lambda instance: (-scores[instance.id], instance.id))
+    return [(instance, scores[instance.id]) for instance in instances[:limit]]
+
+
+def _search(db: Session, name: str, query: str, limit: int, *filters):
+    if _is_postgresql(db):
+        model = _MODELS[name]
+        return _postgres_search(db, model, _DOCUMENTS[name](), query, limit, *filters)
+    return _fallback_search(db, name, query, limit, *filters)
+
+
+def search_items(db: Session, query: str, limit: int = 20) -> list[tuple[Item, float]]:
+    """Search item titles and descriptions; returns (item, score) best first."""
+    query = normalize(query)
+    if prefix_tsquery(query) is None:
+        return []
+    return _search(db, "items", query, limit)
+
+
+def search_locations(
+    db: Session, query: str, limit: int = 20, list_id: int | None = None
+) -> list[tuple[Location, float]]:
+    """Search location names and addresses; returns (location, score) best first."""
+    query = normalize(query)
+    if prefix_tsquery(query) is None:
+        return []
+    filters = [] if list_id is None else [Location.my_list_id == list_id]
+    return _search(db, "locations", query, limit, *filters)
+
+
+def search(
+    db: Session,
+    query: str,
+    types: list[str],
+    limit: int = 20,
+    list_id: int | None = None,
+) -> tuple[list[tuple[Item, float]], list[tuple[Location, float]]]:
+    """Search items and locations in one session call."""
+    items = search_items(db, query, limit) if "items" in types else []
+    locations = (
+        search_locations(db, query, limit, list_id) if "locations" in types else []
+    )
+    return items, locations
@@ -0,0 +1,101 @@
+from typing import Any
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from app.crud.my_lists import list_summaries_by_id, location_records_by_id
+from app.db.changelog import ENTITY_LIST, ENTITY_LOCATION
+from app.db.models import SyncChange, SyncCounter
+
+
+def _page(db: Session, since: int, limit: int) -> tuple[list[Any], bool]:
+    """
+    Change-log rows after `since`, up to about `limit` rows. Pages end on a
+    transaction boundary (whole seq), so a page may run past `limit` when one
+    transaction changed more rows than that.
+    """
+    query = (
+        select(
+            SyncChange.seq,
+            SyncChange.entity,
+            SyncChange.entity_id,
+            SyncChange.list_id,
+            SyncChange.deleted,
+        )
+        .where(SyncChange.seq > since)
+        .order_by(SyncChange.seq, SyncChange.id)
+    )
+    rows = db.execute(query.limit(limit + 1)).all()
+    if len(rows) <= limit:
+        return rows, False
+    last_seq = rows[-1].seq
+    complete = [row for row in rows if row.seq != last_seq]
+    if complete:
+        return complete, True
+    # 1つのトランザクションだけで limit を超える場合は、そのseqをまとめて返す
+    rows = db.execute(query.where(SyncChange.seq == last_seq)).all()
+    has_more = db.scalar(select(exists().where(SyncChange.seq > last_seq)))
+    return rows, bool(has_more)
+
+
+def list_changes(db: Session, since: int | None, limit: int) -> dict[str, Any]:
+    """
+    Lists and locations changed after the sync token `since`, shaped like
+    MyListChanges.
+
+    Upserts carry the current rows (fetched by ID, so the cost follows the
+    number of changes); deletions are reported as tombstone IDs. A missing
+    or expired token gets `reset` with the current token: the client should
+    refetch everything and then sync from that token.
+    """
+    counter = db.execute(select(SyncCounter.seq, SyncCounter.pruned_seq)).first()
+    token, pruned_seq = counter if counter is not None else (0, 0)
+    response: dict[str, Any] = {
+        "token": token,
+        "reset": False,
+        "has_more": False,
+        "lists": [],
+        "locations": [],
+        "deleted_lists": [],
+        "deleted_locations": [],
+    }
+    if since is None or since < pruned_seq or since > token:
+        response["reset"] = True
+        return response
+
+    rows, has_more = _page(db, since, limit)
+    if not rows:
+        response["token"] = since
+        return response
+
+    # エンティティごとに最後の変更だけを残す
+    latest: dict[tuple[str, int], bool] = {}
+    for row in rows:
+        latest[(row.entity, row.entity_id)] = row.deleted
+    changed: dict[str, list[int]] = {ENTITY_LIST: [], ENTITY_LOCATION: []}
+    deleted: dict[str, set[int]] = {ENTITY_LIST: set(), ENTITY_LOCATION: set()}
+    for (entity, entity_id), is_deleted in latest.items():
+        if is_deleted:
+            deleted[entity].add(entity_id)
+        else:
+            changed[entity].append(entity_id)
+    list_ids, location_ids = changed[ENTITY_LIST], changed[ENTITY_LOCATION]
+    deleted_lists, deleted_locations = deleted[ENTITY_LIST], deleted[ENTITY_LOCATION]
+
+    if list_ids:
+        response["lists"] = list_summaries_by_id(db, list_ids)
+        # 後続のトランザクションで削除された行は取得できないため削除として扱う
+        deleted_lists.update(set(list_ids) - {r["id"] for r in response["lists"]})
+    if location_ids:
+        response["locations"] = location_records_by_id(db, location_ids)
+        deleted_locations.update(
+            set(location_ids) - {r["id"] for r in response["locations"]}
+        )
+
+    response.update(
+        token=rows[-1].seq,
+        has_more=has_more,
+        deleted_lists=sorted(deleted_lists),
+        deleted_locations=sorted(deleted_locations),
+    )
+    return response
@@ -0,0 +1,49 @@
+"""
+Fill Location.geohash for rows stored before the column existed.
+
+Run after scripts/migrate-location-geohash.sql (from backend/):
+
+    python -m app.db.backfill_geohash
+"""
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.geo import geohash_encode
+from app.db.models import Location
+
+# 1トランザクションで更新する行数（長いロックを避ける）
+BATCH_SIZE = 1000
+
+
+def backfill_geohashes(engine: Engine, batch_size: int = BATCH_SIZE) -> int:
+    """Compute geohashes for rows where it is NULL; returns the rows updated."""
+    updated = 0
+    last_id = 0
+    while True:
+        with Session(engine) as db, db.begin():
+            rows = db.execute(
+                select(Location.id, Location.lat, Location.lng)
+                .where(Location.geohash.is_(None), Location.id > last_id)
+                .order_by(Location.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return updated
+            # 主キーごとの一括UPDATE（mapperイベントは発火しないため明示的に計算する）
+            db.execute(
+                update(Location),
+                [
+                    {"id": row.id, "geohash": geohash_encode(row.lat, row.lng)}
+                    for row in rows
+                ],
+            )
+        updated += len(rows)
+        last_id = rows[-1].id
+
+
+if __name__ == "__main__":
+    from app.db.session import get_engine
+
+    print(f"Backfilled {backfill_geohashes(get_engine())} locations")
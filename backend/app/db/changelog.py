@@ -0,0 +1,114 @@
+# Change log for delta sync (/my-lists/changes), written at commit time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Base, SyncChange, SyncCounter
+
+# コミット待ちの変更（Session.info に保持し、コミット直前に変更履歴へ書き込む）
+_PENDING_KEY = "sync_pending_changes"
+# この回数のコミットごとに、保持期間を過ぎた変更履歴を削除する
+PRUNE_EVERY = 1000
+
+ENTITY_LIST = "list"
+ENTITY_LOCATION = "location"
+
+
+def record_change(
+    db: Session,
+    entity: str,
+    target: int | Base,
+    list_id: int | None = None,
+    deleted: bool = False,
+) -> None:
+    """
+    Record that a list or location changed in the current transaction.
+
+    `target` is an ID or an ORM instance whose ID is assigned on flush.
+    Nothing is written until commit; a rolled-back transaction records nothing.
+    """
+    db.info.setdefault(_PENDING_KEY, []).append((entity, target, list_id, deleted))
+
+
+def record_location_changes(
+    db: Session, list_id: int, location_ids, deleted: bool = False
+) -> None:
+    for location_id in location_ids:
+        record_change(db, ENTITY_LOCATION, location_id, list_id, deleted)
+
+
+def _resolve(entity: str, target: int | Base, list_id: int | None) -> tuple[int, int]:
+    if isinstance(target, int):
+        entity_id = target
+    else:
+        entity_id = target.id
+        if list_id is None:
+            list_id = target.id if entity == ENTITY_LIST else target.my_list_id
+    return entity_id, entity_id if list_id is None else list_id
+
+
+def _next_seq(db: Session) -> int:
+    # カウンター行を更新してロックする（他のコミットのseq払い出しはこの後になる）
+    seq = db.execute(
+        update(SyncCounter)
+        .where(SyncCounter.id == 1)
+        .values(seq=SyncCounter.seq + 1)
+        .returning(SyncCounter.seq)
+    ).scalar()
+    if seq is None:
+        # カウンター行がないDB（テーブル作成後に行を消した場合など）
+        db.execute(insert(SyncCounter).values(id=1, seq=1, pruned_seq=0))
+        seq = 1
+    return seq
+
+
+def _prune(db: Session) -> None:
+    """Delete change-log entries older than SYNC_RETENTION_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.SYNC_RETENTION_DAYS)
+    pruned_seq = db.scalar(
+        select(func.max(SyncChange.seq)).where(SyncChange.created_at < cutoff)
+    )
+    if pruned_seq is None:
+        return
+    db.execute(delete(SyncChange).where(SyncChange.seq <= pruned_seq))
+    db.execute(
+        update(SyncCounter).where(SyncCounter.id == 1).values(pruned_seq=pruned_seq)
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_changes(db: Session) -> None:
+    pending = db.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    # 新規作成したインスタンスのIDを確定させる
+    db.flush()
+    changes = {}
+    for entity, target, list_id, deleted in pending:
+        entity_id, list_id = _resolve(entity, target, list_id)
+        # 同じトランザクション内の変更は最後のものだけ残す
+        changes[(entity, entity_id)] = (list_id, deleted)
+
+    seq = _next_seq(db)
+    db.execute(
+        insert(SyncChange),
+        [
+            {
+                "seq": seq,
+                "entity": entity,
+                "entity_id": entity_id,
+                "list_id": list_id,
+                "deleted": deleted,
+            }
+            for (entity, entity_id), (list_id, deleted) in changes.items()
+        ],
+    )
+    if seq % PRUNE_EVERY == 0:
+        _prune(db)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(db: Session) -> None:
+    db.info.pop(_PENDING_KEY, None)
@@ -1,13 +1,33 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+    func,
+    literal_column,
+)
 from sqlalchemy.orm import DeclarativeBase, relationship
+from sqlalchemy.schema import DDL
+
+from app.core.geo import GEOHASH_PRECISION, geohash_encode
 
 
 class Base(DeclarativeBase):
     pass
 
 
+# 全文検索の設定。日本語を含むため語幹処理なしの 'simple' を使う
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+
 class Item(Base):
     """Example model for demonstration."""
 
@@ -26,6 +46,10 @@ class MyList(Base):
     """Model for storing user's location lists."""
 
     __tablename__ = "my_lists"
+    __table_args__ = (
+        # 一覧のキーセットページネーション (updated_at DESC, id DESC) 用
+        Index("ix_my_lists_updated_at_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -35,9 +59,25 @@ class MyList(Base):
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
 
+    # 地点の集計値（地点の追加・削除と同じトランザクションで差分更新する）。
+    # 一覧のカードや地図の表示範囲を locations を読まずに求めるために使う
+    location_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # 外接矩形（地点がない場合はNULL）
+    min_lat = Column(Float, nullable=True)
+    min_lng = Column(Float, nullable=True)
+    max_lat = Column(Float, nullable=True)
+    max_lng = Column(Float, nullable=True)
+    # 重心（平均）を求めるための座標の合計
+    lat_sum = Column(Float, nullable=False, default=0, server_default="0")
+    lng_sum = Column(Float, nullable=False, default=0, server_default="0")
+
     # Relationship to locations
+    # 一覧取得時は selectinload でページ単位にまとめて読み込む
     locations = relationship(
-        "Location", back_populates="my_list", cascade="all, delete-orphan"
+        "Location",
+        back_populates="my_list",
+        cascade="all, delete-orphan",
+        order_by="Location.order_index, Location.id",
     )
 
 
@@ -45,6 +85,10 @@ class Location(Base):
     """Model for storing locations within a list."""
 
     __tablename__ = "locations"
+    # リスト内の並び順での取得・隣接位置の検索用
+    __table_args__ = (
+        Index("ix_locations_my_list_id_order_index", "my_list_id", "order_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     my_list_id = Column(Integer, ForeignKey("my_lists.id"), nullable=False, index=True)
@@ -53,8 +97,103 @@ class Location(Base):
     lat = Column(Float, nullable=False)
     lng = Column(Float, nullable=False)
     place_id = Column(String(255), nullable=True)
-    order_index = Column(Integer, nullable=False, default=0)
+    # 範囲検索・近傍検索用のgeohash（lat/lngから自動設定、B-treeインデックス）
+    geohash = Column(String(GEOHASH_PRECISION), nullable=True, index=True)
+    # 並び順のキー（小数）。移動時は前後の値の中間を使うため、1行の更新で済む
+    order_index = Column(Float, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationship to parent list
     my_list = relationship("MyList", back_populates="locations")
+
+
+class SyncChange(Base):
+    """
+    差分同期（/my-lists/changes）用の変更履歴。
+    1つのトランザクションの変更はコミット時に同じ seq でまとめて記録する。
+    """
+
+    __tablename__ = "sync_changes"
+
+    id = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=False, index=True)
+    # "list" または "location"
+    entity = Column(String(16), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    list_id = Column(Integer, nullable=False)
+    # 削除（トゥームストーン）
+    deleted = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class SyncCounter(Base):
+    """
+    変更履歴の seq を払い出す1行だけのテーブル。
+    コミット直前にこの行を更新してロックするため、seq の順序とコミット順が一致する。
+    """
+
+    __tablename__ = "sync_counter"
+
+    id = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=False, default=0)
+    # この seq 以前の変更履歴は削除済み（それより古いトークンは全件の取り直し）
+    pruned_seq = Column(Integer, nullable=False, default=0)
+
+
+event.listen(
+    SyncCounter.__table__,
+    "after_create",
+    DDL("INSERT INTO sync_counter (id, seq, pruned_seq) VALUES (1, 0, 0)"),
+)
+
+
+def item_search_text():
+    """Itemの検索対象文字列（インデックスと検索クエリで同じ式を使う）"""
+    return (
+        Item.title
+        + literal_column("' '")
+        + func.coalesce(Item.description, literal_column("''"))
+    )
+
+
+def location_search_text():
+    """Locationの検索対象文字列（インデックスと検索クエリで同じ式を使う）"""
+    return Location.name + literal_column("' '") + Location.address
+
+
+def _add_search_indexes(table, document) -> None:
+    """
+    PostgreSQL用の全文検索（tsvector + GIN）とトライグラム（pg_trgm + GIN）の
+    式インデックスを追加する。SQLiteでは作成しない（app.core.search で代替）
+    """
+    tsv = Index(
+        f"ix_{table.name}_search_tsv",
+        func.to_tsvector(SEARCH_CONFIG, document),
+        postgresql_using="gin",
+    )
+    trgm = Index(
+        f"ix_{table.name}_search_trgm",
+        document.label("document"),
+        postgresql_using="gin",
+        postgresql_ops={"document": "gin_trgm_ops"},
+    )
+    for index in (tsv, trgm):
+        # 式の先頭が列ではないためテーブルを明示的に指定する
+        table.append_constraint(index.ddl_if(dialect="postgresql"))
+
+
+_add_search_indexes(Item.__table__, item_search_text())
+_add_search_indexes(Location.__table__, location_search_text())
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+@event.listens_for(Location, "before_insert")
+@event.listens_for(Location, "before_update")
+def _set_location_geohash(mapper, connection, target: Location) -> None:
+    """lat/lngの変更に合わせてgeohashを更新する"""
+    target.geohash = geohash_encode(target.lat, target.lng)
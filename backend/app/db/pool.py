@@ -0,0 +1,209 @@
+# Connection pool strategies (null / single / queue) and pool statistics
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+from app.db.query_guard import record_timing
+
+logger = logging.getLogger(__name__)
+
+POOL_MODES = ("null", "single", "queue")
+# 1コンテナが同時に1リクエストしか処理しない環境（Lambda）
+_LAMBDA_ENVIRONMENTS = ("prod", "production", "staging")
+# Lambda環境の auto で、常駐の1接続に加えて一時的に開ける接続数
+# （エクスポートのストリーミング等、1リクエストが2本目の接続を使う場合に待たせない）
+_LAMBDA_MAX_OVERFLOW = 2
+
+
+class PoolStatistics:
+    """
+    接続プールの累計値（スレッドセーフ）。
+
+    - opened / closed: DB接続の作成・切断数（接続の使い捨て具合）
+    - checkouts / checkout_wait_*: 接続取得の回数と待ち時間
+    - liveness_checks / liveness_failures: 取得時の生存確認と、切断を検出した回数
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.closed = 0
+        self.invalidated = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.liveness_checks = 0
+        self.liveness_failures = 0
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "opened": self.opened,
+                "closed": self.closed,
+                "invalidated": self.invalidated,
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "checkout_wait_total_ms": round(self.checkout_wait_total * 1000, 3),
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+                "liveness_checks": self.liveness_checks,
+                "liveness_failures": self.liveness_failures,
+            }
+
+
+class _TimedPoolMixin:
+    """プールからの接続取得にかかった時間（接続待ち）をリクエストの計測値に加算する"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statistics = PoolStatistics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            record_timing("pool", waited)
+            self.statistics.record_wait(waited)
+
+    def recreate(self):
+        # Engine.dispose() で作り直されたプールにも累計値を引き継ぐ
+        pool = super().recreate()
+        pool.statistics = self.statistics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    pass
+
+
+@lru_cache(maxsize=1)
+def resolve_pool_mode() -> str:
+    """DB_POOL_MODE を解決する（"auto" は queue。Lambda環境では小さなキューにする）"""
+    mode = settings.DB_POOL_MODE
+    if mode not in (*POOL_MODES, "auto"):
+        logger.warning("Unknown DB_POOL_MODE %r; using auto", mode)
+        mode = "auto"
+    return "queue" if mode == "auto" else mode
+
+
+def _pool_limits(mode: str) -> tuple[int, int]:
+    """(pool_size, max_overflow)"""
+    if mode == "single":
+        # 1コンテナ1接続。同時実行数 = 最大接続数になる
+        return 1, 0
+    if settings.DB_POOL_MODE == "auto" and settings.ENVIRONMENT in _LAMBDA_ENVIRONMENTS:
+        # 常駐は1接続だけにし、2本目が必要なリクエストは一時的な接続で処理する
+        return 1, _LAMBDA_MAX_OVERFLOW
+    return settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+
+
+def pool_options(is_async: bool = False) -> dict[str, Any]:
+    """同期・非同期Engineで共通の接続プール設定（DB_POOL_MODE に応じたプール）"""
+    mode = resolve_pool_mode()
+    options: dict[str, Any] = {
+        # pool_pre_ping は使わない（取得のたびに往復が増えるため）。
+        # 代わりに一定時間使われなかった接続だけを取得時に確認する
+        "pool_pre_ping": False,
+        # SQLログは無効（本番パフォーマンス向上）
+        "echo": False,
+    }
+    if mode == "null":
+        # 外部プーラー（RDS Proxy・PgBouncer）に任せ、接続は毎回作って閉じる
+        options["poolclass"] = TimedNullPool
+        return options
+
+    options["poolclass"] = TimedAsyncQueuePool if is_async else TimedQueuePool
+    pool_size, max_overflow = _pool_limits(mode)
+    options.update(
+        {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            # 接続リサイクル（RDSのアイドルタイムアウト対策）
+            "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+            # 接続取得タイムアウト（秒）
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        }
+    )
+    return options
+
+
+def register_pool_listeners(engine: Engine) -> None:
+    """
+    接続の作成・切断・取得を PoolStatistics に記録し、生存確認を登録する
+    （非同期Engineは sync_engine に登録）。
+
+    生存確認は、前回の返却から DB_LIVENESS_INTERVAL_SECONDS 以上経った接続を
+    取得したときだけ行う（Lambdaの凍結明け・長いアイドルの後）。
+    切断を検出した場合は DisconnectionError でプールに接続を作り直させる。
+    """
+    statistics: PoolStatistics = engine.pool.statistics
+    interval = settings.DB_LIVENESS_INTERVAL_SECONDS
+    check_liveness = resolve_pool_mode() != "null" and interval >= 0
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        statistics.add("opened")
+        # 作成直後の接続は確認不要
+        connection_record.info["returned_at"] = time.monotonic()
+
+    @event.listens_for(engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        statistics.add("closed")
+
+    @event.listens_for(engine, "close_detached")
+    def on_close_detached(dbapi_connection):
+        statistics.add("closed")
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        statistics.add("invalidated")
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        logger.debug("Connection checked out from pool")
+        returned_at = connection_record.info.get("returned_at")
+        if (
+            check_liveness
+            and returned_at is not None
+            and time.monotonic() - returned_at >= interval
+        ):
+            statistics.add("liveness_checks")
+            try:
+                engine.dialect.do_ping(dbapi_connection)
+            except Exception as e:
+                statistics.add("liveness_failures")
+                logger.info("Discarding dead pooled connection: %s", e)
+                raise exc.DisconnectionError() from e
+        statistics.add("checkouts")
+        statistics.add("checked_out")
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        statistics.add("checked_out", -1)
+        connection_record.info["returned_at"] = time.monotonic()
@@ -0,0 +1,91 @@
+# Query budget guard / per-request timing
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """1リクエストあたりのSQL発行数が予算を超えた場合に送出される例外"""
+
+
+@dataclass
+class QueryStats:
+    """1リクエスト内で発行されたSQLの集計と、処理ごとの所要時間（秒）"""
+
+    budget: int | None = None
+    raise_on_exceed: bool = False
+    count: int = 0
+    statements: list[str] = field(default_factory=list)
+    # "db"（SQL実行）、"pool"（接続待ち）、"serialize"（レスポンス生成）など
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def add_timing(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    @property
+    def exceeded(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    """現在のリクエストに紐づくQueryStatsを返す（計測外ならNone）"""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(
+    budget: int | None = None, raise_on_exceed: bool = False
+) -> Iterator[QueryStats]:
+    """
+    ブロック内で発行されたSQLを数える。
+    ContextVarに可変オブジェクトを置くため、スレッドプールで実行される
+    同期エンドポイントや依存関係からの発行分も同じ集計に加算される。
+    """
+    stats = QueryStats(budget=budget, raise_on_exceed=raise_on_exceed)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def record_statement(statement: str) -> None:
+    """Engineの before_cursor_execute フックから呼ばれる"""
+    stats = _current_stats.get()
+    if stats is None:
+        return
+
+    stats.count += 1
+    stats.statements.append(statement)
+
+    # raiseモードでは予算超過した文の時点で失敗させ、原因箇所をトレースに残す
+    if stats.raise_on_exceed and stats.exceeded:
+        raise QueryBudgetExceeded(
+            f"Query budget exceeded: {stats.count} statements "
+            f"(budget {stats.budget}). Last statement: {statement}"
+        )
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """現在のリクエストの所要時間に加算する（計測外なら何もしない）"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add_timing(name, seconds)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """ブロックの実行時間を現在のリクエストの name に加算する"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - started)
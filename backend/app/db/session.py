@@ -1,78 +1,296 @@
 import logging
-from collections.abc import Generator
+import math
+import time
+from collections.abc import AsyncGenerator, Callable, Generator
+from contextlib import asynccontextmanager
 from functools import lru_cache
+from typing import Any, Concatenate, ParamSpec, TypeVar
 
+from fastapi import Request
 from sqlalchemy import create_engine, event
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.db.pool import pool_options, register_pool_listeners
+from app.db.query_guard import record_statement, record_timing
 
 logger = logging.getLogger(__name__)
 
+# 書き込み後、読み取りをプライマリに固定する期限（UNIX時刻）を持つCookie
+PRIMARY_PIN_COOKIE = "db_primary_until"
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# 非同期ドライバへの置き換え対応表
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def _register_event_listeners(engine: Engine) -> None:
+    """接続ログ・プール統計・クエリ計測用のイベントを登録（非同期は sync_engine）"""
+    register_pool_listeners(engine)
+
+    # 接続イベントのログ（デバッグ用）
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        logger.info("Database connection established")
+
+    # クエリ予算ガード・計測用にSQL発行数と実行時間を記録（計測中のリクエストのみ）
+    @event.listens_for(engine, "before_cursor_execute")
+    def on_before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        record_statement(statement)
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def on_after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        started = conn.info["query_start_time"].pop()
+        record_timing("db", time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def on_handle_error(exception_context):
+        # 失敗したSQLでは after_cursor_execute が呼ばれないため開始時刻を捨てる
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_time"):
+            connection.info["query_start_time"].pop()
+
 
 @lru_cache(maxsize=1)
 def get_engine() -> Engine:
     """
     SQLAlchemy Engineを取得する。
-    Lambda環境に最適化された接続プール設定。
+    接続プールは DB_POOL_MODE で選択（app.db.pool を参照）。
     Secrets Managerからの認証情報取得に対応。
     """
-    database_url = settings.get_database_url()
-
-    # Lambda環境かどうかで設定を変更
-    # Lambda: 同時実行数制限(20)に対応した小さいプール
-    # ローカル: 開発しやすい大きめのプール
-    is_lambda = settings.ENVIRONMENT in ("prod", "production", "staging")
-
-    engine = create_engine(
-        database_url,
-        poolclass=QueuePool,
-        # Lambda: 1接続/インスタンス、ローカル: 5接続
-        pool_size=1 if is_lambda else 5,
-        # Lambda: 急なスパイク対応で+4、ローカル: +10
-        max_overflow=4 if is_lambda else 10,
-        # 5分で接続リサイクル（RDSのタイムアウト対策）
-        pool_recycle=300,
-        # 使用前に接続確認（切断された接続を再利用しない）
-        pool_pre_ping=True,
-        # 接続取得タイムアウト（秒）
-        pool_timeout=10,
-        # SQLログは無効（本番パフォーマンス向上）
-        echo=False,
-    )
+    engine = create_engine(settings.get_database_url(), **pool_options())
+    _register_event_listeners(engine)
+    return engine
+
+
+def _to_async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    drivername = _ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
 
-    # 接続イベントのログ（デバッグ用）
-    @event.listens_for(engine, "connect")
-    def on_connect(dbapi_connection, connection_record):
-        logger.info("Database connection established")
 
-    @event.listens_for(engine, "checkout")
-    def on_checkout(dbapi_connection, connection_record, connection_proxy):
-        logger.debug("Connection checked out from pool")
+def get_async_database_url() -> str:
+    """DATABASE_URLのドライバを非同期ドライバ（asyncpg / aiosqlite）に置き換える"""
+    return _to_async_url(settings.get_database_url())
 
+
+@lru_cache(maxsize=1)
+def get_async_engine() -> AsyncEngine:
+    """
+    非同期SQLAlchemy Engineを取得する（DB_ASYNC=true の場合に使用）。
+    接続先・プール設定は get_engine() と共通。
+    """
+    engine = create_async_engine(get_async_database_url(), **pool_options(True))
+    _register_event_listeners(engine.sync_engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_replica_engine() -> Engine | None:
+    """
+    読み取りレプリカのEngine（DATABASE_REPLICA_URL 未設定ならNone）。
+    プール設定は get_engine() と共通。テーブル作成はプライマリにのみ行う。
+    """
+    if not settings.DATABASE_REPLICA_URL:
+        return None
+    engine = create_engine(settings.DATABASE_REPLICA_URL, **pool_options())
+    _register_event_listeners(engine)
     return engine
 
 
-# 後方互換性のため、engine変数をエクスポート
-# main.pyなど既存コードからのインポートに対応
-engine = get_engine()
+@lru_cache(maxsize=1)
+def get_async_replica_engine() -> AsyncEngine | None:
+    """読み取りレプリカの非同期Engine（DATABASE_REPLICA_URL 未設定ならNone）"""
+    if not settings.DATABASE_REPLICA_URL:
+        return None
+    engine = create_async_engine(
+        _to_async_url(settings.DATABASE_REPLICA_URL), **pool_options(True)
+    )
+    _register_event_listeners(engine.sync_engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def ensure_schema() -> None:
+    """
+    開発・ステージング環境でテーブルを作成する（プロセスごとに1回だけ実行）。
+    Mangumは lifespan="off" のため、インポート時ではなく最初のDB利用時に呼ぶ。
+    """
+    if settings.ENVIRONMENT in ("development", "dev", "staging"):
+        from app.db import models
 
+        models.Base.metadata.create_all(bind=get_engine())
 
+
+@lru_cache(maxsize=1)
 def get_session_local() -> sessionmaker:
-    """SessionLocalファクトリを取得"""
+    """SessionLocalファクトリを取得（初回呼び出し時にEngineとスキーマを準備）"""
+    ensure_schema()
     return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
 
 
-# 後方互換性のため、SessionLocal変数をエクスポート
-SessionLocal = get_session_local()
+def __getattr__(name: str) -> Any:
+    """
+    後方互換性のため engine / SessionLocal をモジュール属性として提供する。
+    インポート時にEngine作成やSecrets Manager呼び出しを行わないよう、
+    参照された時点で初めて生成する（コールドスタート短縮）。
+    """
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_local()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@lru_cache(maxsize=1)
+def get_async_session_local() -> async_sessionmaker[AsyncSession]:
+    """非同期セッションファクトリを取得"""
+    ensure_schema()
+    return async_sessionmaker(autoflush=False, bind=get_async_engine())
+
+
+@lru_cache(maxsize=1)
+def get_replica_session_local() -> sessionmaker:
+    """読み取りレプリカのSessionファクトリ"""
+    ensure_schema()
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_replica_engine())
+
+
+@lru_cache(maxsize=1)
+def get_async_replica_session_local() -> async_sessionmaker[AsyncSession]:
+    """読み取りレプリカの非同期セッションファクトリ"""
+    ensure_schema()
+    return async_sessionmaker(autoflush=False, bind=get_async_replica_engine())
 
 
 def get_db() -> Generator[Session, None, None]:
     """Dependency for getting database sessions."""
-    db = SessionLocal()
+    db = get_session_local()()
     try:
         yield db
     finally:
         db.close()
+
+
+class SessionRunner:
+    """
+    同期ORMコード（app.crud）を設定に応じたDB経路で実行するラッパー。
+
+    - 同期モード: psycopg2 の Session をスレッドプール上で実行
+    - 非同期モード: AsyncSession.run_sync により asyncpg 上で実行し、
+      DB待ちの間スレッドを占有しない
+    """
+
+    def __init__(
+        self,
+        session: Session | AsyncSession,
+        pinned: bool = False,
+        replica: bool = False,
+    ):
+        self.session = session
+        # 直近に書き込んだクライアントの読み取りをプライマリに固定しているか
+        # （True の間はレスポンスキャッシュも使わない）
+        self.pinned = pinned
+        # レプリカに接続しているか（書き込み直後の結果はキャッシュに保存しない）
+        self.replica = replica
+
+    async def run(
+        self,
+        fn: Callable[Concatenate[Session, P], T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+def replica_enabled() -> bool:
+    return bool(settings.DATABASE_REPLICA_URL)
+
+
+def primary_pin_cookie() -> str:
+    """書き込み後に付与する Set-Cookie の値（この時刻まで読み取りをプライマリに固定）"""
+    until = time.time() + settings.READ_YOUR_WRITES_SECONDS
+    return (
+        f"{PRIMARY_PIN_COOKIE}={until:.3f}; "
+        f"Max-Age={math.ceil(settings.READ_YOUR_WRITES_SECONDS)}; "
+        "Path=/; HttpOnly; SameSite=Lax"
+    )
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    """クライアントが書き込み直後（レプリカに未反映の可能性がある期間）かどうか"""
+    value = request.cookies.get(PRIMARY_PIN_COOKIE)
+    if not value:
+        return False
+    try:
+        return float(value) > time.time()
+    except ValueError:
+        return False
+
+
+@asynccontextmanager
+async def session_scope(replica: bool = False) -> AsyncGenerator[SessionRunner, None]:
+    """
+    リクエスト外（バックグラウンドタスク等）で使うセッション。
+    get_session_runner と同じく設定に応じた同期・非同期の経路を使う。
+    replica=True ならレプリカ（未設定ならプライマリ）に接続する。
+    """
+    replica = replica and replica_enabled()
+    if settings.DB_ASYNC:
+        factory = (
+            get_async_replica_session_local() if replica else get_async_session_local()
+        )
+        async with factory() as session:
+            yield SessionRunner(session)
+        return
+
+    db = (get_replica_session_local() if replica else get_session_local())()
+    try:
+        yield SessionRunner(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def get_session_runner() -> AsyncGenerator[SessionRunner, None]:
+    """Dependency for running CRUD operations on the configured (sync/async) path."""
+    async with session_scope() as runner:
+        yield runner
+
+
+async def get_read_session_runner(
+    request: Request,
+) -> AsyncGenerator[SessionRunner, None]:
+    """
+    Dependency for read-only handlers.
+
+    Uses the replica when one is configured, except for clients that wrote
+    within READ_YOUR_WRITES_SECONDS (see ReadYourWritesMiddleware), which
+    stay on the primary so they see their own changes.
+    """
+    pinned = replica_enabled() and is_pinned_to_primary(request)
+    async with session_scope(replica=not pinned) as runner:
+        runner.pinned = pinned
+        runner.replica = replica_enabled() and not pinned
+        yield runner
@@ -0,0 +1,122 @@
+# Cheap database statistics for health checks (no table scans)
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import bindparam, column, func, select, table, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import registry
+from app.db.pool import resolve_pool_mode
+from app.db.session import (
+    get_async_engine,
+    get_async_replica_engine,
+    get_engine,
+    get_replica_engine,
+)
+
+# PostgreSQLの統計情報（ANALYZE / autovacuum で更新）から行数の推定値を読む
+_RELTUPLES = text(
+    "SELECT relname, reltuples FROM pg_class "
+    "WHERE relname IN :names AND relkind = 'r' "
+    "AND relnamespace = current_schema()::regnamespace"
+).bindparams(bindparam("names", expanding=True))
+
+
+def estimate_row_counts(db: Session, tables: list[str]) -> dict[str, int | None]:
+    """
+    Estimated row counts per table without COUNT(*).
+
+    PostgreSQL reads pg_class.reltuples (None until the table has been
+    analyzed); other databases use MAX(id) from the primary key index.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        estimates: dict[str, int | None] = dict.fromkeys(tables)
+        for name, reltuples in db.execute(_RELTUPLES, {"names": tables}):
+            estimates[name] = int(reltuples) if reltuples >= 0 else None
+        return estimates
+    return {
+        name: db.execute(select(func.max(table(name, column("id")).c.id))).scalar() or 0
+        for name in tables
+    }
+
+
+def server_version(db: Session) -> str | None:
+    """接続時に取得済みのサーバーバージョン（クエリは発行しない）"""
+    info = db.get_bind().dialect.server_version_info
+    return ".".join(str(part) for part in info) if info else None
+
+
+def _pool_snapshot(pool: Any) -> dict[str, Any]:
+    snapshot: dict[str, Any] = {"mode": resolve_pool_mode()}
+    if isinstance(pool, QueuePool):
+        snapshot.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+        )
+    # 接続の作成・切断数と取得待ち時間の累計（プロセス起動から）
+    snapshot["statistics"] = pool.statistics.snapshot()
+    return snapshot
+
+
+def created_engines() -> dict[str, Any]:
+    """
+    作成済みのEngine（"sync" / "async" / "replica" / "async_replica"）。
+    まだ作成されていないEngineは（作成を誘発しないよう）含めない。
+    """
+    engines = {}
+    if get_engine.cache_info().currsize:
+        engines["sync"] = get_engine()
+    if get_async_engine.cache_info().currsize:
+        engines["async"] = get_async_engine()
+    if get_replica_engine.cache_info().currsize and get_replica_engine() is not None:
+        engines["replica"] = get_replica_engine()
+    if (
+        get_async_replica_engine.cache_info().currsize
+        and get_async_replica_engine() is not None
+    ):
+        engines["async_replica"] = get_async_replica_engine()
+    return engines
+
+
+def pool_stats() -> dict[str, dict[str, Any]]:
+    """作成済みのEngineの接続プールの状態と統計"""
+    return {
+        name: _pool_snapshot(engine.pool) for name, engine in created_engines().items()
+    }
+
+
+def _pool_metric(field: str) -> Callable[[], dict[tuple[str, ...], float]]:
+    def read() -> dict[tuple[str, ...], float]:
+        return {
+            (name,): getattr(engine.pool.statistics, field)
+            for name, engine in created_engines().items()
+        }
+
+    return read
+
+
+# /api/metrics に出力する接続プールの統計（engine ラベルは created_engines() のキー）
+for _name, _kind, _field, _documentation in (
+    ("db_pool_connections_opened_total", "counter", "opened", "DB connections opened"),
+    ("db_pool_connections_closed_total", "counter", "closed", "DB connections closed"),
+    ("db_pool_checkouts_total", "counter", "checkouts", "Pool checkouts"),
+    (
+        "db_pool_checkout_wait_seconds_total",
+        "counter",
+        "checkout_wait_total",
+        "Cumulative time spent waiting for a pooled connection",
+    ),
+    (
+        "db_pool_liveness_failures_total",
+        "counter",
+        "liveness_failures",
+        "Idle pooled connections found dead on checkout",
+    ),
+    ("db_pool_checked_out", "gauge", "checked_out", "Connections currently in use"),
+):
+    registry.callback(_name, _documentation, _kind, ("engine",), _pool_metric(_field))
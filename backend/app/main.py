@@ -1,65 +1,35 @@
-import os
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from fastapi import FastAPI, Depends, Request, HTTPException
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from mangum import Mangum
-from sqlalchemy import text
-from sqlalchemy.orm import Session
 
 from app.api import router as api_router
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.cache import response_cache
 from app.core.config import settings
-from app.db.session import engine, get_db
-from app.db import models
-
-
-class CloudFrontValidationMiddleware(BaseHTTPMiddleware):
-    """
-    CloudFront経由のリクエストのみを許可するミドルウェア。
-    API Gatewayへの直接アクセスをブロックします。
-    """
-
-    async def dispatch(self, request: Request, call_next):
-        # ヘルスチェックエンドポイントはスキップ（ALB/ELBヘルスチェック用）
-        if request.url.path.startswith("/api/health"):
-            return await call_next(request)
-
-        # ウォームアップリクエストはスキップ（EventBridge用）
-        if request.headers.get("X-Warmup") == "true":
-            return await call_next(request)
-
-        # 本番・ステージング環境でのみ検証
-        if settings.ENVIRONMENT in ("prod", "production", "staging"):
-            expected_secret = os.getenv("CLOUDFRONT_SECRET")
-            actual_secret = request.headers.get("X-CloudFront-Secret")
-
-            if expected_secret and actual_secret != expected_secret:
-                raise HTTPException(
-                    status_code=403,
-                    detail="Direct access not allowed. Please use CloudFront."
-                )
-
-        return await call_next(request)
+from app.core.health import database_probe
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, registry
+from app.db.session import ensure_schema, get_session_local, replica_enabled
+from app.db.stats import pool_stats
+from app.middleware import (
+    CloudFrontValidationMiddleware,
+    CompressionMiddleware,
+    InstrumentationMiddleware,
+    ReadYourWritesMiddleware,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Startup: Create tables if they don't exist
     # Allow in development, dev, and staging environments
-    if settings.ENVIRONMENT in ("development", "dev", "staging"):
-        models.Base.metadata.create_all(bind=engine)
+    ensure_schema()
     yield
     # Shutdown: cleanup if needed
 
 
-def _ensure_tables() -> None:
-    """Ensure database tables exist (for Lambda cold start)."""
-    if settings.ENVIRONMENT in ("development", "dev", "staging"):
-        models.Base.metadata.create_all(bind=engine)
-
-
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
@@ -69,7 +39,32 @@ app = FastAPI(
 )
 
 # CloudFront検証ミドルウェア（本番環境でAPI Gateway直接アクセスをブロック）
-app.add_middleware(CloudFrontValidationMiddleware)
+# 秘密値は起動時に一度だけ解決する（本番・ステージング以外は検証しない）
+app.add_middleware(
+    CloudFrontValidationMiddleware,
+    secret=settings.CLOUDFRONT_SECRET
+    if settings.ENVIRONMENT in ("prod", "production", "staging")
+    else None,
+)
+
+# 読み取りレプリカ使用時、書き込んだクライアントの読み取りを一定時間プライマリに固定
+if replica_enabled():
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# レスポンス圧縮（Accept-Encodingに応じて gzip / br / zstd。計測ミドルウェアの内側）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# 計測ミドルウェア（Server-Timing・構造化ログ・メトリクス、クエリ予算ガード）
+if settings.INSTRUMENTATION_ENABLED or settings.QUERY_BUDGET is not None:
+    app.add_middleware(
+        InstrumentationMiddleware,
+        budget=settings.QUERY_BUDGET,
+        raise_on_exceed=settings.QUERY_BUDGET_RAISE,
+        server_timing=settings.INSTRUMENTATION_ENABLED
+        and settings.SERVER_TIMING_ENABLED,
+        record=settings.INSTRUMENTATION_ENABLED,
+    )
 
 # CORS middleware
 app.add_middleware(
@@ -78,14 +73,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified", "Server-Timing"],
 )
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# Ensure tables exist on module load (for Lambda cold start)
-# This is necessary because Mangum uses lifespan="off"
-_ensure_tables()
+# Mangumは lifespan="off" のため、DB_LAZY_INIT=true（既定）ではEngine作成と
+# テーブル作成を最初のDB利用時（get_session_local）まで遅延させる。
+# falseの場合はLambdaの初期化フェーズ中に済ませておく
+if not settings.DB_LAZY_INIT:
+    get_session_local()
 
 # AWS Lambda handler using Mangum
 handler = Mangum(app, lifespan="off")
@@ -101,66 +99,52 @@ def health_check(request: Request) -> dict[str, str]:
     return {"status": "healthy", "message": "API is running"}
 
 
+@app.get("/api/cache/stats")
+def cache_stats() -> dict:
+    """Response cache hit/miss/eviction statistics."""
+    return response_cache.snapshot()
+
+
+@app.get("/api/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Request latency / SQL histograms in the Prometheus text format."""
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.get("/api/health/db")
-def db_health_check(db: Session = Depends(get_db)) -> dict[str, str | int | None]:
-    """Database connection health check."""
-    try:
-        # Test database connection
-        result = db.execute(text("SELECT 1"))
-        result.fetchone()
-
-        # Get database version
-        version_result = db.execute(text("SELECT version()"))
-        db_version = version_result.fetchone()
-
-        # Count items in the database
-        count_result = db.execute(text("SELECT COUNT(*) FROM items"))
-        item_count = count_result.fetchone()
-
-        return {
-            "status": "healthy",
-            "message": "Database connection successful",
-            "database_version": db_version[0] if db_version else None,
-            "item_count": item_count[0] if item_count else 0,
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "message": f"Database connection failed: {str(e)}",
-            "database_version": None,
-            "item_count": None,
-        }
+async def db_health_check() -> dict:
+    """
+    Database connection health check.
+
+    The result is cached for HEALTH_CHECK_INTERVAL_SECONDS, and row counts are
+    catalog estimates, so frequent probes neither hold pool connections nor
+    scan tables.
+    """
+    return await database_probe.get()
 
 
 @app.get("/api/health/full")
-def full_health_check(db: Session = Depends(get_db)) -> dict:
+async def full_health_check() -> dict:
     """Full system health check including all components."""
+    database = await database_probe.get()
     health_status = {
         "api": {"status": "healthy", "message": "API is running"},
-        "database": {"status": "unknown", "message": "Not checked"},
+        "database": {
+            "status": database["status"],
+            "message": database["message"],
+            "checked_at": database["checked_at"],
+            "cached": database["cached"],
+        },
     }
 
-    # Check database
-    try:
-        db.execute(text("SELECT 1"))
-        health_status["database"] = {
-            "status": "healthy",
-            "message": "Connected",
-        }
-    except Exception as e:
-        health_status["database"] = {
-            "status": "unhealthy",
-            "message": str(e),
-        }
-
     # Overall status
     all_healthy = all(
-        component["status"] == "healthy"
-        for component in health_status.values()
+        component["status"] == "healthy" for component in health_status.values()
     )
 
     return {
         "status": "healthy" if all_healthy else "unhealthy",
         "components": health_status,
+        "pools": pool_stats(),
         "environment": settings.ENVIRONMENT,
     }
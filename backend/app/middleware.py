@@ -0,0 +1,305 @@
+# Cross-cutting concerns as raw ASGI middleware
+#
+# BaseHTTPMiddleware はリクエストごとにタスクとストリームを追加で生成するため使わない。
+# 設定はアプリ構築時に一度だけ解決し、__call__ では scope とヘッダーだけを見る。
+import hmac
+import json
+import logging
+import time
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.compression import (
+    compress,
+    encoded_etag,
+    is_compressible,
+    negotiate,
+    route_policy,
+)
+from app.core.metrics import (
+    DB_DURATION,
+    DB_STATEMENTS,
+    POOL_WAIT,
+    REQUEST_DURATION,
+    REQUEST_TTFB,
+    SERIALIZE_DURATION,
+)
+from app.db.query_guard import QueryStats, track_queries
+from app.db.session import primary_pin_cookie
+
+logger = logging.getLogger(__name__)
+# 1リクエスト1行の構造化ログ（JSON）
+request_logger = logging.getLogger("app.request")
+
+# ヘルスチェック・メトリクスは検証しない（ALB/ELB・監視用）
+CLOUDFRONT_EXEMPT_PREFIXES = ("/api/health",)
+CLOUDFRONT_EXEMPT_PATHS = frozenset({"/api/metrics"})
+CLOUDFRONT_SECRET_HEADER = b"x-cloudfront-secret"
+WARMUP_HEADER = b"x-warmup"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class CloudFrontValidationMiddleware:
+    """
+    CloudFront経由のリクエストのみを許可するミドルウェア。
+    API Gatewayへの直接アクセスをブロックします。
+
+    secret が None（本番・ステージング以外、または未設定）の場合は何もしない。
+    ルーターに入る前に403を返し、秘密値は定数時間で比較する。
+    """
+
+    def __init__(self, app: ASGIApp, secret: str | None = None):
+        self.app = app
+        self.secret = secret.encode() if secret else None
+        self._forbidden = JSONResponse(
+            {"detail": "Direct access not allowed. Please use CloudFront."},
+            status_code=403,
+        )
+
+    def _allowed(self, scope: Scope) -> bool:
+        path = scope["path"]
+        if path in CLOUDFRONT_EXEMPT_PATHS or path.startswith(
+            CLOUDFRONT_EXEMPT_PREFIXES
+        ):
+            return True
+        actual = b""
+        for name, value in scope["headers"]:
+            if name == CLOUDFRONT_SECRET_HEADER:
+                actual = value
+            # ウォームアップリクエストはスキップ（EventBridge用）
+            elif name == WARMUP_HEADER and value == b"true":
+                return True
+        return hmac.compare_digest(actual, self.secret)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.secret is None or scope["type"] != "http" or self._allowed(scope):
+            await self.app(scope, receive, send)
+            return
+        await self._forbidden(scope, receive, send)
+
+
+class CompressionMiddleware:
+    """
+    Accept-Encoding に応じてレスポンス本文を圧縮するミドルウェア（gzip / br / zstd）。
+
+    次の場合は圧縮せずにそのまま返す:
+    - ストリーミングレスポンス（最初の本文メッセージが more_body=True）
+    - Content-Encoding 設定済み（キャッシュ済みの圧縮本文など）
+    - 圧縮対象外の Content-Type、またはルートの設定で閾値未満のサイズ
+    閾値とルートごとの無効化は app.core.compression.compression() で設定する。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(_header(scope, b"accept-encoding"))
+        start: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # 本文を見るまで開始メッセージを保留する
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            passthrough = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+                or not route_policy(scope).applies(len(body))
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is not None:
+                compressed = compress(body, encoding)
+                if len(compressed) < len(body):
+                    body = compressed
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    if "etag" in headers:
+                        headers["ETag"] = encoded_etag(headers["ETag"], encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ReadYourWritesMiddleware:
+    """
+    書き込み（GET/HEAD/OPTIONS 以外）に成功したクライアントに、読み取りを一定時間
+    プライマリに固定するCookieを付与するミドルウェア（読み取りレプリカ使用時のみ登録）。
+    get_read_session_runner はこのCookieがある間レプリカを使わない。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("Set-Cookie", primary_pin_cookie())
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
+
+
+def _server_timing(timings: dict[str, float], total: float) -> str:
+    """Server-Timingヘッダーの値（ミリ秒）"""
+    metrics = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    metrics.append(f"app;dur={total * 1000:.1f}")
+    return ", ".join(metrics)
+
+
+def _route_template(scope: Scope) -> str:
+    """
+    メトリクスのラベル用に、パス引数を {name} に戻したルートを返す
+    （例: /api/v1/my-lists/{list_id}）。未一致のパスは1つにまとめてラベル数を抑える。
+    """
+    if "endpoint" not in scope:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    position = 0
+    for name, value in scope.get("path_params", {}).items():
+        for i in range(position, len(segments)):
+            if segments[i] == str(value):
+                segments[i] = f"{{{name}}}"
+                position = i + 1
+                break
+    return "/".join(segments)
+
+
+class InstrumentationMiddleware:
+    """
+    リクエストごとにSQL発行数・DB実行時間・接続待ち時間・シリアライズ時間を
+    計測するミドルウェア。
+    Server-Timingヘッダーと構造化ログ（1リクエスト1行のJSON）に出力し、
+    ルート別のヒストグラムとして /api/metrics に集計します。
+    QUERY_BUDGET設定時はSQL発行数の予算超過も検出します（N+1クエリの検知用）。
+
+    ストリーミングレスポンスを妨げないよう、BaseHTTPMiddlewareではなく素のASGIで実装。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        budget: int | None = None,
+        raise_on_exceed: bool = False,
+        server_timing: bool = True,
+        record: bool = True,
+    ):
+        self.app = app
+        self.budget = budget
+        self.raise_on_exceed = raise_on_exceed
+        self.server_timing = server_timing
+        self.record = record
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        ttfb = None
+
+        with track_queries(self.budget, self.raise_on_exceed) as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status_code, ttfb
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    ttfb = time.perf_counter() - started
+                    headers = MutableHeaders(scope=message)
+                    if self.server_timing:
+                        headers.append(
+                            "Server-Timing", _server_timing(stats.timings, ttfb)
+                        )
+                    if self.budget is not None:
+                        headers["X-Query-Count"] = str(stats.count)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                self._finish(scope, status_code, stats, started, ttfb)
+
+    def _finish(
+        self,
+        scope: Scope,
+        status_code: int,
+        stats: QueryStats,
+        started: float,
+        ttfb: float | None,
+    ) -> None:
+        duration = time.perf_counter() - started
+        method = scope["method"]
+        route = _route_template(scope)
+
+        if stats.exceeded:
+            logger.warning(
+                "Query budget exceeded: %s %s issued %d statements (budget %d)",
+                method,
+                scope["path"],
+                stats.count,
+                self.budget,
+            )
+
+        if not self.record:
+            return
+        timings = stats.timings
+        REQUEST_DURATION.observe(duration, method, route, str(status_code))
+        # ストリーミングでは本文の送信完了まで duration に含まれるため、別に集計する
+        if ttfb is not None:
+            REQUEST_TTFB.observe(ttfb, method, route, str(status_code))
+        DB_DURATION.observe(timings.get("db", 0.0), method, route)
+        DB_STATEMENTS.observe(stats.count, method, route)
+        POOL_WAIT.observe(timings.get("pool", 0.0), method, route)
+        SERIALIZE_DURATION.observe(timings.get("serialize", 0.0), method, route)
+        request_logger.info(
+            json.dumps(
+                {
+                    "method": method,
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "ttfb_ms": round(ttfb * 1000, 2) if ttfb is not None else None,
+                    "db_statements": stats.count,
+                    **{
+                        f"{name}_ms": round(seconds * 1000, 2)
+                        for name, seconds in timings.items()
+                    },
+                }
+            )
+        )
@@ -0,0 +1,95 @@
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, Field
+
+from app.schemas.my_list import (
+    LocationCreate,
+    MyListCreate,
+    MyListResponse,
+    MyListUpdate,
+)
+
+# 同じバッチ内で先に作成したリスト・地点は、IDの代わりに ref 文字列で参照できる
+EntityRef = int | str
+
+MAX_BATCH_OPERATIONS = 200
+
+
+# Operation schemas（"op" で判別）
+class CreateListOp(BaseModel):
+    op: Literal["create_list"]
+    ref: str | None = None
+    data: MyListCreate
+
+
+class UpdateListOp(BaseModel):
+    op: Literal["update_list"]
+    list_id: EntityRef
+    data: MyListUpdate
+
+
+class DeleteListOp(BaseModel):
+    op: Literal["delete_list"]
+    list_id: EntityRef
+
+
+class AddLocationOp(BaseModel):
+    op: Literal["add_location"]
+    ref: str | None = None
+    list_id: EntityRef
+    data: LocationCreate
+
+
+class RemoveLocationOp(BaseModel):
+    op: Literal["remove_location"]
+    list_id: EntityRef
+    location_id: EntityRef
+
+
+class MoveLocationOp(BaseModel):
+    op: Literal["move_location"]
+    list_id: EntityRef
+    location_id: EntityRef
+    after_id: EntityRef | None = None
+    before_id: EntityRef | None = None
+
+
+class ReorderLocationsOp(BaseModel):
+    op: Literal["reorder_locations"]
+    list_id: EntityRef
+    location_ids: list[EntityRef]
+
+
+BatchOperation = Annotated[
+    CreateListOp
+    | UpdateListOp
+    | DeleteListOp
+    | AddLocationOp
+    | RemoveLocationOp
+    | MoveLocationOp
+    | ReorderLocationsOp,
+    Field(discriminator="op"),
+]
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(
+        min_length=1, max_length=MAX_BATCH_OPERATIONS
+    )
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: str
+    # HTTPステータス相当（失敗した操作以外は、ロールバック時に 424）
+    status: int
+    id: int | None = None
+    ref: str | None = None
+    error: str | None = None
+
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: list[BatchOperationResult]
+    # 変更のあったリストのコミット後の状態（削除されたものは含まない）
+    lists: list[MyListResponse] = []
@@ -21,14 +21,53 @@ class LocationResponse(LocationBase):
 
     id: int
     my_list_id: int
-    order_index: int
+    order_index: float
     created_at: datetime
 
 
+class NearbyLocationResponse(LocationResponse):
+    distance_m: float
+
+
+class MarkerCluster(BaseModel):
+    # 代表点（クラスタ内の地点の重心）
+    lat: float
+    lng: float
+    count: int
+    # 1地点だけのクラスタはその地点のID
+    location_id: int | None = None
+
+
+class MarkerClusters(BaseModel):
+    # 集計に使ったズーム（クラスタが limit を超える場合は要求より粗くなる）
+    zoom: int
+    # clusters に含まれる地点数の合計
+    total: int
+    clusters: list[MarkerCluster]
+
+
 class LocationReorder(BaseModel):
     location_ids: list[int]
 
 
+class LocationMove(BaseModel):
+    # 移動先の直前・直後の地点（両方省略時は末尾へ移動）
+    after_id: int | None = None
+    before_id: int | None = None
+
+
+class LocationImportError(BaseModel):
+    row: int
+    error: str
+
+
+class LocationImportResult(BaseModel):
+    inserted: int
+    error_count: int
+    # 先頭から最大 max_errors 件までのエラー詳細
+    errors: list[LocationImportError]
+
+
 # MyList schemas
 class MyListBase(BaseModel):
     name: str
@@ -51,3 +90,43 @@ class MyListResponse(MyListBase):
     created_at: datetime
     updated_at: datetime
     locations: list[LocationResponse] = []
+
+
+class BoundingBox(BaseModel):
+    min_lat: float
+    min_lng: float
+    max_lat: float
+    max_lng: float
+
+
+class LatLng(BaseModel):
+    lat: float
+    lng: float
+
+
+class MyListSummary(MyListBase):
+    """List card / map-bounds data, read from the list row only."""
+
+    id: int
+    location_count: int
+    # 地点がないリストではNone
+    bounds: BoundingBox | None = None
+    centroid: LatLng | None = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class MyListChanges(BaseModel):
+    """Lists and locations changed after a sync token (delta sync)."""
+
+    # 次回の since に渡すトークン
+    token: int
+    # True ならトークンが無効（未指定・期限切れ）。全件を取り直してから token で同期する
+    reset: bool = False
+    # True なら続きがある（token を since にしてすぐに再取得する）
+    has_more: bool = False
+    lists: list[MyListSummary] = []
+    locations: list[LocationResponse] = []
+    # 削除されたリスト（その地点もすべて削除済み）と地点
+    deleted_lists: list[int] = []
+    deleted_locations: list[int] = []
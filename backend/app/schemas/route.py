@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+
+
+class RouteOptimizeRequest(BaseModel):
+    start_location_id: int | None = None
+    round_trip: bool = False
+    # Trueの場合、最適化した順序を order_index に保存する
+    persist: bool = False
+    time_limit_ms: int = Field(default=1000, ge=10, le=10_000)
+    average_speed_kmh: float = Field(default=30.0, gt=0)
+
+
+class RouteLeg(BaseModel):
+    start_location_id: int
+    end_location_id: int
+    distance_m: float
+    duration_s: float
+    distance: str
+    duration: str
+
+
+class RouteInfo(BaseModel):
+    list_id: int
+    optimized_order: list[int]
+    total_distance_m: float
+    total_duration_s: float
+    total_distance: str
+    total_duration: str
+    legs: list[RouteLeg]
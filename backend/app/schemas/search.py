@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+from app.schemas.item import ItemResponse
+from app.schemas.my_list import LocationResponse
+
+
+class ItemSearchResult(ItemResponse):
+    score: float
+
+
+class LocationSearchResult(LocationResponse):
+    score: float
+
+
+class SearchResponse(BaseModel):
+    # それぞれスコアの降順（スコアは同じレスポンス内での比較用）
+    items: list[ItemSearchResult]
+    locations: list[LocationSearchResult]
@@ -0,0 +1,504 @@
+"""
+API benchmark / load test.
+
+Seeds a database, then drives every router in ``app/api/endpoints`` in-process,
+both through the ASGI app (httpx) and through the Mangum ``handler`` with
+synthetic API Gateway events. For each scenario it reports throughput,
+p50/p95/p99 latency and SQL statements per request.
+
+Usage (from backend/):
+
+    python -m benchmarks.api                          # temporary SQLite
+    python -m benchmarks.api --database-url postgresql://... --reset
+    python -m benchmarks.api --save-baseline sqlite   # benchmarks/baselines/
+    python -m benchmarks.api --compare sqlite         # exit 1 on regression
+
+A comparison fails when a scenario issues more statements per request than
+the baseline, or its p95 latency grows by more than --tolerance (and by at
+least --min-delta-ms).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+TRANSPORTS = ("asgi", "mangum")
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    params: dict[str, Any] = field(default_factory=dict)
+    json: Any = None
+    content: bytes | None = None
+    headers: dict[str, str] = field(default_factory=dict)
+
+    def body(self) -> bytes | None:
+        if self.json is not None:
+            return json.dumps(self.json).encode()
+        return self.content
+
+    def all_headers(self) -> dict[str, str]:
+        if self.json is not None:
+            return {"content-type": "application/json", **self.headers}
+        return self.headers
+
+
+@dataclass
+class Result:
+    scenario: str
+    transport: str
+    requests: int
+    errors: int
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    queries_mean: float
+    queries_max: int
+
+
+class Scenarios:
+    """Request factories for every endpoint, built from the seeded IDs."""
+
+    # 1リクエストごとに seed の deletable 行を1つ消費するシナリオ
+    DELETE_SCENARIOS = ("items_delete", "my_lists_delete")
+
+    def __init__(self, data, rng: random.Random):
+        self.data = data
+        self.rng = rng
+        self.item_ids = data.item_ids
+        self.list_ids = [i for i in data.list_ids if data.location_ids.get(i)]
+        # 削除系のシナリオは専用に投入した行を1回ずつ使う（run() で件数を決める）
+        self.deletable_items = list(data.deletable_item_ids)
+        self.deletable_lists = list(data.deletable_list_ids)
+
+    def _list(self) -> int:
+        return self.rng.choice(self.list_ids)
+
+    def _location(self) -> dict[str, Any]:
+        return {
+            "name": "Benchmark place",
+            "address": "1 Benchmark St",
+            "lat": self.rng.uniform(35.5, 35.9),
+            "lng": self.rng.uniform(139.5, 139.9),
+        }
+
+    def all(self) -> dict[str, Callable[[], Request]]:
+        return {
+            "health": lambda: Request("GET", "/api/health"),
+            "items_page": lambda: Request(
+                "GET", "/api/v1/items", {"limit": 50, "skip": self.rng.randint(0, 500)}
+            ),
+            "items_get": lambda: Request(
+                "GET", f"/api/v1/items/{self.rng.choice(self.item_ids)}"
+            ),
+            "items_create": lambda: Request(
+                "POST", "/api/v1/items", json={"title": "bench", "description": "x"}
+            ),
+            "items_update": lambda: Request(
+                "PUT",
+                f"/api/v1/items/{self.rng.choice(self.item_ids)}",
+                json={"title": f"bench {self.rng.random()}"},
+            ),
+            "my_lists_page": lambda: Request("GET", "/api/v1/my-lists", {"limit": 20}),
+            "my_lists_summaries": lambda: Request(
+                "GET", "/api/v1/my-lists/summaries", {"limit": 20}
+            ),
+            "my_lists_changes": lambda: Request(
+                "GET", "/api/v1/my-lists/changes", {"since": 0, "limit": 200}
+            ),
+            "my_lists_get": lambda: Request("GET", f"/api/v1/my-lists/{self._list()}"),
+            "my_lists_create": lambda: Request(
+                "POST", "/api/v1/my-lists", json={"name": "bench"}
+            ),
+            "my_lists_update": lambda: Request(
+                "PUT",
+                f"/api/v1/my-lists/{self._list()}",
+                json={"description": f"bench {self.rng.random()}"},
+            ),
+            "locations_add": lambda: Request(
+                "POST",
+                f"/api/v1/my-lists/{self._list()}/locations",
+                json=self._location(),
+            ),
+            "locations_move": self._move,
+            "locations_reorder": self._reorder,
+            "locations_import": lambda: Request(
+                "POST",
+                f"/api/v1/my-lists/{self._list()}/locations/import",
+                content=b"\n".join(
+                    json.dumps(self._location()).encode() for _ in range(100)
+                ),
+                headers={"content-type": "application/x-ndjson"},
+            ),
+            "route_optimize": lambda: Request(
+                "POST",
+                f"/api/v1/my-lists/{self._list()}/optimize-route",
+                json={"time_limit_ms": 50},
+            ),
+            "list_export": lambda: Request(
+                "GET", f"/api/v1/my-lists/{self._list()}/export"
+            ),
+            "locations_within": self._within,
+            "locations_clusters": self._clusters,
+            "locations_nearby": lambda: Request(
+                "GET",
+                "/api/v1/locations/nearby",
+                {
+                    "lat": self.rng.uniform(35.5, 35.9),
+                    "lng": self.rng.uniform(139.5, 139.9),
+                    "k": 10,
+                },
+            ),
+            "search": lambda: Request(
+                "GET",
+                "/api/v1/search",
+                {"q": self.rng.choice(["place", "plcae 1", "bench", "item 4"])},
+            ),
+            "batch": self._batch,
+            "items_delete": lambda: Request(
+                "DELETE", f"/api/v1/items/{self._take(self.deletable_items)}"
+            ),
+            "my_lists_delete": lambda: Request(
+                "DELETE", f"/api/v1/my-lists/{self._take(self.deletable_lists)}"
+            ),
+        }
+
+    @staticmethod
+    def _take(ids: list[int]) -> int:
+        if not ids:
+            raise RuntimeError(
+                "No seeded rows left to delete; the delete scenarios need "
+                "(requests + warmup) rows per transport"
+            )
+        return ids.pop()
+
+    def _move(self) -> Request:
+        list_id = self._list()
+        moved, anchor = self.rng.sample(self.data.location_ids[list_id], 2)
+        return Request(
+            "POST",
+            f"/api/v1/my-lists/{list_id}/locations/{moved}/move",
+            json={"after_id": anchor},
+        )
+
+    def _reorder(self) -> Request:
+        list_id = self._list()
+        location_ids = list(self.data.location_ids[list_id])
+        self.rng.shuffle(location_ids)
+        return Request(
+            "PUT",
+            f"/api/v1/my-lists/{list_id}/locations/reorder",
+            json={"location_ids": location_ids},
+        )
+
+    def _within(self) -> Request:
+        lat = self.rng.uniform(35.5, 35.85)
+        lng = self.rng.uniform(139.5, 139.85)
+        return Request(
+            "GET",
+            "/api/v1/locations/within",
+            {
+                "min_lat": lat,
+                "min_lng": lng,
+                "max_lat": lat + 0.05,
+                "max_lng": lng + 0.05,
+            },
+        )
+
+    def _clusters(self) -> Request:
+        # 地図のパン・ズームを模した表示範囲（ズームに応じた広さ）
+        zoom = self.rng.randint(8, 16)
+        span = 360 / 2**zoom * 4
+        lat = self.rng.uniform(35.5, 35.85)
+        lng = self.rng.uniform(139.5, 139.85)
+        return Request(
+            "GET",
+            "/api/v1/locations/clusters",
+            {
+                "zoom": zoom,
+                "min_lat": lat,
+                "min_lng": lng,
+                "max_lat": lat + span / 2,
+                "max_lng": lng + span,
+            },
+        )
+
+    def _batch(self) -> Request:
+        list_id = self._list()
+        return Request(
+            "POST",
+            "/api/v1/batch",
+            json={
+                "operations": [
+                    {"op": "update_list", "list_id": list_id, "data": {"name": "b"}},
+                    *(
+                        {"op": "add_location", "list_id": list_id, "data": loc}
+                        for loc in (self._location() for _ in range(3))
+                    ),
+                ]
+            },
+        )
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _summarize(
+    scenario: str,
+    transport: str,
+    samples: list[tuple[float, int, int]],
+    elapsed: float,
+) -> Result:
+    latencies = [latency * 1000 for latency, _, _ in samples]
+    queries = [count for _, _, count in samples]
+    return Result(
+        scenario=scenario,
+        transport=transport,
+        requests=len(samples),
+        errors=sum(1 for _, status, _ in samples if status >= 400),
+        throughput=len(samples) / elapsed if elapsed else 0.0,
+        p50_ms=statistics.median(latencies),
+        p95_ms=_percentile(latencies, 0.95),
+        p99_ms=_percentile(latencies, 0.99),
+        queries_mean=statistics.fmean(queries),
+        queries_max=max(queries),
+    )
+
+
+async def _run_asgi(
+    app, factory: Callable[[], Request], count: int, concurrency: int
+) -> tuple[list[tuple[float, int, int]], float]:
+    import httpx
+
+    samples: list[tuple[float, int, int]] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        remaining = iter(range(count))
+
+        async def worker() -> None:
+            for _ in remaining:
+                request = factory()
+                started = time.perf_counter()
+                response = await client.request(
+                    request.method,
+                    request.path,
+                    params=request.params,
+                    content=request.body(),
+                    headers=request.all_headers(),
+                )
+                await response.aread()
+                samples.append(
+                    (
+                        time.perf_counter() - started,
+                        response.status_code,
+                        int(response.headers.get("x-query-count", 0)),
+                    )
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return samples, time.perf_counter() - started
+
+
+def _run_mangum(
+    handler, factory: Callable[[], Request], count: int
+) -> tuple[list[tuple[float, int, int]], float]:
+    from benchmarks.events import LAMBDA_CONTEXT, api_gateway_event
+
+    # Lambdaは1インスタンス1リクエストずつ処理するため逐次実行
+    # Mangumはカレントのイベントループを使うが、asyncio.run() の後は未設定になる
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    samples: list[tuple[float, int, int]] = []
+    started = time.perf_counter()
+    for _ in range(count):
+        request = factory()
+        event = api_gateway_event(
+            request.method,
+            request.path,
+            urlencode(request.params),
+            request.all_headers(),
+            request.body(),
+        )
+        request_started = time.perf_counter()
+        response = handler(event, LAMBDA_CONTEXT)
+        headers = {key.lower(): value for key, value in response["headers"].items()}
+        samples.append(
+            (
+                time.perf_counter() - request_started,
+                response["statusCode"],
+                int(headers.get("x-query-count", 0)),
+            )
+        )
+    return samples, time.perf_counter() - started
+
+
+def run(args: argparse.Namespace) -> list[Result]:
+    # 設定はインポート時に読み込まれるため、appより先に環境変数を決める
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("ENVIRONMENT", "development")
+    # 予算は実質無制限にして、X-Query-Count ヘッダーだけを利用する
+    os.environ["QUERY_BUDGET"] = str(10**9)
+    os.environ["CACHE_ENABLED"] = "false" if args.no_cache else "true"
+
+    from app.db.session import get_engine
+    from app.main import app, handler
+    from benchmarks.seed import SeedConfig, seed
+
+    # 削除系のシナリオは1リクエストごとに1行を消費するため、その分を別に投入する
+    warmup = min(args.warmup, args.requests)
+    deletes = args.scenario is None or any(
+        name in Scenarios.DELETE_SCENARIOS for name in args.scenario
+    )
+    deletable = (args.requests + warmup) * len(args.transport) if deletes else 0
+
+    data = seed(
+        get_engine(),
+        SeedConfig(
+            items=args.items,
+            lists=args.lists,
+            locations_per_list=args.locations_per_list,
+            deletable=deletable,
+            seed=args.seed,
+        ),
+        reset=args.reset,
+    )
+    scenarios = Scenarios(data, random.Random(args.seed)).all()
+    selected = args.scenario or list(scenarios)
+
+    results: list[Result] = []
+    for transport in args.transport:
+        for name in selected:
+            factory = scenarios[name]
+            # ウォームアップ（接続確立・TypeAdapter構築など）は集計から除く
+            if transport == "asgi":
+                asyncio.run(_run_asgi(app, factory, warmup, 1))
+                samples, elapsed = asyncio.run(
+                    _run_asgi(app, factory, args.requests, args.concurrency)
+                )
+            else:
+                _run_mangum(handler, factory, warmup)
+                samples, elapsed = _run_mangum(handler, factory, args.requests)
+            result = _summarize(name, transport, samples, elapsed)
+            results.append(result)
+            _print_result(result)
+    return results
+
+
+def _print_header() -> None:
+    print(
+        f"{'scenario':22}{'transport':>10}{'req/s':>9}{'p50':>9}{'p95':>9}"
+        f"{'p99':>9}{'queries':>9}{'errors':>8}"
+    )
+
+
+def _print_result(result: Result) -> None:
+    print(
+        f"{result.scenario:22}{result.transport:>10}{result.throughput:>9.0f}"
+        f"{result.p50_ms:>7.2f}ms{result.p95_ms:>7.2f}ms{result.p99_ms:>7.2f}ms"
+        f"{result.queries_mean:>9.1f}{result.errors:>8}"
+    )
+
+
+def compare(
+    results: list[Result],
+    baseline: dict[str, dict[str, Any]],
+    tolerance: float,
+    min_delta_ms: float,
+) -> list[str]:
+    """Return a description of every regression against the baseline."""
+    regressions = []
+    for result in results:
+        key = f"{result.transport}:{result.scenario}"
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result.queries_mean > base["queries_mean"] + 0.01:
+            regressions.append(
+                f"{key}: queries/request {base['queries_mean']:.2f} "
+                f"-> {result.queries_mean:.2f}"
+            )
+        limit = max(base["p95_ms"] * (1 + tolerance), base["p95_ms"] + min_delta_ms)
+        if result.p95_ms > limit:
+            regressions.append(
+                f"{key}: p95 {base['p95_ms']:.2f}ms -> {result.p95_ms:.2f}ms"
+            )
+        if result.errors > base["errors"]:
+            regressions.append(f"{key}: errors {base['errors']} -> {result.errors}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API benchmark / load test")
+    parser.add_argument("--database-url", help="default: temporary SQLite")
+    parser.add_argument(
+        "--reset", action="store_true", help="drop and recreate tables first"
+    )
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--lists", type=int, default=200)
+    parser.add_argument("--locations-per-list", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument(
+        "--concurrency", type=int, default=1, help="concurrent ASGI requests"
+    )
+    parser.add_argument(
+        "--transport", nargs="+", choices=TRANSPORTS, default=list(TRANSPORTS)
+    )
+    parser.add_argument("--scenario", nargs="+", help="default: all scenarios")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.database_url is None:
+            args.database_url = f"sqlite:///{tmp}/benchmark.db"
+        _print_header()
+        results = run(args)
+
+    payload = {
+        f"{result.transport}:{result.scenario}": asdict(result) for result in results
+    }
+    if args.output:
+        args.output.write_text(json.dumps(payload, indent=2))
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"\nBaseline saved to {path}")
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against baseline '{args.compare}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Lambda cold-start benchmark.
+
+Each run starts a fresh interpreter, imports ``app.main`` and sends API Gateway
+(HTTP API v2) events straight to the Mangum ``handler``, the same way the
+Lambda runtime does. Reported per run:
+
+- import: time to import ``app.main`` (Lambda init phase)
+- first: time for the first handler call (first request on a new instance)
+- warm: time for a second call to the same path
+
+Usage (from backend/):
+
+    python -m benchmarks.cold_start --runs 10 --path /api/v1/items
+    python -m benchmarks.cold_start --compare   # DB_LAZY_INIT=true vs false
+
+DATABASE_URL / ENVIRONMENT are taken from the environment. Without DATABASE_URL
+a temporary SQLite database is used, so the numbers exclude network latency to
+the database and Secrets Manager.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# 子プロセス側で実行する計測コード
+_CHILD = """
+import json, sys, time
+
+path = sys.argv[1]
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+
+from benchmarks.events import LAMBDA_CONTEXT, api_gateway_event
+
+first = app.main.handler(api_gateway_event("GET", path), LAMBDA_CONTEXT)
+t2 = time.perf_counter()
+app.main.handler(api_gateway_event("GET", path), LAMBDA_CONTEXT)
+t3 = time.perf_counter()
+
+print(json.dumps({
+    "status": first["statusCode"],
+    "import": t1 - t0,
+    "first": t2 - t1,
+    "warm": t3 - t2,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def run_once(path: str, env: dict[str, str]) -> dict[str, float]:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHILD, path],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    # インタプリタ起動を含むプロセス全体の時間
+    result["process"] = time.perf_counter() - started
+    return result
+
+
+def summarize(label: str, results: list[dict[str, float]]) -> None:
+    print(f"\n{label} ({len(results)} runs, status {results[0]['status']})")
+    print(f"{'':10}{'median':>10}{'p90':>10}{'max':>10}")
+    for key in ("import", "first", "warm", "process"):
+        values = sorted(r[key] * 1000 for r in results)
+        p90 = values[min(len(values) - 1, int(len(values) * 0.9))]
+        print(
+            f"{key:10}{statistics.median(values):>9.1f}ms"
+            f"{p90:>9.1f}ms{values[-1]:>9.1f}ms"
+        )
+    print(f"modules loaded: {int(results[0]['modules'])}")
+
+
+def benchmark(path: str, runs: int, overrides: dict[str, str]) -> list[dict]:
+    env = {**os.environ, **overrides}
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(BACKEND_DIR), env.get("PYTHONPATH")) if p
+    )
+    # 1回目はディスクキャッシュ・.pyc生成の影響を除くため捨てる
+    run_once(path, env)
+    return [run_once(path, env) for _ in range(runs)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/api/v1/items")
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="run with DB_LAZY_INIT=true and DB_LAZY_INIT=false",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        defaults: dict[str, str] = {}
+        if "DATABASE_URL" not in os.environ:
+            defaults["DATABASE_URL"] = f"sqlite:///{tmp}/cold_start.db"
+            defaults.setdefault("ENVIRONMENT", "development")
+
+        modes = ["true", "false"] if args.compare else [None]
+        for mode in modes:
+            overrides = dict(defaults)
+            if mode is not None:
+                overrides["DB_LAZY_INIT"] = mode
+            results = benchmark(args.path, args.runs, overrides)
+            label = f"GET {args.path}"
+            if mode is not None:
+                label += f" DB_LAZY_INIT={mode}"
+            summarize(label, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Synthetic API Gateway (HTTP API v2) events for driving the Mangum handler."""
+
+import base64
+from types import SimpleNamespace
+from typing import Any
+
+LAMBDA_CONTEXT = SimpleNamespace(function_name="benchmark")
+
+
+def api_gateway_event(
+    method: str,
+    path: str,
+    query_string: str = "",
+    headers: dict[str, str] | None = None,
+    body: bytes | None = None,
+) -> dict[str, Any]:
+    """Build an HTTP API v2 event the way API Gateway passes it to Lambda."""
+    event_headers = {"host": "localhost", "x-forwarded-proto": "https"}
+    event_headers.update({key.lower(): value for key, value in (headers or {}).items()})
+    event: dict[str, Any] = {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": query_string,
+        "headers": event_headers,
+        "requestContext": {
+            "http": {
+                "method": method,
+                "path": path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": "127.0.0.1",
+            },
+            "stage": "$default",
+        },
+        "isBase64Encoded": False,
+    }
+    if body:
+        event["body"] = base64.b64encode(body).decode()
+        event["isBase64Encoded"] = True
+    return event
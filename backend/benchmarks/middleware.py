@@ -0,0 +1,119 @@
+"""
+Middleware overhead micro-benchmark.
+
+Calls a trivial ASGI endpoint directly (no HTTP client, no router) through:
+
+- none: the endpoint alone (baseline)
+- base_http: the previous BaseHTTPMiddleware-based CloudFront check
+- asgi: app.middleware.CloudFrontValidationMiddleware
+
+for requests carrying the right secret and for rejected ones, and reports
+the time per request and the overhead over the bare endpoint.
+
+Usage (from backend/):
+
+    python -m benchmarks.middleware --requests 20000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from fastapi import HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.exceptions import ExceptionMiddleware
+
+from app.middleware import CloudFrontValidationMiddleware
+
+SECRET = "benchmark-secret"
+
+
+class BaseHTTPCloudFrontMiddleware(BaseHTTPMiddleware):
+    """以前の実装（比較用）。環境変数をリクエストごとに読み、== で比較する"""
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if path.startswith("/api/health") or path == "/api/metrics":
+            return await call_next(request)
+        if request.headers.get("X-Warmup") == "true":
+            return await call_next(request)
+        expected_secret = os.getenv("CLOUDFRONT_SECRET")
+        actual_secret = request.headers.get("X-CloudFront-Secret")
+        if expected_secret and actual_secret != expected_secret:
+            raise HTTPException(status_code=403, detail="Direct access not allowed.")
+        return await call_next(request)
+
+
+async def endpoint(scope, receive, send) -> None:
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+def _scope(secret: str | None) -> dict:
+    headers = [(b"host", b"bench")]
+    if secret is not None:
+        headers.append((b"x-cloudfront-secret", secret.encode()))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "https",
+        "path": "/api/v1/items",
+        "raw_path": b"/api/v1/items",
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 443),
+    }
+
+
+async def _run(app, scope: dict, count: int) -> tuple[float, int]:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    for _ in range(min(count, 500)):  # ウォームアップ
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(count):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / count, status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="middleware overhead benchmark")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    os.environ["CLOUDFRONT_SECRET"] = SECRET
+    stacks = {
+        # 実アプリではこの例外は500になっていたため、比較用に外側で403に変換する
+        "base_http": ExceptionMiddleware(BaseHTTPCloudFrontMiddleware(endpoint)),
+        "asgi": CloudFrontValidationMiddleware(endpoint, secret=SECRET),
+    }
+    cases = {"allowed": _scope(SECRET), "rejected": _scope("wrong")}
+
+    # 素のエンドポイントの時間を基準に、ミドルウェアによる増分を求める
+    baseline, _ = asyncio.run(_run(endpoint, cases["allowed"], args.requests))
+    print(f"{'stack':12}{'case':10}{'status':>8}{'per request':>14}{'overhead':>12}")
+    print(f"{'none':12}{'allowed':10}{200:>8}{baseline * 1e6:>12.1f}us")
+    for case, scope in cases.items():
+        for name, app in stacks.items():
+            per_request, status = asyncio.run(_run(app, scope, args.requests))
+            print(
+                f"{name:12}{case:10}{status:>8}{per_request * 1e6:>12.1f}us"
+                f"{(per_request - baseline) * 1e6:>+10.1f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Seed the benchmark database with Items, MyLists and Locations."""
+
+import random
+from dataclasses import dataclass, field
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.geo import geohash_encode
+from app.crud.my_lists import refresh_list_summaries
+from app.db.models import Base, Item, Location, MyList
+
+# 座標は東京周辺に分布させる（範囲検索・近傍検索のシナリオ用）
+LAT_RANGE = (35.5, 35.9)
+LNG_RANGE = (139.5, 139.9)
+
+_CHUNK_SIZE = 1000
+
+
+@dataclass
+class SeedConfig:
+    items: int = 2000
+    lists: int = 200
+    locations_per_list: int = 20
+    # 削除系のシナリオ専用に追加で作る Item・MyList（地点付き）の数
+    deletable: int = 0
+    seed: int = 42
+
+
+@dataclass
+class SeedData:
+    """IDs created by seed(), used to build requests."""
+
+    item_ids: list[int] = field(default_factory=list)
+    list_ids: list[int] = field(default_factory=list)
+    # list_id -> 並び順どおりの location_id
+    location_ids: dict[int, list[int]] = field(default_factory=dict)
+    # 削除系のシナリオで1回ずつ使うID（item_ids / list_ids には含まない）
+    deletable_item_ids: list[int] = field(default_factory=list)
+    deletable_list_ids: list[int] = field(default_factory=list)
+
+
+def _insert_chunked(engine: Engine, model, rows: list[dict]) -> None:
+    with engine.begin() as conn:
+        for start in range(0, len(rows), _CHUNK_SIZE):
+            conn.execute(insert(model), rows[start : start + _CHUNK_SIZE])
+
+
+def seed(engine: Engine, config: SeedConfig, reset: bool = False) -> SeedData:
+    """
+    Create the tables (dropping them first with `reset`) and insert the rows.
+    Rows are generated from `config.seed`, so every run sees the same data.
+    """
+    if reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(config.seed)
+
+    _insert_chunked(
+        engine,
+        Item,
+        [
+            {"title": f"Item {i}", "description": f"Seeded item {i}"}
+            for i in range(config.items + config.deletable)
+        ],
+    )
+    _insert_chunked(
+        engine,
+        MyList,
+        [
+            {"name": f"List {i}", "description": f"Seeded list {i}"}
+            for i in range(config.lists + config.deletable)
+        ],
+    )
+
+    with engine.connect() as conn:
+        item_ids = list(conn.scalars(select(Item.id).order_by(Item.id)))
+        list_ids = list(conn.scalars(select(MyList.id).order_by(MyList.id)))
+
+    # 今回追加した行は末尾にある（削除用はさらにその末尾）
+    seeded_lists = config.lists + config.deletable
+    locations = []
+    for list_id in list_ids[-seeded_lists:] if seeded_lists else []:
+        for index in range(config.locations_per_list):
+            lat = rng.uniform(*LAT_RANGE)
+            lng = rng.uniform(*LNG_RANGE)
+            locations.append(
+                {
+                    "my_list_id": list_id,
+                    "name": f"Place {list_id}-{index}",
+                    "address": f"{index} Benchmark St",
+                    "lat": lat,
+                    "lng": lng,
+                    "geohash": geohash_encode(lat, lng),
+                    "order_index": float(index),
+                }
+            )
+    _insert_chunked(engine, Location, locations)
+    # 一括投入は差分更新を通らないため、リストの集計値をまとめて求める
+    with Session(engine) as db:
+        refresh_list_summaries(db)
+        db.commit()
+
+    split_items = len(item_ids) - config.deletable
+    split_lists = len(list_ids) - config.deletable
+    data = SeedData(
+        item_ids=item_ids[:split_items],
+        list_ids=list_ids[:split_lists],
+        deletable_item_ids=item_ids[split_items:],
+        deletable_list_ids=list_ids[split_lists:],
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(Location.my_list_id, Location.id).order_by(
+                Location.my_list_id, Location.order_index, Location.id
+            )
+        )
+        for list_id, location_id in rows:
+            data.location_ids.setdefault(list_id, []).append(location_id)
+    return data
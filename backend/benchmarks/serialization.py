@@ -0,0 +1,116 @@
+"""
+Serialization benchmark for the my-lists page response.
+
+Compares, for one page of lists with their locations:
+
+- orm: ORM load (selectinload) + TypeAdapter validation from attributes + dump_json
+- records: Core select into dicts + app.core.fastjson.dumps
+- columnar: Core select into dicts + app.core.columnar.encode_my_lists
+
+The JSON paths are checked to produce byte-identical bodies, and the columnar
+body to decode back to the same page. Reported times are process CPU time per
+page; decode times compare json.loads with app.core.columnar.decode_my_lists.
+
+Usage (from backend/):
+
+    python -m benchmarks.serialization --lists 100 --locations-per-list 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def _measure(fn, rounds: int) -> list[float]:
+    fn()  # ウォームアップ
+    samples = []
+    for _ in range(rounds):
+        started = time.process_time()
+        fn()
+        samples.append(time.process_time() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="my-lists serialization benchmark")
+    parser.add_argument("--lists", type=int, default=100)
+    parser.add_argument("--locations-per-list", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/serialization.db"
+
+        from sqlalchemy.orm import Session
+
+        from app.core import columnar
+        from app.core.cache import serialize
+        from app.core.fastjson import dumps, orjson
+        from app.crud import my_lists as crud
+        from app.db.session import get_engine
+        from app.schemas.my_list import MyListResponse
+        from benchmarks.seed import SeedConfig, seed
+
+        engine = get_engine()
+        seed(
+            engine,
+            SeedConfig(
+                items=0, lists=args.lists, locations_per_list=args.locations_per_list
+            ),
+        )
+
+        def orm_page() -> bytes:
+            with Session(engine) as db:
+                lists = crud.list_my_lists(db, 0, args.lists)
+                return serialize(list[MyListResponse], lists)
+
+        def records_page() -> bytes:
+            with Session(engine) as db:
+                return dumps(crud.list_my_list_records(db, 0, args.lists))
+
+        def columnar_page() -> bytes:
+            with Session(engine) as db:
+                return columnar.encode_my_lists(
+                    crud.list_my_list_records(db, 0, args.lists)
+                )
+
+        orm_body = orm_page()
+        records_body = records_page()
+        if json.loads(orm_body) != json.loads(records_body):
+            raise SystemExit("records path does not match the schema output")
+        identical = orm_body == records_body
+        columnar_body = columnar_page()
+        if json.loads(dumps(columnar.decode_my_lists(columnar_body))) != json.loads(
+            records_body
+        ):
+            raise SystemExit("columnar body does not decode to the same page")
+
+        encoder = "orjson" if orjson is not None else "json"
+        print(
+            f"{args.lists} lists x {args.locations_per_list} locations, "
+            f"{len(records_body) / 1024:.0f} KiB, encoder={encoder}, "
+            f"byte-identical={identical}, "
+            f"columnar {len(columnar_body) / 1024:.0f} KiB"
+        )
+        results = {}
+        for name, fn in (
+            ("orm", orm_page),
+            ("records", records_page),
+            ("columnar", columnar_page),
+            ("json-load", lambda: json.loads(records_body)),
+            ("col-load", lambda: columnar.decode_my_lists(columnar_body)),
+        ):
+            samples = _measure(fn, args.rounds)
+            results[name] = statistics.median(samples)
+            print(
+                f"{name:10}{results[name] * 1000:>9.1f}ms median"
+                f"{min(samples) * 1000:>9.1f}ms min"
+            )
+        print(f"speedup: {results['orm'] / results['records']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+# 設定はインポート時に読み込まれるため、app より先に環境変数を設定する。
+# 1接続のプール（Lambdaと同じ構成）で、1リクエストが2接続を待つ
+# デッドロックをタイムアウトとして検出する
+_db_dir = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ["ENVIRONMENT"] = "development"
+os.environ["DB_POOL_MODE"] = "single"
+os.environ["DB_POOL_TIMEOUT_SECONDS"] = "2"
+# 共有バックエンド（Redisの代替）を使い、レスポンスキャッシュを有効にする
+os.environ["CACHE_BACKEND"] = "memory"
+# 予算は実質無制限にして、X-Query-Count ヘッダーだけを利用する
+os.environ["QUERY_BUDGET"] = str(10**9)
+os.environ.pop("DATABASE_REPLICA_URL", None)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+LISTS = "/api/v1/my-lists"
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_list(client):
+    """Create a list with locations at the given (lat, lng) points."""
+
+    def make(points=(), name="list"):
+        my_list = client.post(LISTS, json={"name": name}).json()
+        ids = [
+            client.post(
+                f"{LISTS}/{my_list['id']}/locations",
+                json={"name": f"p{i}", "address": "a", "lat": lat, "lng": lng},
+            ).json()["id"]
+            for i, (lat, lng) in enumerate(points)
+        ]
+        return my_list["id"], ids
+
+    return make
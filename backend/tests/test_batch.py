@@ -0,0 +1,106 @@
+from tests.conftest import LISTS
+
+BATCH = "/api/v1/batch"
+
+
+def _location(name):
+    return {"name": name, "address": "a", "lat": 35.0, "lng": 139.0}
+
+
+def _names(client, list_id):
+    response = client.get(f"{LISTS}/{list_id}")
+    return [location["name"] for location in response.json()["locations"]]
+
+
+def test_batch_with_refs(client):
+    operations = [
+        {"op": "create_list", "ref": "L", "data": {"name": "trip"}},
+        *(
+            {
+                "op": "add_location",
+                "ref": f"p{i}",
+                "list_id": "L",
+                "data": _location(f"p{i}"),
+            }
+            for i in range(4)
+        ),
+        {"op": "update_list", "list_id": "L", "data": {"name": "trip 2"}},
+        {"op": "move_location", "list_id": "L", "location_id": "p3", "after_id": "p0"},
+        {"op": "remove_location", "list_id": "L", "location_id": "p1"},
+    ]
+    response = client.post(BATCH, json={"operations": operations})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["committed"] is True
+    assert [result["status"] for result in body["results"]] == [
+        201,
+        201,
+        201,
+        201,
+        201,
+        200,
+        200,
+        204,
+    ]
+    (my_list,) = body["lists"]
+    assert my_list["name"] == "trip 2"
+    assert [x["name"] for x in my_list["locations"]] == ["p0", "p3", "p2"]
+    assert _names(client, my_list["id"]) == ["p0", "p3", "p2"]
+
+
+def test_failed_operation_rolls_back_everything(client, make_list):
+    list_id, ids = make_list([(35.0, 139.0)], name="before")
+    before = _names(client, list_id)
+
+    operations = [
+        {"op": "add_location", "list_id": list_id, "data": _location("x")},
+        {"op": "update_list", "list_id": list_id, "data": {"name": "after"}},
+        {"op": "remove_location", "list_id": list_id, "location_id": 999_999},
+        {"op": "remove_location", "list_id": list_id, "location_id": ids[0]},
+    ]
+    response = client.post(BATCH, json={"operations": operations})
+
+    # 失敗した操作のステータスが全体のステータスになり、他はすべて 424
+    assert response.status_code == 404
+    body = response.json()
+    assert body["committed"] is False
+    assert body["lists"] == []
+    results = body["results"]
+    assert [result["status"] for result in results] == [424, 424, 404, 424]
+    assert [result["error"] for result in results] == [
+        "Rolled back",
+        "Rolled back",
+        "Location not found",
+        "Not run",
+    ]
+    assert all(result["id"] is None for result in results)
+
+    assert client.get(f"{LISTS}/{list_id}").json()["name"] == "before"
+    assert _names(client, list_id) == before
+
+
+def test_unknown_ref_fails_the_batch(client):
+    operations = [
+        {"op": "create_list", "ref": "L", "data": {"name": "never saved"}},
+        {"op": "delete_list", "list_id": "missing"},
+    ]
+    response = client.post(BATCH, json={"operations": operations})
+    assert response.status_code == 400
+    assert [result["status"] for result in response.json()["results"]] == [424, 400]
+    names = [x["name"] for x in client.get(LISTS, params={"limit": 10_000}).json()]
+    assert "never saved" not in names
+
+
+def test_batch_validation(client):
+    assert client.post(BATCH, json={"operations": []}).status_code == 422
+    assert client.post(BATCH, json={"operations": [{"op": "bogus"}]}).status_code == 422
+
+
+def test_batch_delete_list(client, make_list):
+    list_id, _ = make_list([(35.0, 139.0)])
+    response = client.post(
+        BATCH, json={"operations": [{"op": "delete_list", "list_id": list_id}]}
+    )
+    assert response.status_code == 200
+    assert response.json()["lists"] == []
+    assert client.get(f"{LISTS}/{list_id}").status_code == 404
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+
+from app.core import cache
+from app.core.cache import (
+    CachedResponse,
+    InMemorySharedCache,
+    ResponseCache,
+    response_cache,
+)
+from tests.conftest import LISTS
+
+ITEMS = "/api/v1/items"
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def _get(cache_, namespace, key):
+    slot = await cache_.lookup(namespace, key)
+    return slot.value.body if slot.value is not None else None
+
+
+async def _put(cache_, namespace, key, body):
+    slot = await cache_.lookup(namespace, key)
+    slot.store(CachedResponse(body))
+    await slot.save()
+
+
+def test_invalidate_only_touches_its_namespace():
+    async def scenario():
+        cache_ = ResponseCache()
+        await _put(cache_, "items", "page", b"items")
+        await _put(cache_, "my_lists", "page", b"lists")
+
+        await cache_.invalidate("items")
+        assert await _get(cache_, "items", "page") is None
+        assert await _get(cache_, "my_lists", "page") == b"lists"
+
+    _run(scenario())
+
+
+def test_store_after_invalidation_keeps_old_generation():
+    async def scenario():
+        cache_ = ResponseCache()
+        # 読み込み中に書き込みがあっても、古い内容は新しい世代に保存されない
+        slot = await cache_.lookup("items", "page")
+        await cache_.invalidate("items")
+        slot.store(CachedResponse(b"stale"))
+        await slot.save()
+        assert await _get(cache_, "items", "page") is None
+
+    _run(scenario())
+
+
+def test_shared_backend_invalidates_other_instances():
+    async def scenario():
+        first = ResponseCache(shared=InMemorySharedCache("test-shared"))
+        second = ResponseCache(shared=InMemorySharedCache("test-shared"))
+        await _put(first, "items", "page", b"v1")
+        assert await _get(second, "items", "page") == b"v1"
+
+        await second.invalidate("items")
+        assert await _get(first, "items", "page") is None
+
+    _run(scenario())
+
+
+def test_bypass_and_disabled():
+    async def scenario():
+        cache_ = ResponseCache()
+        await _put(cache_, "items", "page", b"v1")
+        slot = await cache_.lookup("items", "page", bypass=True)
+        assert slot.value is None
+        slot.store(CachedResponse(b"v2"))
+        await slot.save()
+        assert await _get(cache_, "items", "page") == b"v1"
+
+        disabled = ResponseCache(enabled=False)
+        await _put(disabled, "items", "page", b"v1")
+        assert await _get(disabled, "items", "page") is None
+
+    _run(scenario())
+
+
+def test_enabled_by_default_only_with_shared_backend(monkeypatch, caplog):
+    monkeypatch.setattr(cache.settings, "CACHE_ENABLED", None)
+    assert cache._cache_enabled(None) is False
+    assert cache._cache_enabled(InMemorySharedCache("test-default")) is True
+
+    monkeypatch.setattr(cache.settings, "CACHE_ENABLED", True)
+    monkeypatch.setattr(cache.settings, "ENVIRONMENT", "prod")
+    with caplog.at_level(logging.WARNING, logger=cache.__name__):
+        assert cache._cache_enabled(None) is True
+    assert "local backend" in caplog.text
+
+
+def _queries(response) -> int:
+    assert response.status_code == 200, response.text
+    return int(response.headers["x-query-count"])
+
+
+def test_api_writes_invalidate_their_namespace(client, make_list):
+    list_id, _ = make_list([(35.0, 139.0)])
+    list_url = f"{LISTS}/{list_id}"
+    item_id = client.post(ITEMS, json={"title": "cached"}).json()["id"]
+    item_url = f"{ITEMS}/{item_id}"
+    assert response_cache.enabled
+
+    client.get(list_url)
+    client.get(item_url)
+    assert _queries(client.get(list_url)) == 0
+    assert _queries(client.get(item_url)) == 0
+
+    # itemsへの書き込みはリストのキャッシュを残す
+    client.put(item_url, json={"title": "changed"})
+    assert _queries(client.get(list_url)) == 0
+    assert client.get(item_url).json()["title"] == "changed"
+
+    # 地点の書き込みはリストの名前空間を無効化し、itemsは残す
+    client.post(
+        f"{list_url}/locations",
+        json={"name": "new", "address": "a", "lat": 35.1, "lng": 139.1},
+    )
+    assert _queries(client.get(item_url)) == 0
+    response = client.get(list_url)
+    assert _queries(response) > 0
+    assert [location["name"] for location in response.json()["locations"]][-1] == "new"
+
+
+def test_api_batch_invalidates_lists(client, make_list):
+    list_id, _ = make_list()
+    url = f"{LISTS}/{list_id}"
+    client.get(url)
+    assert _queries(client.get(url)) == 0
+
+    response = client.post(
+        "/api/v1/batch",
+        json={
+            "operations": [
+                {"op": "update_list", "list_id": list_id, "data": {"name": "batched"}}
+            ]
+        },
+    )
+    assert response.status_code == 200
+    assert client.get(url).json()["name"] == "batched"
@@ -0,0 +1,158 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from app.core.clustering import MAX_CLUSTER_ZOOM, MarkerIndex
+from app.crud import clusters
+from tests.conftest import LISTS
+
+VIEWPORT = (30.0, 130.0, 40.0, 150.0)
+
+
+def _canonical(result):
+    return result["total"], sorted(
+        (round(x["lat"], 9), round(x["lng"], 9), x["count"], x["location_id"])
+        for x in result["clusters"]
+    )
+
+
+def _points(rng, ids, list_ids):
+    return (
+        ids,
+        list_ids,
+        [rng.uniform(34, 36) for _ in ids],
+        [rng.uniform(138, 141) for _ in ids],
+    )
+
+
+def test_incremental_apply_matches_rebuild():
+    rng = random.Random(5)
+    ids = list(range(1, 201))
+    ids, list_ids, lats, lngs = _points(rng, ids, [i % 3 for i in ids])
+    index = MarkerIndex()
+    index.reset(1, ids, list_ids, lats, lngs)
+    # 格子を作ってから差分を反映する
+    for list_id in (None, 0, 1):
+        index.clusters(8, *VIEWPORT, list_id, 300)
+
+    # 移動・追加・削除・リストの削除
+    moved, _, moved_lats, moved_lngs = _points(rng, ids[:20], list_ids[:20])
+    added = list(range(201, 231))
+    upserts = (
+        moved + added,
+        list_ids[:20] + [1] * len(added),
+        moved_lats + [rng.uniform(34, 36) for _ in added],
+        moved_lngs + [rng.uniform(138, 141) for _ in added],
+    )
+    assert index.apply(1, 2, ids[20:40], [2], *upserts)
+    assert not index.apply(1, 3, [], [], [], [], [], [])
+
+    points = {
+        i: (list_id, lat, lng)
+        for i, list_id, lat, lng in zip(ids, list_ids, lats, lngs, strict=True)
+        if i not in ids[20:40] and list_id != 2
+    }
+    points.update(
+        (i, (list_id, lat, lng)) for i, list_id, lat, lng in zip(*upserts, strict=True)
+    )
+    rebuilt = MarkerIndex()
+    rebuilt.reset(
+        2,
+        list(points),
+        *(list(column) for column in zip(*points.values(), strict=True)),
+    )
+
+    assert index.token == 2
+    assert np.array_equal(index.ids, rebuilt.ids)
+    for zoom in (0, 4, 8, 12, MAX_CLUSTER_ZOOM, MAX_CLUSTER_ZOOM + 2):
+        for list_id in (None, 0, 1, 2):
+            assert _canonical(
+                index.clusters(zoom, *VIEWPORT, list_id, 300)
+            ) == _canonical(rebuilt.clusters(zoom, *VIEWPORT, list_id, 300))
+
+
+def test_clusters_count_every_location():
+    rng = random.Random(6)
+    index = MarkerIndex()
+    index.reset(1, *_points(rng, list(range(1, 501)), [1] * 500))
+
+    for zoom in range(MAX_CLUSTER_ZOOM + 1):
+        result = index.clusters(zoom, -85.0, -180.0, 85.0, 180.0, None, 2000)
+        assert result["total"] == 500
+        assert sum(x["count"] for x in result["clusters"]) == 500
+
+    coarse = index.clusters(12, *VIEWPORT, None, 5)
+    assert len(coarse["clusters"]) <= 5
+    assert coarse["zoom"] < 12
+
+
+def test_antimeridian_viewport():
+    index = MarkerIndex()
+    index.reset(1, [1, 2, 3], [1, 1, 1], [0.0, 0.0, 0.0], [179.5, -179.5, 0.0])
+
+    result = index.clusters(MAX_CLUSTER_ZOOM + 1, -1.0, 179.0, 1.0, -179.0, None, 10)
+    assert sorted(x["location_id"] for x in result["clusters"]) == [1, 2]
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(clusters, "marker_index", MarkerIndex())
+
+
+def test_api_clusters_follow_changes(client, fresh_index, make_list, monkeypatch):
+    rng = random.Random(3)
+
+    def point():
+        return (rng.uniform(34, 36), rng.uniform(138, 141))
+
+    lists = [make_list([point() for _ in range(20)], name=f"L{i}") for i in range(3)]
+
+    def query(**params):
+        response = client.get(
+            "/api/v1/locations/clusters",
+            params={
+                "zoom": 8,
+                "min_lat": 30,
+                "min_lng": 130,
+                "max_lat": 40,
+                "max_lng": 150,
+                **params,
+            },
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    (first, first_ids), (second, second_ids), (third, _) = lists
+    before = query(list_id=first)["total"]
+    assert before == 20
+
+    body = "\n".join(
+        json.dumps({"name": "p", "address": "a", "lat": lat, "lng": lng})
+        for lat, lng in (point() for _ in range(15))
+    )
+    client.post(
+        f"{LISTS}/{second}/locations/import",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    client.delete(f"{LISTS}/{first}/locations/{first_ids[0]}")
+    client.delete(f"{LISTS}/{third}")
+    client.put(
+        f"{LISTS}/{second}/locations/reorder",
+        json={"location_ids": second_ids[::-1]},
+    )
+
+    incremental = {
+        (zoom, list_id): _canonical(query(zoom=zoom, list_id=list_id))
+        for zoom in (0, 8, 16, 18)
+        for list_id in (first, second, third)
+    }
+    assert incremental[(8, first)][0] == 19
+    assert incremental[(8, second)][0] == 35
+    assert incremental[(8, third)][0] == 0
+
+    monkeypatch.setattr(clusters, "marker_index", MarkerIndex())
+    for (zoom, list_id), expected in incremental.items():
+        assert _canonical(query(zoom=zoom, list_id=list_id)) == expected
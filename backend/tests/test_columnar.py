@@ -0,0 +1,122 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.columnar import (
+    LOCATION_COLUMNS,
+    MAGIC,
+    MEDIA_TYPE,
+    decode_my_lists,
+    encode_frame,
+    encode_my_lists,
+    iter_frames,
+    prefers_columnar,
+    rows,
+)
+from tests.conftest import LISTS
+
+
+def _my_list(list_id, locations):
+    return {
+        "id": list_id,
+        "name": f"list {list_id}",
+        "description": "",
+        "created_at": datetime(2024, 1, 2, 3, 4, 5, 678901),
+        "updated_at": datetime(2024, 5, 6, 7, 8, 9),
+        "locations": locations,
+    }
+
+
+def _location(location_id, list_id, place_id=None):
+    return {
+        "id": location_id,
+        "my_list_id": list_id,
+        "name": "東京駅",
+        "address": "Tokyo",
+        "lat": 35.681236,
+        "lng": 139.767125,
+        "place_id": place_id,
+        "order_index": 1.5,
+        "created_at": datetime(1969, 12, 31, 23, 59, 59, 1),
+    }
+
+
+def test_my_lists_round_trip():
+    lists = [
+        _my_list(1, [_location(10, 1, "ChIJ"), _location(11, 1)]),
+        _my_list(2, []),
+        _my_list(3, [_location(12, 3, "ChIJ")]),
+    ]
+
+    payload = encode_my_lists(lists)
+
+    assert payload.startswith(MAGIC)
+    assert decode_my_lists(payload) == lists
+
+
+def test_frame_shares_repeated_strings():
+    locations = [_location(i, 1) for i in range(100)]
+    single = encode_frame([("locations", LOCATION_COLUMNS, locations[:1])])
+    many = encode_frame([("locations", LOCATION_COLUMNS, locations)])
+
+    # 文字列は1フレームに1回だけ入り、行ごとに増えるのは固定長の列だけ
+    row_size = sum({"q": 8, "d": 8, "t": 8, "s": 4}[k] for _, k in LOCATION_COLUMNS)
+    assert len(many) - len(single) == 99 * row_size
+
+    (frame,) = iter_frames(MAGIC + many)
+    assert rows(frame["locations"]) == locations
+
+
+def test_iter_frames_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        list(iter_frames(b'{"id": 1}'))
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        (None, False),
+        ("*/*", False),
+        ("application/json", False),
+        (MEDIA_TYPE, True),
+        (f"{MEDIA_TYPE};q=0", False),
+        (f"application/json, {MEDIA_TYPE};q=0.5", False),
+        (f"{MEDIA_TYPE}, application/json;q=0.9", True),
+        (f"{MEDIA_TYPE};q=0.5, */*;q=0.1", True),
+    ],
+)
+def test_prefers_columnar(accept, expected):
+    assert prefers_columnar(accept) is expected
+
+
+def test_api_columnar_matches_json(client, make_list):
+    list_id, _ = make_list([(35.0, 139.0), (35.1, 139.1), (-33.9, 151.2)])
+
+    as_json = client.get(f"{LISTS}/{list_id}").json()
+    response = client.get(f"{LISTS}/{list_id}", headers={"Accept": MEDIA_TYPE})
+
+    assert response.headers["content-type"].startswith(MEDIA_TYPE)
+    (decoded,) = decode_my_lists(response.content)
+    assert decoded["id"] == list_id
+    assert [location["id"] for location in decoded["locations"]] == [
+        location["id"] for location in as_json["locations"]
+    ]
+    assert [(x["lat"], x["lng"]) for x in decoded["locations"]] == [
+        (x["lat"], x["lng"]) for x in as_json["locations"]
+    ]
+
+
+def test_api_columnar_export(client, make_list):
+    list_id, ids = make_list([(35.0 + i, 139.0) for i in range(3)], name="trip")
+    url = f"{LISTS}/{list_id}/export"
+
+    by_format = client.get(url, params={"format": "columnar"})
+    by_accept = client.get(url, headers={"Accept": MEDIA_TYPE})
+    for response in (by_format, by_accept):
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"].startswith(MEDIA_TYPE)
+        assert f"my-lists-{list_id}.columnar" in response.headers["content-disposition"]
+        (decoded,) = decode_my_lists(response.content)
+        assert (decoded["id"], decoded["name"]) == (list_id, "trip")
+        assert [location["id"] for location in decoded["locations"]] == ids
+    assert by_format.content == by_accept.content
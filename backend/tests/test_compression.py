@@ -0,0 +1,111 @@
+import gzip
+
+import pytest
+
+from app.core import compression
+from app.core.compression import encoded_etag, negotiate, strip_encoding_suffix
+from tests.conftest import LISTS
+
+
+@pytest.fixture
+def encodings(monkeypatch):
+    """Negotiate as if every codec were installed."""
+    monkeypatch.setattr(compression, "ENCODINGS", ("zstd", "br", "gzip"))
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("gzip, br, zstd", "zstd"),
+        ("zstd;q=0.5, gzip", "gzip"),
+        ("br;q=0, gzip;q=0.1", "gzip"),
+        ("*", "zstd"),
+        ("*;q=0.5, br;q=0", "zstd"),
+        ("gzip;q=0, *", "zstd"),
+        ("gzip;q=oops", None),
+    ],
+)
+def test_negotiate(encodings, accept_encoding, expected):
+    assert negotiate(accept_encoding) == expected
+
+
+def test_negotiate_skips_unavailable_codecs(monkeypatch):
+    monkeypatch.setattr(compression, "ENCODINGS", ("gzip",))
+    assert negotiate("zstd, br") is None
+    assert negotiate("zstd, gzip;q=0.1") == "gzip"
+
+
+def test_encoded_etag_round_trip():
+    for encoding in ("gzip", "br", "zstd"):
+        assert strip_encoding_suffix(encoded_etag('"abc"', encoding)) == '"abc"'
+    assert strip_encoding_suffix('"abc"') == '"abc"'
+    assert encoded_etag('W/"abc"', "gzip") == 'W/"abc-gzip"'
+
+
+def test_api_compression_and_etag(client, make_list):
+    list_id, _ = make_list([(35 + i / 100, 139.0) for i in range(40)], name="x" * 40)
+    url = f"{LISTS}/{list_id}"
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    # 2回目はキャッシュから同じ本文・ETagを返す
+    for _ in range(2):
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.num_bytes_downloaded < len(plain.content)
+        assert response.content == plain.content
+        assert response.headers["etag"] == encoded_etag(plain.headers["etag"], "gzip")
+
+    for etag in (plain.headers["etag"], response.headers["etag"]):
+        not_modified = client.get(
+            url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+
+def test_cache_compresses_only_the_negotiated_encoding(client, make_list, monkeypatch):
+    list_id, _ = make_list([(35 + i / 100, 139.0) for i in range(40)], name="x" * 40)
+    url = f"{LISTS}/{list_id}"
+    calls = []
+
+    def codec(name, encode):
+        def counted(body):
+            calls.append(name)
+            return encode(body)
+
+        return counted
+
+    codecs = {
+        # brotli がない環境でも動くよう、br は印を付けるだけにする
+        "br": codec("br", lambda body: b"br:" + body),
+        "gzip": codec("gzip", gzip.compress),
+    }
+    monkeypatch.setattr(compression, "_CODECS", codecs)
+    monkeypatch.setattr(compression, "ENCODINGS", ("br", "gzip"))
+
+    # ミス時は選ばれた符号化だけを圧縮する
+    client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert calls == ["gzip"]
+
+    # 別の符号化はヒット時に追加し、以降はキャッシュから返す
+    for _ in range(2):
+        response = client.get(url, headers={"Accept-Encoding": "br"})
+        assert response.headers["content-encoding"] == "br"
+        assert response.headers["x-query-count"] == "0"
+        assert response.content.startswith(b"br:")
+    client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert calls == ["gzip", "br"]
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert gzip.compress(response.content)  # 本文はそのまま読める
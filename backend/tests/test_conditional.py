@@ -0,0 +1,119 @@
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+
+from app.api.pagination import encode_cursor
+from tests.conftest import LISTS
+
+ITEMS = "/api/v1/items"
+
+
+def _location(i=0):
+    return {"name": f"p{i}", "address": "a", "lat": 35.0, "lng": 139.0}
+
+
+def test_my_list_etag_follows_location_writes(client, make_list):
+    list_id, ids = make_list([(35.0, 139.0)])
+    url = f"{LISTS}/{list_id}"
+    first = client.get(url)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # 地点の追加・削除はリストの updated_at を進める
+    for write in (
+        lambda: client.post(f"{url}/locations", json=_location(1)),
+        lambda: client.delete(f"{url}/locations/{ids[0]}"),
+    ):
+        write()
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        etag = response.headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_my_list_if_modified_since(client, make_list):
+    list_id, _ = make_list([(35.0, 139.0)])
+    url = f"{LISTS}/{list_id}"
+    last_modified = client.get(url).headers["last-modified"]
+
+    assert (
+        client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+    )
+    earlier = format_datetime(datetime.now(UTC) - timedelta(days=1), usegmt=True)
+    assert client.get(url, headers={"If-Modified-Since": earlier}).status_code == 200
+
+
+def test_my_lists_page_etag(client, make_list):
+    make_list(name="page etag")
+    etag = client.get(LISTS, params={"limit": 3}).headers["etag"]
+    assert (
+        client.get(
+            LISTS, params={"limit": 3}, headers={"If-None-Match": etag}
+        ).status_code
+        == 304
+    )
+
+    make_list(name="newest")
+    response = client.get(LISTS, params={"limit": 3}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == "newest"
+
+
+def _items_page(client, titles):
+    """Create items and return the cursor params of a page holding just them."""
+    ids = [client.post(ITEMS, json={"title": title}).json()["id"] for title in titles]
+    return ids, {"cursor": encode_cursor({"id": ids[0] - 1}), "limit": len(ids)}
+
+
+def test_items_page_not_modified_without_loading_it(client):
+    ids, params = _items_page(client, ["etag 0", "etag 1"])
+    first = client.get(ITEMS, params=params)
+    assert [item["id"] for item in first.json()] == ids
+    etag = first.headers["etag"]
+
+    # ページの外への追加は名前空間を無効化するが、ページのバージョンは変わらない
+    client.post(ITEMS, json={"title": "outside the page"})
+    response = client.get(ITEMS, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+    # 集計1行の問い合わせだけで判定し、ページは読み込まない
+    assert response.headers["x-query-count"] == "1"
+
+
+def test_items_page_etag_follows_writes(client):
+    ids, params = _items_page(client, ["page 0", "page 1", "page 2"])
+    etags = [client.get(ITEMS, params=params).headers["etag"]]
+
+    for write in (
+        lambda: client.put(f"{ITEMS}/{ids[1]}", json={"title": "updated"}),
+        lambda: client.delete(f"{ITEMS}/{ids[2]}"),
+        lambda: client.post(ITEMS, json={"title": "appended to the page"}),
+    ):
+        write()
+        response = client.get(
+            ITEMS, params=params, headers={"If-None-Match": etags[-1]}
+        )
+        assert response.status_code == 200
+        etags.append(response.headers["etag"])
+        # 本文から求めたETagと、集計の問い合わせから求めたETagが一致する
+        assert (
+            client.get(
+                ITEMS, params=params, headers={"If-None-Match": etags[-1]}
+            ).status_code
+            == 304
+        )
+    assert len(set(etags)) == len(etags)
+
+
+def test_item_etag(client):
+    item = client.post(ITEMS, json={"title": "single"}).json()
+    url = f"{ITEMS}/{item['id']}"
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(url, json={"title": "changed"})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "changed"
@@ -0,0 +1,69 @@
+import json
+
+from tests.conftest import LISTS
+
+
+def _lines(response):
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+# テストは1接続のプールで動くため、エクスポートが存在確認とストリーミングで
+# 2接続を必要とすると、ここでプールのタイムアウトになる
+def test_export_list_ndjson(client, make_list):
+    list_id, ids = make_list([(35.0 + i, 139.0) for i in range(3)], name="trip")
+
+    response = client.get(f"{LISTS}/{list_id}/export")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert f"my-lists-{list_id}.ndjson" in response.headers["content-disposition"]
+    lines = _lines(response)
+    assert (lines[0]["type"], lines[0]["id"], lines[0]["name"]) == (
+        "list",
+        list_id,
+        "trip",
+    )
+    assert [line["type"] for line in lines[1:]] == ["location"] * 3
+    assert [line["id"] for line in lines[1:]] == ids
+
+
+def test_export_list_geojson(client, make_list):
+    list_id, ids = make_list([(35.0 + i, 139.0) for i in range(3)], name="trip")
+
+    response = client.get(f"{LISTS}/{list_id}/export", params={"format": "geojson"})
+    assert response.status_code == 200
+    collection = response.json()
+    assert collection["type"] == "FeatureCollection"
+    features = collection["features"]
+    assert [feature["id"] for feature in features] == ids
+    assert features[2]["geometry"] == {"type": "Point", "coordinates": [139.0, 37.0]}
+    assert features[0]["properties"]["list_name"] == "trip"
+
+
+def test_export_missing_list(client):
+    assert client.get(f"{LISTS}/999999/export").status_code == 404
+    # 404 の後もプールの接続が戻っている
+    assert client.get(f"{LISTS}/999999/export").status_code == 404
+    assert client.get("/api/v1/items").status_code == 200
+
+
+def test_export_all_lists(client, make_list):
+    first, first_ids = make_list([(35.0, 139.0)] * 2)
+    second, second_ids = make_list([(36.0, 140.0)])
+
+    lines = _lines(client.get(f"{LISTS}/export"))
+    lists = [line["id"] for line in lines if line["type"] == "list"]
+    assert {first, second} <= set(lists)
+
+    def exported(list_id):
+        return [
+            line["id"]
+            for line in lines
+            if line["type"] == "location" and line["my_list_id"] == list_id
+        ]
+
+    assert exported(first) == first_ids
+    assert exported(second) == second_ids
+
+
+def test_export_rejects_unknown_format(client):
+    assert client.get(f"{LISTS}/export", params={"format": "csv"}).status_code == 422
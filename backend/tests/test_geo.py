@@ -0,0 +1,158 @@
+import random
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.geo import (
+    bbox_around,
+    bbox_geohash_ranges,
+    geohash_encode,
+    haversine_m,
+)
+from app.db.backfill_geohash import backfill_geohashes
+from app.db.models import Location
+from app.db.session import get_engine
+
+# 経度 170..-170（日付変更線を跨ぐ）と東京付近に散らばった点
+_RANDOM = random.Random(7)
+POINTS = [
+    (_RANDOM.uniform(-20, 20), _RANDOM.choice((1, -1)) * _RANDOM.uniform(170, 180))
+    for _ in range(80)
+] + [(_RANDOM.uniform(34, 37), _RANDOM.uniform(138, 141)) for _ in range(80)]
+
+VIEWPORTS = [
+    (34.5, 138.5, 36.5, 140.5),
+    (35.0, 139.0, 35.001, 139.001),
+    (-10.0, 175.0, 10.0, -175.0),
+    (-90.0, -180.0, 90.0, 180.0),
+    (-5.0, 179.9, 5.0, -179.9),
+]
+
+
+def _inside(point, viewport):
+    lat, lng = point
+    min_lat, min_lng, max_lat, max_lng = viewport
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lng > max_lng:
+        return lng >= min_lng or lng <= max_lng
+    return min_lng <= lng <= max_lng
+
+
+def test_geohash_encode_known_values():
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash_encode(-90.0, -180.0) == "000000000"
+    assert geohash_encode(90.0, 180.0) == "zzzzzzzzz"
+
+
+@pytest.mark.parametrize("viewport", VIEWPORTS)
+def test_bbox_ranges_cover_points_inside(viewport):
+    ranges = bbox_geohash_ranges(*viewport)
+    for point in POINTS:
+        if _inside(point, viewport):
+            geohash = geohash_encode(*point)
+            assert any(
+                lo <= geohash and (hi is None or geohash < hi) for lo, hi in ranges
+            )
+
+
+@pytest.mark.parametrize(
+    ("lat", "lng", "radius_m"),
+    [(35.0, 139.0, 1_000), (0.0, 179.99, 50_000), (89.9, 0.0, 100_000)],
+)
+def test_bbox_around_contains_circle(lat, lng, radius_m):
+    viewport = bbox_around(lat, lng, radius_m)
+    for point in POINTS + [(lat, lng)]:
+        if haversine_m(lat, lng, *point) <= radius_m:
+            assert _inside(point, viewport)
+
+
+@pytest.fixture(scope="module")
+def geo_list(client):
+    my_list = client.post("/api/v1/my-lists", json={"name": "geo"}).json()
+    ids = [
+        client.post(
+            f"/api/v1/my-lists/{my_list['id']}/locations",
+            json={"name": "p", "address": "a", "lat": lat, "lng": lng},
+        ).json()["id"]
+        for lat, lng in POINTS
+    ]
+    return my_list["id"], dict(zip(ids, POINTS, strict=True))
+
+
+@pytest.mark.parametrize("viewport", VIEWPORTS)
+def test_within_matches_brute_force(client, geo_list, viewport):
+    list_id, points = geo_list
+    min_lat, min_lng, max_lat, max_lng = viewport
+    response = client.get(
+        "/api/v1/locations/within",
+        params={
+            "min_lat": min_lat,
+            "min_lng": min_lng,
+            "max_lat": max_lat,
+            "max_lng": max_lng,
+            "list_id": list_id,
+            "limit": 5000,
+        },
+    )
+    assert response.status_code == 200
+    expected = sorted(i for i, point in points.items() if _inside(point, viewport))
+    assert [location["id"] for location in response.json()] == expected
+
+
+@pytest.mark.parametrize(
+    ("lat", "lng", "k", "max_distance_m"),
+    [
+        (35.5, 139.5, 5, None),
+        (0.0, 180.0, 10, None),
+        (35.5, 139.5, 200, None),
+        (35.5, 139.5, 50, 50_000),
+        (-60.0, 0.0, 3, None),
+    ],
+)
+def test_nearby_matches_brute_force(client, geo_list, lat, lng, k, max_distance_m):
+    list_id, points = geo_list
+    params = {"lat": lat, "lng": lng, "k": min(k, 100), "list_id": list_id}
+    if max_distance_m is not None:
+        params["max_distance_m"] = max_distance_m
+    response = client.get("/api/v1/locations/nearby", params=params)
+    assert response.status_code == 200
+
+    ranked = sorted((haversine_m(lat, lng, *point), i) for i, point in points.items())
+    if max_distance_m is not None:
+        ranked = [pair for pair in ranked if pair[0] <= max_distance_m]
+    expected = ranked[: params["k"]]
+    results = response.json()
+    assert [location["id"] for location in results] == [i for _, i in expected]
+    assert [location["distance_m"] for location in results] == pytest.approx(
+        [distance for distance, _ in expected]
+    )
+
+
+def test_backfill_fills_missing_geohashes(client, make_list):
+    list_id, ids = make_list([(35.0 + i / 100, 139.0) for i in range(5)])
+    params = {
+        "min_lat": 34.9,
+        "min_lng": 138.9,
+        "max_lat": 35.1,
+        "max_lng": 139.1,
+        "list_id": list_id,
+    }
+    # マイグレーション直後（列を追加しただけ）の状態を再現する
+    with Session(get_engine()) as db, db.begin():
+        db.execute(update(Location).where(Location.id.in_(ids)).values(geohash=None))
+    assert client.get("/api/v1/locations/within", params=params).json() == []
+
+    assert backfill_geohashes(get_engine(), batch_size=2) == len(ids)
+    assert backfill_geohashes(get_engine()) == 0
+
+    with Session(get_engine()) as db:
+        rows = db.execute(
+            select(Location.geohash, Location.lat, Location.lng).where(
+                Location.id.in_(ids)
+            )
+        ).all()
+    assert all(geohash == geohash_encode(lat, lng) for geohash, lat, lng in rows)
+    within = client.get("/api/v1/locations/within", params=params).json()
+    assert [location["id"] for location in within] == ids
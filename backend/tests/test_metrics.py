@@ -0,0 +1,47 @@
+import re
+
+from tests.conftest import LISTS
+
+
+def _sample(text, name, **labels):
+    for line in text.splitlines():
+        series, _, sample = line.rpartition(" ")
+        if not series.startswith(name + "{"):
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', series))
+        if all(found.get(key) == value for key, value in labels.items()):
+            return float(sample)
+    return None
+
+
+def test_metrics_report_duration_and_ttfb(client, make_list):
+    list_id, _ = make_list([(35.0, 139.0)] * 50)
+    assert client.get(f"{LISTS}/{list_id}/export").status_code == 200
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    text = response.text
+    assert (
+        "# HELP http_request_duration_seconds "
+        "Time until the response body was fully sent" in text
+    )
+    assert (
+        "# HELP http_request_ttfb_seconds Time until the response headers were sent"
+        in text
+    )
+
+    labels = {"method": "GET", "route": "/api/v1/my-lists/{list_id}/export"}
+    duration = _sample(text, "http_request_duration_seconds_sum", **labels)
+    ttfb = _sample(text, "http_request_ttfb_seconds_sum", **labels)
+    count = _sample(text, "http_request_ttfb_seconds_count", **labels)
+    assert count is not None and count >= 1
+    # ストリーミングの本文はヘッダーの送信後に書き出される
+    assert 0 < ttfb <= duration
+
+
+def test_server_timing_header(client):
+    # /changes はキャッシュしないため、毎回SQLを発行する
+    response = client.get(f"{LISTS}/changes")
+    timings = response.headers["server-timing"]
+    assert "app;dur=" in timings
+    assert "db;dur=" in timings
@@ -0,0 +1,94 @@
+from itertools import pairwise
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.crud.my_lists import MIN_ORDER_GAP
+from app.db.models import Location
+from app.db.session import get_engine
+from tests.conftest import LISTS
+
+
+def _locations(client, list_id):
+    return client.get(f"{LISTS}/{list_id}").json()["locations"]
+
+
+def _order(client, list_id):
+    return [location["id"] for location in _locations(client, list_id)]
+
+
+def _move(client, list_id, location_id, **body):
+    response = client.post(f"{LISTS}/{list_id}/locations/{location_id}/move", json=body)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_move_between_neighbours(client, make_list):
+    list_id, ids = make_list([(35.0, 139.0)] * 5)
+    assert _order(client, list_id) == ids
+
+    _move(client, list_id, ids[4], after_id=ids[0])
+    assert _order(client, list_id) == [ids[0], ids[4], ids[1], ids[2], ids[3]]
+
+    _move(client, list_id, ids[0])
+    assert _order(client, list_id) == [ids[4], ids[1], ids[2], ids[3], ids[0]]
+
+    _move(client, list_id, ids[0], before_id=ids[4])
+    assert _order(client, list_id) == [ids[0], ids[4], ids[1], ids[2], ids[3]]
+
+
+def test_move_rejects_invalid_targets(client, make_list):
+    list_id, ids = make_list([(35.0, 139.0)] * 3)
+    url = f"{LISTS}/{list_id}/locations/{ids[1]}/move"
+
+    assert client.post(url, json={"after_id": ids[1]}).status_code == 400
+    assert client.post(url, json={"after_id": 999_999}).status_code == 400
+    assert (
+        client.post(url, json={"after_id": ids[2], "before_id": ids[0]}).status_code
+        == 400
+    )
+    assert (
+        client.post(f"{LISTS}/999999/locations/{ids[1]}/move", json={}).status_code
+        == 404
+    )
+    assert _order(client, list_id) == ids
+
+
+def test_repeated_moves_rebalance(client, make_list):
+    list_id, ids = make_list([(35.0, 139.0)] * 4)
+    expected = list(ids)
+
+    # 同じ隙間に挿入し続けると隙間が半分ずつになり、途中で振り直される
+    for _ in range(60):
+        moved = expected.pop()
+        _move(client, list_id, moved, after_id=expected[0], before_id=expected[1])
+        expected.insert(1, moved)
+
+    locations = _locations(client, list_id)
+    assert [location["id"] for location in locations] == expected
+    indices = [location["order_index"] for location in locations]
+    assert min(b - a for a, b in pairwise(indices)) >= MIN_ORDER_GAP
+
+
+def test_reorder(client, make_list):
+    list_id, ids = make_list([(35.0, 139.0)] * 4)
+    url = f"{LISTS}/{list_id}/locations/reorder"
+
+    response = client.put(url, json={"location_ids": ids[::-1]})
+    assert [location["id"] for location in response.json()] == ids[::-1]
+    assert _order(client, list_id) == ids[::-1]
+
+    assert client.put(url, json={"location_ids": [ids[0], ids[0]]}).status_code == 400
+    assert _order(client, list_id) == ids[::-1]
+
+
+def test_move_with_tied_indices(client, make_list):
+    list_id, ids = make_list([(35.0, 139.0)] * 3)
+    # 同じ値が並ぶ（Integer列からの移行直後など）と中間値がないため、その場で振り直す
+    with Session(get_engine()) as db, db.begin():
+        db.execute(
+            update(Location).where(Location.my_list_id == list_id).values(order_index=0)
+        )
+
+    _move(client, list_id, ids[0], after_id=ids[1], before_id=ids[2])
+    assert _order(client, list_id) == [ids[1], ids[0], ids[2]]
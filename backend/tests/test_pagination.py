@@ -0,0 +1,83 @@
+import base64
+
+import pytest
+
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from tests.conftest import LISTS
+
+ITEMS = "/api/v1/items"
+
+
+def _walk(client, url, limit, on_page=None):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        ids += [row["id"] for row in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+        if on_page is not None:
+            on_page(ids)
+
+
+def test_cursor_round_trip():
+    values = {"updated_at": "2024-01-02T03:04:05.000006", "id": 7}
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+def test_items_cursor_walk(client):
+    for i in range(7):
+        client.post(ITEMS, json={"title": f"page {i}"})
+    everything = [
+        item["id"] for item in client.get(ITEMS, params={"limit": 10_000}).json()
+    ]
+
+    assert everything == sorted(everything)
+    assert _walk(client, ITEMS, 3) == everything
+    # 件数がlimitの倍数でも、最後に空のページで終わる
+    assert _walk(client, ITEMS, len(everything)) == everything
+
+
+def test_my_lists_cursor_walk(client, make_list):
+    for i in range(5):
+        make_list(name=f"page {i}")
+    everything = [x["id"] for x in client.get(LISTS, params={"limit": 10_000}).json()]
+
+    assert _walk(client, LISTS, 2) == everything
+    assert _walk(client, f"{LISTS}/summaries", 2) == everything
+
+
+def test_my_lists_cursor_is_stable_under_updates(client, make_list):
+    for i in range(4):
+        make_list(name=f"stable {i}")
+    everything = [x["id"] for x in client.get(LISTS, params={"limit": 10_000}).json()]
+
+    def touch_first_seen(ids):
+        # 既に返したリストを更新すると先頭に移るが、続きのページには現れない
+        client.put(f"{LISTS}/{ids[0]}", json={"description": "touched"})
+
+    walked = _walk(client, LISTS, 2, on_page=touch_first_seen)
+    assert len(walked) == len(set(walked))
+    assert walked == everything
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        base64.urlsafe_b64encode(b"[1, 2]").decode(),
+        encode_cursor({"other": 1}),
+        encode_cursor({"id": "x", "updated_at": "yesterday"}),
+    ],
+)
+@pytest.mark.parametrize("url", [ITEMS, LISTS, f"{LISTS}/summaries"])
+def test_invalid_cursor(client, url, cursor):
+    response = client.get(url, params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
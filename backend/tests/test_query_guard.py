@@ -0,0 +1,43 @@
+import pytest
+
+from app.db.query_guard import QueryBudgetExceeded, record_statement, track_queries
+from tests.conftest import LISTS
+
+
+def _query_count(response) -> int:
+    assert response.status_code == 200, response.text
+    return int(response.headers["X-Query-Count"])
+
+
+def test_list_page_queries_do_not_grow_with_lists(client, make_list):
+    for i in range(6):
+        make_list([(35.0, 139.0 + j / 100) for j in range(i + 1)], name=f"n+1 {i}")
+
+    # limit ごとにキャッシュのキーが異なるため、どちらもDBから読み込む
+    one = _query_count(client.get(LISTS, params={"limit": 1}))
+    six = _query_count(client.get(LISTS, params={"limit": 6}))
+    assert one == six
+
+
+def test_list_queries_do_not_grow_with_locations(client, make_list):
+    small, _ = make_list([(35.0, 139.0)])
+    large, _ = make_list([(35.0, 139.0 + i / 100) for i in range(30)])
+
+    assert _query_count(client.get(f"{LISTS}/{small}")) == _query_count(
+        client.get(f"{LISTS}/{large}")
+    )
+
+
+def test_budget_counts_and_raises():
+    with track_queries(budget=2) as stats:
+        record_statement("SELECT 1")
+        record_statement("SELECT 2")
+        assert not stats.exceeded
+        record_statement("SELECT 3")
+        assert stats.exceeded
+    assert stats.count == 3
+
+    with track_queries(budget=1, raise_on_exceed=True):
+        record_statement("SELECT 1")
+        with pytest.raises(QueryBudgetExceeded, match="SELECT 2"):
+            record_statement("SELECT 2")
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.db import session
+from app.db.session import (
+    PRIMARY_PIN_COOKIE,
+    get_read_session_runner,
+    primary_pin_cookie,
+)
+from app.middleware import ReadYourWritesMiddleware
+
+ITEMS = "/api/v1/items"
+REPLICA_CACHES = (
+    session.get_replica_engine,
+    session.get_async_replica_engine,
+    session.get_replica_session_local,
+    session.get_async_replica_session_local,
+)
+
+
+class FakeSession:
+    def __init__(self, name):
+        self.name = name
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """Route the sync session factories to fakes named after their database."""
+    monkeypatch.setattr(session.settings, "DB_ASYNC", False)
+    monkeypatch.setattr(
+        session, "get_session_local", lambda: lambda: FakeSession("primary")
+    )
+    monkeypatch.setattr(
+        session, "get_replica_session_local", lambda: lambda: FakeSession("replica")
+    )
+
+
+def _read(cookie: str | None = None):
+    headers = [] if cookie is None else [(b"cookie", cookie.encode())]
+    request = Request({"type": "http", "method": "GET", "headers": headers})
+
+    async def scenario():
+        async for runner in get_read_session_runner(request):
+            return runner.session.name, runner.pinned, runner.replica
+
+    return asyncio.run(scenario())
+
+
+def test_reads_use_primary_without_replica(sessions, monkeypatch):
+    monkeypatch.setattr(session.settings, "DATABASE_REPLICA_URL", None)
+    assert _read() == ("primary", False, False)
+    # レプリカがなければCookieがあってもキャッシュを迂回しない
+    assert _read(primary_pin_cookie().split(";")[0]) == ("primary", False, False)
+
+
+def test_reads_use_replica_unless_pinned(sessions, monkeypatch):
+    monkeypatch.setattr(session.settings, "DATABASE_REPLICA_URL", "sqlite://")
+    assert _read() == ("replica", False, True)
+    assert _read(primary_pin_cookie().split(";")[0]) == ("primary", True, False)
+    # 期限切れ・不正なCookieはレプリカに戻る
+    assert _read(f"{PRIMARY_PIN_COOKIE}={time.time() - 1}") == ("replica", False, True)
+    assert _read(f"{PRIMARY_PIN_COOKIE}=oops") == ("replica", False, True)
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Use the test database as its own replica."""
+    monkeypatch.setattr(
+        session.settings, "DATABASE_REPLICA_URL", os.environ["DATABASE_URL"]
+    )
+    for cached in REPLICA_CACHES:
+        cached.cache_clear()
+    yield
+    for cached in REPLICA_CACHES:
+        cached.cache_clear()
+
+
+def test_pinned_reads_bypass_the_response_cache(client, replica):
+    url = f"{ITEMS}/{client.post(ITEMS, json={'title': 'replica'}).json()['id']}"
+    client.cookies.clear()
+
+    assert client.get(url).headers["x-query-count"] == "1"
+    assert client.get(url).headers["x-query-count"] == "0"
+
+    # 書き込み直後のクライアントはプライマリから読み、キャッシュを使わない
+    client.cookies.set(PRIMARY_PIN_COOKIE, f"{time.time() + 60:.3f}")
+    try:
+        for _ in range(2):
+            response = client.get(url)
+            assert response.json()["title"] == "replica"
+            assert response.headers["x-query-count"] == "1"
+    finally:
+        client.cookies.clear()
+
+
+def test_successful_writes_pin_reads_to_primary():
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.get("/thing")
+    @app.post("/thing")
+    def thing() -> dict:
+        return {}
+
+    @app.post("/fail")
+    def fail() -> dict:
+        raise HTTPException(status_code=400)
+
+    with TestClient(app) as test_client:
+        assert PRIMARY_PIN_COOKIE not in test_client.get("/thing").cookies
+        assert PRIMARY_PIN_COOKIE not in test_client.post("/fail").cookies
+        pinned_until = float(test_client.post("/thing").cookies[PRIMARY_PIN_COOKIE])
+        assert pinned_until > time.time()
@@ -0,0 +1,55 @@
+from app.core.search import SearchIndex
+from tests.conftest import LISTS
+
+ITEMS = "/api/v1/items"
+SEARCH = "/api/v1/search"
+
+
+def test_index_matches_prefixes_and_typos():
+    index = SearchIndex([(1, "Tokyo Tower"), (2, "Kyoto Station"), (3, "Osaka")])
+    # 前方一致（全角・大文字も正規化される）
+    assert [doc for doc, _ in index.search("ｔｏｋ")] == [1]
+    # つづり間違いはトライグラム類似度で一致する
+    assert [doc for doc, _ in index.search("Kyotto")][0] == 2
+    assert index.search("nagoya") == []
+
+
+def test_index_ranks_fulltext_matches_first():
+    index = SearchIndex([(1, "harbor view"), (2, "harbour")])
+    ranked = index.search("harbor")
+    assert [doc for doc, _ in ranked] == [1, 2]
+    assert ranked[0][1] > ranked[1][1]
+
+
+def test_fallback_index_is_refreshed_after_insert(client):
+    assert client.get(SEARCH, params={"q": "zephyrquokka"}).json()["items"] == []
+
+    created = client.post(ITEMS, json={"title": "Zephyrquokka lamp"}).json()
+    items = client.get(SEARCH, params={"q": "zephyrquokka"}).json()["items"]
+    assert [item["id"] for item in items] == [created["id"]]
+
+    client.put(f"{ITEMS}/{created['id']}", json={"title": "Plain lamp"})
+    assert client.get(SEARCH, params={"q": "zephyrquokka"}).json()["items"] == []
+
+
+def test_search_locations_filtered_by_list(client):
+    first = client.post(LISTS, json={"name": "first"}).json()["id"]
+    second = client.post(LISTS, json={"name": "second"}).json()["id"]
+    ids = {}
+    for list_id in (first, second):
+        ids[list_id] = client.post(
+            f"{LISTS}/{list_id}/locations",
+            json={"name": "Quillbrook cafe", "address": "a", "lat": 1, "lng": 2},
+        ).json()["id"]
+
+    params = {"q": "quillbrook", "types": "locations"}
+    response = client.get(SEARCH, params=params).json()
+    assert response["items"] == []
+    assert {loc["id"] for loc in response["locations"]} == set(ids.values())
+
+    filtered = client.get(SEARCH, params={**params, "list_id": first}).json()
+    assert [loc["id"] for loc in filtered["locations"]] == [ids[first]]
+
+
+def test_search_rejects_empty_query(client):
+    assert client.get(SEARCH, params={"q": ""}).status_code == 422
@@ -0,0 +1,95 @@
+import pytest
+
+from app.crud.my_lists import refresh_list_summaries
+from app.db.models import MyList
+from app.db.session import get_session_local
+from tests.conftest import LISTS
+
+SUMMARY_COLUMNS = (
+    "location_count",
+    "lat_sum",
+    "lng_sum",
+    "min_lat",
+    "min_lng",
+    "max_lat",
+    "max_lng",
+)
+
+
+def _summary(client, list_id):
+    summaries = client.get(f"{LISTS}/summaries", params={"limit": 10**6}).json()
+    return next(summary for summary in summaries if summary["id"] == list_id)
+
+
+def _remove(client, list_id, location_id):
+    response = client.delete(f"{LISTS}/{list_id}/locations/{location_id}")
+    assert response.status_code == 204
+
+
+def test_summary_follows_added_points(client, make_list):
+    list_id, _ = make_list([(35.0, 139.0), (36.0, 140.0), (34.0, 139.5)])
+    summary = _summary(client, list_id)
+    assert summary["location_count"] == 3
+    assert summary["bounds"] == {
+        "min_lat": 34.0,
+        "min_lng": 139.0,
+        "max_lat": 36.0,
+        "max_lng": 140.0,
+    }
+    assert summary["centroid"] == {
+        "lat": pytest.approx(35.0),
+        "lng": pytest.approx(139.5),
+    }
+
+
+def test_removing_a_bound_point_recomputes_the_bounds(client, make_list):
+    list_id, (west, north_east, middle) = make_list(
+        [(35.0, 139.0), (36.0, 140.0), (35.5, 139.5)]
+    )
+
+    # 境界上にない地点の削除では境界は変わらない
+    _remove(client, list_id, middle)
+    assert _summary(client, list_id)["bounds"] == {
+        "min_lat": 35.0,
+        "min_lng": 139.0,
+        "max_lat": 36.0,
+        "max_lng": 140.0,
+    }
+
+    # 最大値の地点を削除すると、残りの地点から求め直す
+    _remove(client, list_id, north_east)
+    summary = _summary(client, list_id)
+    assert summary["location_count"] == 1
+    assert summary["bounds"] == {
+        "min_lat": 35.0,
+        "min_lng": 139.0,
+        "max_lat": 35.0,
+        "max_lng": 139.0,
+    }
+    assert summary["centroid"] == {
+        "lat": pytest.approx(35.0),
+        "lng": pytest.approx(139.0),
+    }
+
+    _remove(client, list_id, west)
+    summary = _summary(client, list_id)
+    assert summary["location_count"] == 0
+    assert summary["bounds"] is None
+    assert summary["centroid"] is None
+
+
+def test_incremental_summary_matches_refresh(client, make_list):
+    points = [(35 + i / 10, 139 - i / 7) for i in range(6)]
+    list_id, ids = make_list(points)
+    for location_id in (ids[0], ids[-1], ids[2]):
+        _remove(client, list_id, location_id)
+
+    with get_session_local()() as db:
+        my_list = db.get(MyList, list_id)
+        incremental = [getattr(my_list, name) for name in SUMMARY_COLUMNS]
+        refresh_list_summaries(db, [list_id])
+        db.expire_all()
+        my_list = db.get(MyList, list_id)
+        refreshed = [getattr(my_list, name) for name in SUMMARY_COLUMNS]
+        db.rollback()
+    assert incremental == pytest.approx(refreshed)
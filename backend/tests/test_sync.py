@@ -0,0 +1,107 @@
+import json
+
+from tests.conftest import LISTS
+
+
+def _changes(client, since=None, **params):
+    if since is not None:
+        params["since"] = since
+    response = client.get(f"{LISTS}/changes", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _location(i):
+    return {"name": f"p{i}", "address": "a", "lat": 1.0 + i, "lng": 100.0 + i}
+
+
+def test_changes_without_token_reset(client):
+    changes = _changes(client)
+    assert changes["reset"] is True
+    assert _changes(client, changes["token"] + 100)["reset"] is True
+
+
+def test_changes_and_tombstones(client):
+    token = _changes(client)["token"]
+
+    list_id = client.post(LISTS, json={"name": "A"}).json()["id"]
+    client.put(f"{LISTS}/{list_id}", json={"name": "A2"})
+    changes = _changes(client, token)
+    assert [(x["id"], x["name"]) for x in changes["lists"]] == [(list_id, "A2")]
+    token = changes["token"]
+
+    ids = [
+        client.post(f"{LISTS}/{list_id}/locations", json=_location(i)).json()["id"]
+        for i in range(3)
+    ]
+    changes = _changes(client, token)
+    assert sorted(x["id"] for x in changes["locations"]) == ids
+    assert changes["lists"][0]["location_count"] == 3
+    token = changes["token"]
+
+    client.post(f"{LISTS}/{list_id}/locations/{ids[0]}/move", json={})
+    changes = _changes(client, token)
+    assert [x["id"] for x in changes["locations"]] == [ids[0]]
+    token = changes["token"]
+
+    client.delete(f"{LISTS}/{list_id}/locations/{ids[1]}")
+    changes = _changes(client, token)
+    assert changes["deleted_locations"] == [ids[1]]
+    assert changes["locations"] == []
+    token = changes["token"]
+
+    # 更新の後に削除されたリストは墓標だけが返り、地点の墓標は含まれない
+    client.post(f"{LISTS}/{list_id}/locations", json=_location(9))
+    client.put(f"{LISTS}/{list_id}", json={"name": "A3"})
+    client.delete(f"{LISTS}/{list_id}")
+    changes = _changes(client, token)
+    assert changes["deleted_lists"] == [list_id]
+    assert changes["lists"] == []
+    assert changes["locations"] == []
+    token = changes["token"]
+
+    idle = _changes(client, token)
+    assert idle["token"] == token
+    assert (idle["lists"], idle["deleted_lists"]) == ([], [])
+
+
+def test_failed_write_records_nothing(client):
+    token = _changes(client)["token"]
+    assert client.put(f"{LISTS}/999999", json={"name": "x"}).status_code == 404
+    assert _changes(client, token)["token"] == token
+
+
+def test_changes_paging(client):
+    token = _changes(client)["token"]
+    list_ids = [
+        client.post(LISTS, json={"name": f"P{i}"}).json()["id"] for i in range(5)
+    ]
+
+    seen, pages = [], 0
+    while True:
+        changes = _changes(client, token, limit=2)
+        seen += [x["id"] for x in changes["lists"]]
+        token = changes["token"]
+        pages += 1
+        if not changes["has_more"]:
+            break
+    assert seen == list_ids
+    assert pages == 3
+
+
+def test_changes_keep_one_transaction_together(client):
+    list_id = client.post(LISTS, json={"name": "import"}).json()["id"]
+    token = _changes(client)["token"]
+
+    body = "\n".join(json.dumps(_location(i)) for i in range(30))
+    response = client.post(
+        f"{LISTS}/{list_id}/locations/import",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.json()["inserted"] == 30
+
+    # 1つのトランザクションの変更は limit を超えても1ページで返る
+    changes = _changes(client, token, limit=5)
+    assert len(changes["locations"]) == 30
+    assert changes["has_more"] is False
@@ -15,3 +15,10 @@ INSERT INTO items (title, description) VALUES
     ('Sample Item 1', 'This is a sample item for testing'),
     ('Sample Item 2', 'Another sample item')
 ON CONFLICT DO NOTHING;
+
+-- Full-text (tsvector) and fuzzy (pg_trgm) search indexes, same as app/db/models.py
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_items_search_tsv ON items
+    USING gin (to_tsvector('simple'::regconfig, title || ' ' || coalesce(description, '')));
+CREATE INDEX IF NOT EXISTS ix_items_search_trgm ON items
+    USING gin ((title || ' ' || coalesce(description, '')) gin_trgm_ops);
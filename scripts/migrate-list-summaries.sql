@@ -0,0 +1,34 @@
+-- Add the denormalized location aggregates to my_lists (see app/db/models.py MyList)
+-- and backfill them from existing locations. Safe to run more than once.
+ALTER TABLE my_lists
+    ADD COLUMN IF NOT EXISTS location_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS min_lat DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS min_lng DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS max_lat DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS max_lng DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS lat_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS lng_sum DOUBLE PRECISION NOT NULL DEFAULT 0;
+
+UPDATE my_lists AS l SET
+    location_count = s.location_count,
+    min_lat = s.min_lat,
+    min_lng = s.min_lng,
+    max_lat = s.max_lat,
+    max_lng = s.max_lng,
+    lat_sum = s.lat_sum,
+    lng_sum = s.lng_sum
+FROM (
+    SELECT
+        my_lists.id,
+        count(locations.id) AS location_count,
+        min(locations.lat) AS min_lat,
+        min(locations.lng) AS min_lng,
+        max(locations.lat) AS max_lat,
+        max(locations.lng) AS max_lng,
+        coalesce(sum(locations.lat), 0) AS lat_sum,
+        coalesce(sum(locations.lng), 0) AS lng_sum
+    FROM my_lists
+    LEFT JOIN locations ON locations.my_list_id = my_lists.id
+    GROUP BY my_lists.id
+) AS s
+WHERE l.id = s.id;
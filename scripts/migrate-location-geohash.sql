@@ -0,0 +1,8 @@
+-- Add the geohash column and index to locations (see app/db/models.py Location).
+-- Safe to run more than once. Existing rows stay NULL until backfilled, and
+-- NULL rows are never matched by /locations/within or /locations/nearby, so
+-- run the backfill right after this script (from backend/):
+--
+--     python -m app.db.backfill_geohash
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS geohash VARCHAR(9);
+CREATE INDEX IF NOT EXISTS ix_locations_geohash ON locations (geohash);
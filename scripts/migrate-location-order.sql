@@ -0,0 +1,7 @@
+-- Switch locations.order_index to a fractional key and add the per-list
+-- ordering index (see app/db/models.py Location). Safe to run more than once.
+-- Until this runs, an INTEGER column silently rounds the midpoints written
+-- by moves, so moved locations collide with or jump past their neighbours.
+ALTER TABLE locations ALTER COLUMN order_index TYPE DOUBLE PRECISION;
+CREATE INDEX IF NOT EXISTS ix_locations_my_list_id_order_index
+    ON locations (my_list_id, order_index);
@@ -0,0 +1,6 @@
+-- Add the (updated_at, id) index behind the keyset cursor of GET /my-lists
+-- (see app/db/models.py MyList). Safe to run more than once.
+-- CONCURRENTLY keeps the table writable while the index builds; it cannot
+-- run inside a transaction, so run this file with plain psql (no -1).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_my_lists_updated_at_id
+    ON my_lists (updated_at, id);
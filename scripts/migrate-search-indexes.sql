@@ -0,0 +1,16 @@
+-- Add the full-text (tsvector) and fuzzy (pg_trgm) search indexes behind
+-- GET /search (see app/db/models.py _add_search_indexes). Safe to run more
+-- than once.
+-- CONCURRENTLY keeps the tables writable while the indexes build; it cannot
+-- run inside a transaction, so run this file with plain psql (no -1).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_search_tsv ON items
+    USING gin (to_tsvector('simple'::regconfig, title || ' ' || coalesce(description, '')));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_search_trgm ON items
+    USING gin ((title || ' ' || coalesce(description, '')) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_locations_search_tsv ON locations
+    USING gin (to_tsvector('simple'::regconfig, name || ' ' || address));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_locations_search_trgm ON locations
+    USING gin ((name || ' ' || address) gin_trgm_ops);
@@ -0,0 +1,20 @@
+-- Add the delta-sync change log (see app/db/models.py SyncChange / SyncCounter).
+-- Safe to run more than once. Clients holding no token start with a full fetch.
+CREATE TABLE IF NOT EXISTS sync_changes (
+    id SERIAL PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    entity VARCHAR(16) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    list_id INTEGER NOT NULL,
+    deleted BOOLEAN NOT NULL DEFAULT false,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+);
+CREATE INDEX IF NOT EXISTS ix_sync_changes_seq ON sync_changes (seq);
+
+CREATE TABLE IF NOT EXISTS sync_counter (
+    id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL DEFAULT 0,
+    pruned_seq INTEGER NOT NULL DEFAULT 0
+);
+INSERT INTO sync_counter (id, seq, pruned_seq) VALUES (1, 0, 0)
+ON CONFLICT (id) DO NOTHING;